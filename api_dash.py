@@ -1,19 +1,28 @@
 #!/usr/bin/env python3
 """
 Nanobot API Usage Dashboard
-Usage: python3 api_dash.py [-i SECONDS]
+Usage: python3 api_dash.py [-i SECONDS] [--rebuild]
 """
 
+import hashlib
 import json
 import os
 import sys
 import time
 import signal
 import argparse
+from collections import deque
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
-USAGE_FILE = Path.home() / ".nanobot" / "usage.jsonl"
+USAGE_FILE  = Path.home() / ".nanobot" / "usage.jsonl"
+ROLLUP_FILE = Path.home() / ".nanobot" / "usage_rollup.json"
+ROLLUP_VERSION = 2
+
+try:
+    from nanobot.utils import usage_archive  # closed days rotated out of USAGE_FILE
+except ImportError:  # running outside the project tree: live log only
+    usage_archive = None
 
 # ── Fallback price table (USD / 1M tokens) ────────────────────
 # Mirrors litellm_provider._PRICE_TABLE — first keyword match wins.
@@ -98,49 +107,278 @@ P6   = '\033[38;5;87m'
 
 # ── Data helpers ──────────────────────────────────────────────
 
-def load_records() -> list[dict]:
-    if not USAGE_FILE.exists():
-        return []
-    records = []
-    with open(USAGE_FILE, encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                r = json.loads(line)
-                # Back-fill cost when it was stored as 0 but tokens are present
-                if r.get("cost", 0.0) == 0.0 and r.get("total", 0) > 0:
-                    estimated = _estimate_cost(
-                        r.get("model", ""),
-                        r.get("in", 0),
-                        r.get("out", 0),
-                    )
-                    if estimated > 0:
-                        r = dict(r, cost=estimated, _estimated=True)
-                records.append(r)
-            except json.JSONDecodeError:
-                pass
-    return records
-
-
-def compute_stats(records: list[dict], since: datetime | None = None) -> dict:
-    s = {"calls": 0, "in": 0, "out": 0, "total": 0, "cost": 0.0}
-    for r in records:
+def _backfill_cost(r: dict) -> dict:
+    """Estimate cost when it was stored as 0 but tokens are present."""
+    if r.get("cost", 0.0) == 0.0 and r.get("total", 0) > 0:
+        estimated = _estimate_cost(r.get("model", ""), r.get("in", 0), r.get("out", 0))
+        if estimated > 0:
+            r = dict(r, cost=estimated, _estimated=True)
+    return r
+
+
+def _hour_key(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%dT%H")
+
+
+def _empty_stats() -> dict:
+    return {"calls": 0, "in": 0, "out": 0, "total": 0, "cost": 0.0}
+
+
+def _add_stats(b: dict, row: list) -> None:
+    b["calls"] += row[0]
+    b["in"]    += row[1]
+    b["out"]   += row[2]
+    b["total"] += row[3]
+    b["cost"]  += row[4]
+
+
+class UsageIndex:
+    """Running aggregates over the usage log and its daily archive.
+
+    Each refresh parses only the bytes appended to usage.jsonl since the
+    last one. Records are folded into hourly buckets keyed by (sender,
+    channel, model), from which every dashboard view is summed — so "last 7
+    days" is aligned to the hour. Closed days rotated into the archive
+    (nanobot.utils.usage_archive) are read once each from their columnar
+    files and kept per day. The buckets, read offset and recent calls are
+    checkpointed to ROLLUP_FILE so a restart resumes where it stopped
+    instead of reparsing months of history. A live log that shrank or whose
+    first line changed (rotation) is re-read from the start.
+    """
+
+    CHUNK = 4 * 1024 * 1024
+    SAVE_EVERY_S = 30.0
+
+    def __init__(self, usage_file: Path | None = None, rollup_file: Path | None = None, recent: int = 10):
+        self.usage_file = usage_file or USAGE_FILE
+        self.rollup_file = rollup_file or ROLLUP_FILE
+        self._recent_n = recent
+        self._saved_at = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        # Archived day → {"sig": [file, mtime_ns, size], "hours": {...}, "models": {...}}
+        self.archive: dict[str, dict] = {}
+        self.recent: deque[dict] = deque(maxlen=self._recent_n)
+        self._reset_live()
+
+    def _reset_live(self) -> None:
+        self.offset = 0
+        self.head = ""  # hash of the log's first line, to detect replacement
+        # "YYYY-MM-DDTHH" → (sender, channel, model) → [calls, in, out, total, cost]
+        self.hours: dict[str, dict[tuple[str, str, str], list]] = {}
+        self.models: dict[str, int] = {}  # every record, including ones without a timestamp
+        self.dirty = True
+
+    # ── Ingest ────────────────────────────────────────────────
+
+    def _add(self, r: dict) -> None:
+        r = _backfill_cost(r)
+        model = r.get("model", "unknown")
+        self.models[model] = self.models.get(model, 0) + 1
+        self.recent.append(r)
         try:
             ts = datetime.fromisoformat(r["ts"])
-            if ts.tzinfo is None:
-                ts = ts.replace(tzinfo=timezone.utc)
-            if since and ts < since:
-                continue
-        except (KeyError, ValueError):
-            continue
-        s["calls"] += 1
-        s["in"]    += r.get("in", 0)
-        s["out"]   += r.get("out", 0)
-        s["total"] += r.get("total", 0)
-        s["cost"]  += r.get("cost", 0.0)
-    return s
+        except (KeyError, ValueError, TypeError):
+            return
+        ts = ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+        key = (r.get("sender", "unknown"), r.get("channel", "unknown"), r.get("model", "unknown"))
+        row = self.hours.setdefault(_hour_key(ts), {}).setdefault(key, [0, 0, 0, 0, 0.0])
+        row[0] += 1
+        row[1] += r.get("in", 0)
+        row[2] += r.get("out", 0)
+        row[3] += r.get("total", 0)
+        row[4] += r.get("cost", 0.0)
+
+    def refresh(self) -> int:
+        """Fold new archived days and appended records into the aggregates. Returns records added."""
+        return self._refresh_archive() + self._refresh_live()
+
+    def _refresh_archive(self) -> int:
+        if usage_archive is None:
+            return 0
+        files = usage_archive.day_files(usage_archive.archive_dir(self.usage_file))
+        for day in [d for d in self.archive if d not in files]:
+            del self.archive[day]
+            self.dirty = True
+        added = 0
+        for day, path in files.items():
+            try:
+                st = path.stat()
+                sig = [path.name, st.st_mtime_ns, st.st_size]
+                if self.archive.get(day, {}).get("sig") == sig:
+                    continue
+                groups = usage_archive.aggregate(
+                    usage_archive.read_table(path), ("hour", "sender", "channel", "model")
+                )
+            except Exception:
+                continue  # being written, or unreadable; retried next refresh
+            hours: dict[str, dict[tuple[str, str, str], list]] = {}
+            models: dict[str, int] = {}
+            for (hour, sender, channel, model), g in groups.items():
+                cost = g["cost"] or _estimate_cost(model, g["in"], g["out"])
+                hours.setdefault(hour, {})[(sender, channel, model)] = [g["calls"], g["in"], g["out"], g["total"], cost]
+                models[model] = models.get(model, 0) + g["calls"]
+                added += g["calls"]
+            self.archive[day] = {"sig": sig, "hours": hours, "models": models}
+            self.dirty = True
+        return added
+
+    def _refresh_live(self) -> int:
+        try:
+            f = open(self.usage_file, "rb")
+        except FileNotFoundError:
+            if self.offset:
+                self._reset_live()
+            return 0
+        added = 0
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            head = hashlib.sha1(f.readline()).hexdigest() if size else ""
+            if size < self.offset or (self.offset and head != self.head):
+                self._reset_live()
+            self.head = head
+            f.seek(self.offset)
+            pending = b""
+            while True:
+                chunk = f.read(self.CHUNK)
+                if not chunk:
+                    break
+                data = pending + chunk
+                cut = data.rfind(b"\n") + 1  # leave a partially written last line for next time
+                pending = data[cut:]
+                for line in data[:cut].splitlines():
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        self._add(json.loads(line))
+                        added += 1
+                    except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+                        pass
+                self.offset += cut
+        if added:
+            self.dirty = True
+        return added
+
+    # ── Checkpoint ────────────────────────────────────────────
+
+    @staticmethod
+    def _dump_hours(hours: dict) -> dict:
+        return {hour: [[*key, *row] for key, row in rows.items()] for hour, rows in hours.items()}
+
+    @staticmethod
+    def _load_hours(data: dict) -> dict:
+        return {
+            hour: {(s, c, m): [calls, i, o, t, cost] for s, c, m, calls, i, o, t, cost in rows}
+            for hour, rows in data.items()
+        }
+
+    def load_checkpoint(self) -> bool:
+        """Restore aggregates from ROLLUP_FILE. Returns False if absent or unreadable."""
+        try:
+            data = json.loads(self.rollup_file.read_text(encoding="utf-8"))
+            if data.get("version") != ROLLUP_VERSION:
+                return False
+            self.reset()
+            self.offset = int(data["offset"])
+            self.head = data["head"]
+            self.hours = self._load_hours(data["hours"])
+            self.models = dict(data["models"])
+            self.recent.extend(data["recent"])
+            self.archive = {
+                day: {"sig": a["sig"], "hours": self._load_hours(a["hours"]), "models": a["models"]}
+                for day, a in data["archive"].items()
+            }
+            self.dirty = False
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            self.reset()
+            return False
+
+    def save_checkpoint(self, force: bool = False) -> None:
+        """Persist aggregates if they changed (at most every SAVE_EVERY_S unless forced)."""
+        if not self.dirty or (not force and time.monotonic() - self._saved_at < self.SAVE_EVERY_S):
+            return
+        data = {
+            "version": ROLLUP_VERSION,
+            "offset":  self.offset,
+            "head":    self.head,
+            "hours":   self._dump_hours(self.hours),
+            "models":  self.models,
+            "recent":  list(self.recent),
+            "archive": {
+                day: {"sig": a["sig"], "hours": self._dump_hours(a["hours"]), "models": a["models"]}
+                for day, a in self.archive.items()
+            },
+        }
+        try:
+            self.rollup_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.rollup_file.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+            tmp.replace(self.rollup_file)
+            self.dirty = False
+            self._saved_at = time.monotonic()
+        except OSError:
+            pass
+
+    # ── Views ─────────────────────────────────────────────────
+
+    def _rows(self, since: datetime | None = None):
+        floor = _hour_key(since.astimezone(timezone.utc)) if since else ""
+        sources = [a["hours"] for day, a in self.archive.items() if day >= floor[:10]]
+        for hours in sources + [self.hours]:
+            for hour, rows in hours.items():
+                if hour >= floor:
+                    for key, row in rows.items():
+                        yield hour, key, row
+
+    def model_calls(self) -> dict[str, int]:
+        calls = dict(self.models)
+        for a in self.archive.values():
+            for model, n in a["models"].items():
+                calls[model] = calls.get(model, 0) + n
+        return calls
+
+    def stats(self, since: datetime | None = None) -> dict:
+        s = _empty_stats()
+        for _, _, row in self._rows(since):
+            _add_stats(s, row)
+        return s
+
+    def user_stats(self, since: datetime | None = None) -> list[dict]:
+        """Usage grouped by (sender, channel), sorted by total tokens desc."""
+        buckets: dict[tuple[str, str], dict] = {}
+        for _, (sender, channel, _), row in self._rows(since):
+            b = buckets.get((sender, channel))
+            if b is None:
+                b = buckets[(sender, channel)] = {"sender": sender, "channel": channel, **_empty_stats()}
+            _add_stats(b, row)
+        return sorted(buckets.values(), key=lambda x: x["total"], reverse=True)
+
+    def daily_stats(self, days: int = 7) -> list[tuple[str, dict]]:
+        """Per-day stats for the last N days (newest first)."""
+        buckets: dict[str, dict] = {}
+        for hour, _, row in self._rows(datetime.now(timezone.utc) - timedelta(days=days)):
+            _add_stats(buckets.setdefault(hour[:10], _empty_stats()), row)
+        return sorted(buckets.items(), reverse=True)
+
+    def user_daily_stats(self, days: int = 7) -> list[tuple[str, list[dict]]]:
+        """Per-day, per-user stats for the last N days (newest first)."""
+        day_users: dict[str, dict[tuple[str, str], dict]] = {}
+        for hour, (sender, channel, _), row in self._rows(datetime.now(timezone.utc) - timedelta(days=days)):
+            users = day_users.setdefault(hour[:10], {})
+            b = users.get((sender, channel))
+            if b is None:
+                b = users[(sender, channel)] = {"sender": sender, "channel": channel, **_empty_stats()}
+            _add_stats(b, row)
+        return [
+            (day_key, sorted(day_users[day_key].values(), key=lambda x: x["total"], reverse=True))
+            for day_key in sorted(day_users, reverse=True)
+        ]
+
+    def recent_calls(self) -> list[dict]:
+        return sorted(self.recent, key=lambda r: r.get("ts", ""), reverse=True)
 
 
 def fmt_tokens(n: int) -> str:
@@ -166,96 +404,6 @@ def short_model(model: str) -> str:
     return display[:28]
 
 
-def compute_user_stats(records: list[dict], since: datetime | None = None) -> list[dict]:
-    """Aggregate usage grouped by (sender, channel), sorted by total tokens desc."""
-    buckets: dict[tuple[str, str], dict] = {}
-    for r in records:
-        try:
-            ts = datetime.fromisoformat(r["ts"])
-            if ts.tzinfo is None:
-                ts = ts.replace(tzinfo=timezone.utc)
-            if since and ts < since:
-                continue
-        except (KeyError, ValueError):
-            continue
-        key = (r.get("sender", "unknown"), r.get("channel", "unknown"))
-        if key not in buckets:
-            buckets[key] = {"sender": key[0], "channel": key[1],
-                            "calls": 0, "in": 0, "out": 0, "total": 0, "cost": 0.0}
-        b = buckets[key]
-        b["calls"] += 1
-        b["in"]    += r.get("in", 0)
-        b["out"]   += r.get("out", 0)
-        b["total"] += r.get("total", 0)
-        b["cost"]  += r.get("cost", 0.0)
-    return sorted(buckets.values(), key=lambda x: x["total"], reverse=True)
-
-
-def compute_daily_stats(records: list[dict], days: int = 7) -> list[tuple[str, dict]]:
-    """Return per-day stats for the last N days (newest first)."""
-    now = datetime.now(timezone.utc)
-    # Build a bucket per calendar date (local date derived from UTC ts)
-    buckets: dict[str, dict] = {}
-    cutoff = now - timedelta(days=days)
-    for r in records:
-        try:
-            ts = datetime.fromisoformat(r["ts"])
-            if ts.tzinfo is None:
-                ts = ts.replace(tzinfo=timezone.utc)
-            if ts < cutoff:
-                continue
-        except (KeyError, ValueError):
-            continue
-        day_key = ts.strftime("%Y-%m-%d")
-        if day_key not in buckets:
-            buckets[day_key] = {"calls": 0, "in": 0, "out": 0, "total": 0, "cost": 0.0}
-        b = buckets[day_key]
-        b["calls"] += 1
-        b["in"]    += r.get("in", 0)
-        b["out"]   += r.get("out", 0)
-        b["total"] += r.get("total", 0)
-        b["cost"]  += r.get("cost", 0.0)
-    return sorted(buckets.items(), reverse=True)  # newest first
-
-
-def compute_user_daily_stats(records: list[dict], days: int = 7) -> list[tuple[str, list[dict]]]:
-    """Return per-day, per-user stats for the last N days (newest first)."""
-    now = datetime.now(timezone.utc)
-    cutoff = now - timedelta(days=days)
-    # day_key → {(sender, channel) → stats}
-    day_users: dict[str, dict[tuple[str, str], dict]] = {}
-    for r in records:
-        try:
-            ts = datetime.fromisoformat(r["ts"])
-            if ts.tzinfo is None:
-                ts = ts.replace(tzinfo=timezone.utc)
-            if ts < cutoff:
-                continue
-        except (KeyError, ValueError):
-            continue
-        day_key = ts.strftime("%Y-%m-%d")
-        key = (r.get("sender", "unknown"), r.get("channel", "unknown"))
-        if day_key not in day_users:
-            day_users[day_key] = {}
-        if key not in day_users[day_key]:
-            day_users[day_key][key] = {
-                "sender": key[0], "channel": key[1],
-                "calls": 0, "in": 0, "out": 0, "total": 0, "cost": 0.0,
-            }
-        b = day_users[day_key][key]
-        b["calls"] += 1
-        b["in"]    += r.get("in", 0)
-        b["out"]   += r.get("out", 0)
-        b["total"] += r.get("total", 0)
-        b["cost"]  += r.get("cost", 0.0)
-    # Sort days newest first; within each day sort users by total desc
-    result = []
-    for day_key in sorted(day_users.keys(), reverse=True):
-        users = sorted(day_users[day_key].values(), key=lambda x: x["total"], reverse=True)
-        result.append((day_key, users))
-    return result
-
-
 # ── Render ────────────────────────────────────────────────────
 
 W = 70  # display width
@@ -265,21 +413,22 @@ def hr(char="─"):
     print(f"  {D}{char * W}{NC}")
 
 
-def render(interval: int) -> None:
+def render(interval: int, index: UsageIndex) -> None:
     now = datetime.now(timezone.utc)
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     week_start  = now - timedelta(days=7)
 
-    records          = load_records()
-    today            = compute_stats(records, since=today_start)
-    week             = compute_stats(records, since=week_start)
-    alltime          = compute_stats(records)
-    user_stats_all   = compute_user_stats(records)               # all-time
-    user_stats_today = compute_user_stats(records, since=today_start)
-    user_stats_week  = compute_user_stats(records, since=week_start)
-    daily_stats      = compute_daily_stats(records, days=7)
-    user_daily       = compute_user_daily_stats(records, days=7)
-    recent           = sorted(records, key=lambda r: r.get("ts", ""), reverse=True)[:10]
+    index.refresh()
+    index.save_checkpoint()
+    today            = index.stats(since=today_start)
+    week             = index.stats(since=week_start)
+    alltime          = index.stats()
+    user_stats_all   = index.user_stats()                        # all-time
+    user_stats_today = index.user_stats(since=today_start)
+    user_stats_week  = index.user_stats(since=week_start)
+    daily_stats      = index.daily_stats(days=7)
+    user_daily       = index.user_daily_stats(days=7)
+    recent           = index.recent_calls()
 
     # ── Banner ────────────────────────────────────────────────
     print()
@@ -430,10 +579,7 @@ def render(interval: int) -> None:
     print(f"  {BOLD}MODELS  {D}(cost pricing match){NC}")
     hr()
 
-    model_calls: dict[str, int] = {}
-    for r in records:
-        m = r.get("model", "unknown")
-        model_calls[m] = model_calls.get(m, 0) + 1
+    model_calls = index.model_calls()
 
     if not model_calls:
         print(f"  {D}No model data.{NC}")
@@ -455,7 +601,12 @@ def render(interval: int) -> None:
 
 # ── Main loop ─────────────────────────────────────────────────
 
+_index: UsageIndex | None = None
+
+
 def cleanup(signum=None, frame=None):
+    if _index is not None:
+        _index.save_checkpoint(force=True)
     # Show cursor, reset terminal
     sys.stdout.write("\033[?25h")
     sys.stdout.flush()
@@ -467,8 +618,15 @@ def main():
     parser = argparse.ArgumentParser(description="Nanobot API Usage Dashboard")
     parser.add_argument("-i", "--interval", type=int, default=5,
                         help="Refresh interval in seconds (default: 5)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help=f"Ignore the rollup checkpoint ({ROLLUP_FILE.name}) and reparse the whole log")
     args = parser.parse_args()
 
+    global _index
+    _index = UsageIndex()
+    if not args.rebuild:
+        _index.load_checkpoint()
+
     signal.signal(signal.SIGINT,  cleanup)
     signal.signal(signal.SIGTERM, cleanup)
 
@@ -485,7 +643,7 @@ def main():
             sys.stdout.write("\033[H")
             sys.stdout.flush()
 
-            render(args.interval)
+            render(args.interval, _index)
 
             # Erase from cursor to end of screen (clear leftover lines)
             sys.stdout.write("\033[J")
@@ -0,0 +1,84 @@
+"""
+Benchmark: low-signal history filtering on a 10k-message session.
+
+Compares the previous path (nine regexes run over every assistant message
+on every turn) with the current one (classified once in add_message, flag
+check in get_history).
+
+Usage:
+    python benchmarks/bench_history_filter.py [--messages 10000] [--repeat 50]
+"""
+
+import argparse
+import random
+import time
+
+from loguru import logger
+
+from nanobot.session.manager import LOW_SIGNAL_ASSISTANT_PATTERNS, Session
+
+REPLIES = [
+    "查询中，请稍候片刻。",
+    "根据最新数据，本季度共有 12 项政策更新，主要集中在人才引进和科研经费两方面。" * 3,
+    "我正在从政策数据库获取信息。",
+    "Here is the summary you asked for: revenue grew 8% quarter over quarter, driven by APAC.",
+    "抱歉，查询遇到了技术问题。",
+    "好的，已为你整理如下：\n1. 会议时间调整到周四下午\n2. 材料需要在周三前提交\n3. 参会人员名单见附件",
+]
+
+
+def _legacy_is_low_signal(content: str) -> bool:
+    text = content.strip()
+    if not text or len(text) > 1200:
+        return False
+    return any(pattern.search(text) for pattern in LOW_SIGNAL_ASSISTANT_PATTERNS)
+
+
+def _legacy_filter(messages: list[dict]) -> list[dict]:
+    filtered = []
+    for message in messages:
+        if message.get("role") == "assistant" and _legacy_is_low_signal(str(message.get("content", ""))):
+            if filtered and filtered[-1].get("role") == "user":
+                filtered.pop()
+            continue
+        filtered.append(message)
+    return [{"role": m["role"], "content": m["content"]} for m in filtered]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    logger.disable("nanobot")
+
+    rng = random.Random(0)
+    session = Session(key="bench:1")
+    start = time.perf_counter()
+    for i in range(args.messages // 2):
+        session.add_message("user", f"question {i}")
+        session.add_message("assistant", rng.choice(REPLIES))
+    classify_s = time.perf_counter() - start
+
+    window = args.messages
+    assert _legacy_filter(session.messages) == session.get_history(max_messages=window)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        _legacy_filter(session.messages)
+    legacy_s = (time.perf_counter() - start) / args.repeat
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        session.get_history(max_messages=window)
+    flagged_s = (time.perf_counter() - start) / args.repeat
+
+    print(f"session: {args.messages} messages, window: {window}, repeat: {args.repeat}")
+    print(f"add_message total (incl. classification): {classify_s * 1000:8.2f} ms")
+    print(f"get_history, regex per turn (old):        {legacy_s * 1000:8.2f} ms")
+    print(f"get_history, stored flag (new):           {flagged_s * 1000:8.2f} ms")
+    print(f"speedup: {legacy_s / flagged_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
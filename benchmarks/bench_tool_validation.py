@@ -0,0 +1,156 @@
+"""
+Benchmark: tool parameter validation on the hot path.
+
+Compares the previous path (walking the JSON schema dict on every call)
+with the current one (schema compiled into validator closures once, at
+registration). Runs the cases from tests/test_tool_validation.py, plus a
+large MCP-style schema with many nested properties.
+
+Usage:
+    python benchmarks/bench_tool_validation.py [--repeat 20000] [--properties 60]
+"""
+
+import argparse
+import importlib.util
+import time
+from pathlib import Path
+from typing import Any
+
+from nanobot.agent.tools.base import Tool
+
+spec = importlib.util.spec_from_file_location(
+    "test_tool_validation", Path(__file__).parents[1] / "tests" / "test_tool_validation.py"
+)
+_cases = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(_cases)
+
+# Parameter sets exercised by tests/test_tool_validation.py
+SAMPLE_PARAMS = [
+    {"query": "hi"},
+    {"query": "hi", "count": 0},
+    {"query": "hi", "count": "2"},
+    {"query": "h", "count": 2, "mode": "slow"},
+    {"query": "hi", "count": 2, "meta": {"flags": [1, "ok"]}},
+    {"query": "hi", "count": 2, "extra": "x"},
+]
+
+
+def _legacy_validate(val: Any, schema: dict[str, Any], path: str) -> list[str]:
+    t, label = schema.get("type"), path or "parameter"
+    if t in Tool._TYPE_MAP and not isinstance(val, Tool._TYPE_MAP[t]):
+        return [f"{label} should be {t}"]
+    errors = []
+    if "enum" in schema and val not in schema["enum"]:
+        errors.append(f"{label} must be one of {schema['enum']}")
+    if t in ("integer", "number"):
+        if "minimum" in schema and val < schema["minimum"]:
+            errors.append(f"{label} must be >= {schema['minimum']}")
+        if "maximum" in schema and val > schema["maximum"]:
+            errors.append(f"{label} must be <= {schema['maximum']}")
+    if t == "string":
+        if "minLength" in schema and len(val) < schema["minLength"]:
+            errors.append(f"{label} must be at least {schema['minLength']} chars")
+        if "maxLength" in schema and len(val) > schema["maxLength"]:
+            errors.append(f"{label} must be at most {schema['maxLength']} chars")
+    if t == "object":
+        props = schema.get("properties", {})
+        for k in schema.get("required", []):
+            if k not in val:
+                errors.append(f"missing required {path + '.' + k if path else k}")
+        for k, v in val.items():
+            if k in props:
+                errors.extend(_legacy_validate(v, props[k], path + "." + k if path else k))
+    if t == "array" and "items" in schema:
+        for i, item in enumerate(val):
+            errors.extend(_legacy_validate(item, schema["items"], f"{path}[{i}]" if path else f"[{i}]"))
+    return errors
+
+
+def _legacy_validate_params(tool: Tool, params: dict[str, Any]) -> list[str]:
+    schema = tool.parameters or {}
+    return _legacy_validate(params, {**schema, "type": "object"}, "")
+
+
+class WideTool(Tool):
+    """An MCP-style tool with many documented, nested properties."""
+
+    def __init__(self, properties: int):
+        self._schema = {
+            "type": "object",
+            "properties": {
+                f"field_{i}": {
+                    "type": "object",
+                    "description": f"Option group {i}",
+                    "properties": {
+                        "name": {"type": "string", "minLength": 1, "maxLength": 64},
+                        "limit": {"type": "integer", "minimum": 0, "maximum": 1000},
+                        "mode": {"type": "string", "enum": ["a", "b", "c"]},
+                        "tags": {"type": "array", "items": {"type": "string"}},
+                    },
+                    "required": ["name"],
+                }
+                for i in range(properties)
+            },
+            "required": ["field_0"],
+        }
+        self.params = {
+            f"field_{i}": {"name": f"n{i}", "limit": i, "mode": "b", "tags": ["x", "y"]}
+            for i in range(properties)
+        }
+
+    @property
+    def name(self) -> str:
+        return "wide"
+
+    @property
+    def description(self) -> str:
+        return "wide tool"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return self._schema
+
+    async def execute(self, **kwargs: Any) -> str:
+        return "ok"
+
+
+def _time(fn, cases: list[dict[str, Any]], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for params in cases:
+            fn(params)
+    return (time.perf_counter() - start) / (repeat * len(cases))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=20_000)
+    parser.add_argument("--properties", type=int, default=60)
+    args = parser.parse_args()
+
+    sample = _cases.SampleTool()
+    wide = WideTool(args.properties)
+    suites = [
+        ("test_tool_validation cases", sample, SAMPLE_PARAMS, args.repeat),
+        (f"MCP-style schema, {args.properties} properties", wide, [wide.params], max(1, args.repeat // 50)),
+    ]
+    for title, tool, cases, repeat in suites:
+        start = time.perf_counter()
+        tool.compile_params()
+        compile_s = time.perf_counter() - start
+        for params in cases:
+            assert tool.validate_params(params) == _legacy_validate_params(tool, params)
+
+        legacy_s = _time(lambda p: _legacy_validate_params(tool, p), cases, repeat)
+        strict_s = _time(tool.validate_params, cases, repeat)
+        coerce_s = _time(tool.prepare_params, cases, repeat)
+        print(f"{title} ({len(cases)} case(s) x {repeat})")
+        print(f"  compile once:                   {compile_s * 1e6:9.2f} us")
+        print(f"  schema walk per call (old):     {legacy_s * 1e6:9.2f} us/call")
+        print(f"  compiled validate_params:       {strict_s * 1e6:9.2f} us/call")
+        print(f"  compiled prepare_params:        {coerce_s * 1e6:9.2f} us/call")
+        print(f"  speedup: {legacy_s / strict_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
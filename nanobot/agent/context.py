@@ -2,12 +2,17 @@
 
 import base64
 import mimetypes
+import os
 import platform
+from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 from nanobot.agent.memory import MemoryStore
 from nanobot.agent.skills import SkillsLoader
+from nanobot.utils import metrics
+from nanobot.utils.helpers import RUNTIME_CONTEXT_TAG
+from nanobot.utils.tokens import estimate_message_tokens, estimate_tools_tokens
 
 
 class ContextBuilder:
@@ -24,17 +29,74 @@ class ContextBuilder:
         self.workspace = workspace
         self.memory = MemoryStore(workspace)
         self.skills = SkillsLoader(workspace)
+
+        # System prompt cache: reused while the fingerprint (file stats of every
+        # contributing file) is unchanged.
+        self._prompt_cache: tuple[tuple, str] | None = None
+        self._watched_skill_paths: list[Path] = []
+        self._prompt_cache_hits = 0
+        self._prompt_cache_misses = 0
     
     def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
         """
         Build the system prompt from bootstrap files, memory, and skills.
         
+        The prompt holds only slow-changing content so it forms a byte-stable
+        prefix for provider-side prompt caching; per-turn details (time, chat)
+        go into the runtime context of the latest user message instead. The
+        result is cached and only rebuilt when a contributing file changes
+        (by mtime/size).
+        
         Args:
             skill_names: Optional list of skills to include.
         
         Returns:
             Complete system prompt.
         """
+        key = self._prompt_fingerprint(skill_names)
+        if self._prompt_cache and self._prompt_cache[0] == key:
+            self._prompt_cache_hits += 1
+            metrics.PROMPT_CACHE.inc(result="hit")
+            return self._prompt_cache[1]
+
+        self._prompt_cache_misses += 1
+        metrics.PROMPT_CACHE.inc(result="miss")
+        self._watched_skill_paths = self.skills.watched_paths()
+        # Fingerprint before rendering (and after listing skills, so newly watched
+        # paths count): a file edited mid-render then misses on the next call
+        # instead of leaving the stale prompt cached under the new stats.
+        key = self._prompt_fingerprint(skill_names)
+        prompt = self._render_system_prompt(skill_names)
+        self._prompt_cache = (key, prompt)
+        return prompt
+
+    @property
+    def prompt_cache_stats(self) -> dict[str, int]:
+        """Hit/miss counters for the system prompt cache."""
+        return {"hits": self._prompt_cache_hits, "misses": self._prompt_cache_misses}
+
+    def _prompt_fingerprint(self, skill_names: list[str] | None) -> tuple:
+        """Cheap stat-only key covering every input of the system prompt."""
+        paths = [self.workspace / name for name in self.BOOTSTRAP_FILES]
+        paths += [self.memory.memory_file, self.memory.get_today_file()]
+        paths += self._watched_skill_paths
+
+        stamps = []
+        for path in paths:
+            try:
+                st = path.stat()
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append(None)
+
+        return (
+            tuple(skill_names or ()),
+            os.environ.get("PATH", ""),  # skill availability depends on installed bins
+            tuple(stamps),
+        )
+
+    def _render_system_prompt(self, skill_names: list[str] | None = None) -> str:
+        """Assemble the system prompt from disk (uncached)."""
         parts = []
         
         # Core identity
@@ -72,8 +134,6 @@ Skills with available="false" need dependencies installed first - you can try in
     
     def _get_identity(self) -> str:
         """Get the core identity section."""
-        from datetime import datetime
-        now = datetime.now().strftime("%Y-%m-%d %H:%M (%A)")
         workspace_path = str(self.workspace.expanduser().resolve())
         system = platform.system()
         runtime = f"{'macOS' if system == 'Darwin' else system} {platform.machine()}, Python {platform.python_version()}"
@@ -87,9 +147,6 @@ You are nanobot, a helpful AI assistant. You have access to tools that allow you
 - Send messages to users on chat channels
 - Spawn subagents for complex background tasks
 
-## Current Time
-{now}
-
 ## Runtime
 {runtime}
 
@@ -111,6 +168,8 @@ For normal conversation, just respond with text - do not call the message tool.
 - For each intelligence item you surface, include a query-relative priority label such as `P1/P2/P3` and the original source link when the API provides one. If only an internal record link exists, label it as a record link instead of an external source.
 - If a matching custom skill exists, read that skill first and follow it before using generic web search or repository exploration.
 
+The current time and chat session are given in a [Runtime Context] block at the start of the latest user message.
+
 Always be helpful, accurate, and concise. When using tools, explain what you're doing.
 When remembering something, write to {workspace_path}/memory/MEMORY.md"""
     
@@ -134,6 +193,7 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
         media: list[str] | None = None,
         channel: str | None = None,
         chat_id: str | None = None,
+        summary: str | None = None,
     ) -> list[dict[str, Any]]:
         """
         Build the complete message list for an LLM call.
@@ -145,27 +205,76 @@ When remembering something, write to {workspace_path}/memory/MEMORY.md"""
             media: Optional list of local file paths for images/media.
             channel: Current channel (telegram, feishu, etc.).
             chat_id: Current chat/user ID.
+            summary: Rolling summary of turns older than the history window.
 
         Returns:
             List of messages including system prompt.
         """
         messages = []
 
-        # System prompt
-        system_prompt = self.build_system_prompt(skill_names)
-        if channel and chat_id:
-            system_prompt += f"\n\n## Current Session\nChannel: {channel}\nChat ID: {chat_id}"
-        messages.append({"role": "system", "content": system_prompt})
+        # System prompt (stable across users and turns -> cacheable prefix)
+        messages.append({"role": "system", "content": self.build_system_prompt(skill_names)})
+
+        # Rolling summary of older turns, ahead of the recent window. It only
+        # changes when a new summary lands, so it stays inside the cached prefix.
+        if summary:
+            messages.append({"role": "user", "content": f"[Conversation Summary]\n{summary}"})
+            messages.append({"role": "assistant", "content": "Noted, I have the earlier context."})
 
         # History
         messages.extend(history)
 
-        # Current message (with optional image attachments)
+        # Current message (with optional image attachments), led by the
+        # volatile runtime context so it never disturbs the cached prefix
         user_content = self._build_user_content(current_message, media)
+        runtime = self._build_runtime_context(channel, chat_id)
+        if isinstance(user_content, str):
+            user_content = f"{runtime}\n\n{user_content}"
+        else:
+            user_content = [{"type": "text", "text": runtime}] + user_content
         messages.append({"role": "user", "content": user_content})
 
         return messages
 
+    def token_report(
+        self,
+        messages: list[dict[str, Any]],
+        model: str | None = None,
+        tools: list[dict[str, Any]] | None = None,
+    ) -> dict[str, int]:
+        """
+        Estimate how many prompt tokens each section of a built prompt uses.
+        
+        Args:
+            messages: Output of build_messages (system, history..., current).
+            model: Model name used for token estimates.
+            tools: Tool definitions sent with the request.
+        
+        Returns:
+            Token estimates for system, summary, history, current, tools and total.
+        """
+        body = messages[1:-1]
+        summary = 0
+        if body and str(body[0].get("content", "")).startswith("[Conversation Summary]"):
+            summary = sum(estimate_message_tokens(m, model) for m in body[:2])
+            body = body[2:]
+        report = {
+            "system": estimate_message_tokens(messages[0], model) if messages else 0,
+            "summary": summary,
+            "history": sum(estimate_message_tokens(m, model) for m in body),
+            "current": estimate_message_tokens(messages[-1], model) if len(messages) > 1 else 0,
+            "tools": estimate_tools_tokens(tools, model),
+        }
+        report["total"] = sum(report.values())
+        return report
+
+    def _build_runtime_context(self, channel: str | None, chat_id: str | None) -> str:
+        """Per-turn details kept out of the system prompt: time and chat session."""
+        lines = [RUNTIME_CONTEXT_TAG, f"Current Time: {datetime.now().strftime('%Y-%m-%d %H:%M (%A)')}"]
+        if channel and chat_id:
+            lines += [f"Channel: {channel}", f"Chat ID: {chat_id}"]
+        return "\n".join(lines)
+
     def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
         """Build user message content with optional base64-encoded images."""
         if not media:
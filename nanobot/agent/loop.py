@@ -3,16 +3,21 @@
 import asyncio
 import json
 import re
+import time
+import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, AsyncIterator
 
 from loguru import logger
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
-from nanobot.providers.base import LLMProvider
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.response_cache import cache_opted_in
 from nanobot.agent.context import ContextBuilder
 from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.tools.router import LoadToolsTool, ToolRoute, ToolRouter
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
 from nanobot.agent.tools.shell import ExecTool
 from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
@@ -20,8 +25,14 @@ from nanobot.agent.tools.message import MessageTool
 from nanobot.agent.tools.spawn import SpawnTool
 from nanobot.agent.tools.cron import CronTool
 from nanobot.agent.subagent import SubagentManager
-from nanobot.session.manager import SessionManager
+from nanobot.agent.summarizer import SessionSummarizer
+from nanobot.session.manager import SUMMARY_KEY, Session, SessionManager
 from nanobot.agent import usage as _usage
+from nanobot.utils import metrics, tracing
+
+if TYPE_CHECKING:
+    from nanobot.config.schema import ExecToolConfig, ToolRoutingConfig
+    from nanobot.cron.service import CronService
 
 
 PROGRESS_ONLY_PATTERNS = (
@@ -30,6 +41,59 @@ PROGRESS_ONLY_PATTERNS = (
     re.compile(r"我正在从.*?(?:获取|查询)"),
     re.compile(r"查询完成后我会"),
 )
+PROGRESS_ONLY_RE = re.compile(
+    "|".join(f"(?:{p.pattern})" for p in PROGRESS_ONLY_PATTERNS), re.IGNORECASE
+)
+
+
+class _ReplyStream:
+    """
+    Publishes throttled partial updates of one streamed reply to the bus.
+
+    Each LLM call of a turn streams into its own message. When a call turns
+    out not to be the answer (it ends in tool calls or a progress-only
+    placeholder), ``restart()`` retracts what was shown and the next call
+    streams under a new id; the final reply is sent with the current ``id``.
+    """
+
+    PUBLISH_INTERVAL = 0.3  # seconds; channels apply their own edit rate limit on top
+
+    def __init__(self, bus: MessageBus, msg: InboundMessage):
+        self.bus = bus
+        self.msg = msg
+        self.id = uuid.uuid4().hex[:12]
+        self.started = False
+        self._last_publish = 0.0
+
+    async def update(self, text: str) -> None:
+        """Publish the reply text so far (the first update goes out immediately)."""
+        now = time.monotonic()
+        if not text.strip() or now - self._last_publish < self.PUBLISH_INTERVAL:
+            return
+        # Hold back what looks like a placeholder; it would be retracted anyway
+        if len(text) <= 400 and PROGRESS_ONLY_RE.search(text):
+            return
+        self._last_publish = now
+        self.started = True
+        await self.bus.publish_outbound(self._message(text, streaming=True))
+
+    async def restart(self) -> None:
+        """Retract the partial message (if any) and continue on a fresh stream."""
+        if self.started:
+            await self.bus.publish_outbound(self._message("", retracted=True))
+        self.id = uuid.uuid4().hex[:12]
+        self.started = False
+        self._last_publish = 0.0
+
+    def _message(self, text: str, **kwargs: Any) -> OutboundMessage:
+        return OutboundMessage(
+            channel=self.msg.channel,
+            chat_id=self.msg.chat_id,
+            content=text,
+            metadata=self.msg.metadata or {},
+            stream_id=self.id,
+            **kwargs,
+        )
 
 
 class AgentLoop:
@@ -53,13 +117,23 @@ class AgentLoop:
         max_iterations: int = 20,
         brave_api_key: str | None = None,
         exec_config: "ExecToolConfig | None" = None,
+        tool_routing: "ToolRoutingConfig | None" = None,
         cron_service: "CronService | None" = None,
         restrict_to_workspace: bool = False,
         session_manager: SessionManager | None = None,
         mcp_configs: list | None = None,
+        max_concurrent_turns: int = 4,
+        max_inflight_turns: int = 16,
+        max_parallel_tool_calls: int = 5,
+        stream_responses: bool = False,
+        history_max_messages: int = 50,
+        history_max_tokens: int | None = None,
+        history_message_max_tokens: int | None = None,
+        summarize_after: int = 0,
+        summary_keep_recent: int = 20,
+        summary_model: str | None = None,
     ):
         from nanobot.config.schema import ExecToolConfig
-        from nanobot.cron.service import CronService
         self.bus = bus
         self.provider = provider
         self.workspace = workspace
@@ -71,10 +145,35 @@ class AgentLoop:
         self.restrict_to_workspace = restrict_to_workspace
         self._mcp_configs = mcp_configs or []
         self._mcp_clients: list = []
+        self.max_parallel_tool_calls = max_parallel_tool_calls
+        self.stream_responses = stream_responses
+        self.history_max_messages = history_max_messages
+        self.history_max_tokens = history_max_tokens
+        self.history_message_max_tokens = history_message_max_tokens
+
+        # Worker pool: different sessions run concurrently (bounded), while a
+        # per-session lock keeps turns of the same session strictly FIFO.
+        # At most max_inflight_turns are taken off the bus at once (running or
+        # waiting); the rest of a backlog stays queued on the bus.
+        self.max_concurrent_turns = max(1, max_concurrent_turns)
+        self.max_inflight_turns = max(self.max_concurrent_turns, max_inflight_turns)
+        self._turn_slots = asyncio.Semaphore(self.max_concurrent_turns)
+        self._inflight_slots = asyncio.Semaphore(self.max_inflight_turns)
+        self._session_locks: dict[str, asyncio.Lock] = {}
+        self._session_lock_users: dict[str, int] = {}
+        self._inflight: set[asyncio.Task] = set()
         
         self.context = ContextBuilder(workspace)
         self.sessions = session_manager or SessionManager(workspace)
         self.tools = ToolRegistry()
+        # Rolling summaries of long sessions, generated off the reply path
+        self.summarizer = SessionSummarizer(
+            provider=provider,
+            sessions=self.sessions,
+            model=summary_model or self.model,
+            trigger_messages=summarize_after,
+            keep_recent=summary_keep_recent,
+        ) if summarize_after > 0 else None
         self.subagents = SubagentManager(
             provider=provider,
             workspace=workspace,
@@ -83,10 +182,25 @@ class AgentLoop:
             brave_api_key=brave_api_key,
             exec_config=self.exec_config,
             restrict_to_workspace=restrict_to_workspace,
+            max_parallel_tool_calls=max_parallel_tool_calls,
         )
         
         self._running = False
         self._register_default_tools()
+
+        # Per-turn tool subsets (off by default: every call gets every tool)
+        self.router: ToolRouter | None = None
+        if tool_routing and tool_routing.enabled:
+            self.router = ToolRouter(
+                self.tools,
+                core=tool_routing.core,
+                max_matched=tool_routing.max_matched,
+                min_score=tool_routing.min_score,
+                channel_tools=tool_routing.channel_tools,
+                keywords=tool_routing.keywords,
+                skills=self.context.skills,
+            )
+            self.tools.register(LoadToolsTool(self.router))
     
     def _register_default_tools(self) -> None:
         """Register the default set of tools."""
@@ -143,46 +257,120 @@ class AgentLoop:
     async def run(self) -> None:
         """Run the agent loop, processing messages from the bus."""
         self._running = True
-        logger.info("Agent loop started")
+        logger.info(f"Agent loop started (max {self.max_concurrent_turns} concurrent turns)")
 
         await self._start_mcp_tools()
 
         try:
             while self._running:
+                # Backpressure: don't take more off the bus until a turn finishes
+                await self._inflight_slots.acquire()
                 try:
-                    # Wait for next message
                     msg = await asyncio.wait_for(
                         self.bus.consume_inbound(),
                         timeout=1.0
                     )
-
-                    # Process it
-                    try:
-                        response = await self._process_message(msg)
-                        if response:
-                            await self.bus.publish_outbound(response)
-                    except Exception as e:
-                        logger.error(f"Error processing message: {e}")
-                        # Send error response
-                        await self.bus.publish_outbound(OutboundMessage(
-                            channel=msg.channel,
-                            chat_id=msg.chat_id,
-                            content=f"Sorry, I encountered an error: {str(e)}"
-                        ))
                 except asyncio.TimeoutError:
+                    self._inflight_slots.release()
                     continue
+
+                # Each turn waits for its session's lock first, then a worker
+                # slot, so a burst from one session never holds slots idle
+                task = asyncio.create_task(self._dispatch(msg))
+                self._inflight.add(task)
+                task.add_done_callback(self._turn_done)
         finally:
+            # Let in-flight turns finish before tearing down their tools
+            if self._inflight:
+                await asyncio.gather(*self._inflight, return_exceptions=True)
+            if self.summarizer:
+                self.summarizer.cancel()
             for client in self._mcp_clients:
                 try:
                     await client.stop()
                 except Exception:
                     pass
+
+    async def _dispatch(self, msg: InboundMessage) -> None:
+        """Process one inbound message in its own task and publish the reply."""
+        reply_stream = _ReplyStream(self.bus, msg) if self.stream_responses else None
+        async with self._session_lock(self._lock_key(msg)), self._turn_slots:
+            try:
+                with tracing.turn(msg.metadata, channel=msg.channel, session=msg.session_key):
+                    response = await self._process_message(msg, stream=reply_stream or False)
+                if response:
+                    await self.bus.publish_outbound(response)
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+                # Send error response (finishing the open stream, if any)
+                await self.bus.publish_outbound(OutboundMessage(
+                    channel=msg.channel,
+                    chat_id=msg.chat_id,
+                    content=f"Sorry, I encountered an error: {str(e)}",
+                    metadata=msg.metadata or {},
+                    stream_id=reply_stream.id if reply_stream else None,
+                ))
+
+    @staticmethod
+    def _lock_key(msg: InboundMessage) -> str:
+        """Session key a message will write to (system messages use their origin)."""
+        if msg.channel == "system":
+            return msg.chat_id if ":" in msg.chat_id else f"cli:{msg.chat_id}"
+        return msg.session_key
+
+    @asynccontextmanager
+    async def _session_lock(self, key: str) -> AsyncIterator[None]:
+        """Serialize turns of one session; the lock is dropped once nobody holds or awaits it."""
+        lock = self._session_locks.setdefault(key, asyncio.Lock())
+        self._session_lock_users[key] = self._session_lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._session_lock_users[key] -= 1
+            if not self._session_lock_users[key]:
+                del self._session_lock_users[key]
+                del self._session_locks[key]
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the loop is consuming inbound messages."""
+        return self._running
+
+    def _turn_done(self, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        self._inflight_slots.release()
+
+    @property
+    def inflight_count(self) -> int:
+        """Number of turns currently queued on a session lock or being processed."""
+        return len(self._inflight)
     
     def stop(self) -> None:
         """Stop the agent loop."""
         self._running = False
         logger.info("Agent loop stopping")
 
+    async def _execute_tool_calls(
+        self,
+        messages: list[dict[str, Any]],
+        tool_calls: list[ToolCallRequest],
+    ) -> list[dict[str, Any]]:
+        """Run one response's tool calls (concurrently where allowed) and append results in order."""
+        for tool_call in tool_calls:
+            args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
+            logger.info(f"Tool call: {tool_call.name}({args_str[:200]})")
+
+        results = await self.tools.execute_many(
+            [(tc.name, tc.arguments) for tc in tool_calls],
+            max_concurrency=self.max_parallel_tool_calls,
+        )
+        for tool_call, result in zip(tool_calls, results):
+            messages = self.context.add_tool_result(
+                messages, tool_call.id, tool_call.name, result
+            )
+        return messages
+
     def _is_progress_only_response(self, content: str | None) -> bool:
         """Detect placeholder replies that should not be treated as final answers."""
         if not content:
@@ -192,7 +380,7 @@ class AgentLoop:
         if not text or len(text) > 400:
             return False
 
-        return any(pattern.search(text) for pattern in PROGRESS_ONLY_PATTERNS)
+        return PROGRESS_ONLY_RE.search(text) is not None
 
     def _build_progress_correction_message(self) -> str:
         """Prompt the model to continue instead of stopping at a placeholder."""
@@ -202,12 +390,76 @@ class AgentLoop:
             "若确实阻塞，只能说明具体阻塞原因和已验证事实，不要再次输出进度占位。"
         )
     
-    async def _process_message(self, msg: InboundMessage) -> OutboundMessage | None:
+    def _get_history(self, session: Session) -> list[dict[str, Any]]:
+        """Session history trimmed to the configured message and token budgets."""
+        return session.get_history(
+            max_messages=self.history_max_messages,
+            max_tokens=self.history_max_tokens,
+            model=self.model,
+            max_message_tokens=self.history_message_max_tokens,
+        )
+
+    def _log_prompt_tokens(
+        self, session_key: str, messages: list[dict[str, Any]], route: ToolRoute | None = None,
+    ) -> None:
+        """Log the estimated prompt size per section."""
+        tools = route.definitions(messages) if route else self.tools.get_definitions()
+        report = self.context.token_report(messages, self.model, tools)
+        logger.debug(
+            f"Prompt tokens for {session_key}: "
+            + ", ".join(f"{section}={tokens}" for section, tokens in report.items())
+        )
+
+    async def _call_llm(
+        self,
+        messages: list[dict[str, Any]],
+        stream: _ReplyStream | None = None,
+        route: ToolRoute | None = None,
+    ) -> LLMResponse:
+        """Call the LLM, forwarding content deltas to the reply stream when given.
+
+        With a ``route``, only the tools it selects for this turn are sent.
+        """
+        tools = route.definitions(messages) if route else self.tools.get_definitions()
+        with tracing.span("llm.call", model=self.model, stream=stream is not None) as span:
+            start = time.monotonic()
+            if stream is None:
+                response = await self.provider.chat(messages=messages, tools=tools, model=self.model)
+            else:
+                text = ""
+                response = None
+                async for chunk in self.provider.chat_stream(messages=messages, tools=tools, model=self.model):
+                    if chunk.delta:
+                        if not text:
+                            span.set("ttft_ms", round((time.monotonic() - start) * 1000, 1))
+                        text += chunk.delta
+                        await stream.update(text)
+                    if chunk.response is not None:
+                        response = chunk.response
+                response = response or LLMResponse(content="Error calling LLM: empty stream", finish_reason="error")
+            if stream is None:
+                span.set("ttft_ms", round((time.monotonic() - start) * 1000, 1))
+            metrics.LLM_LATENCY.observe(time.monotonic() - start, model=self.model)
+            span.set("prompt_tokens", response.usage.get("prompt_tokens", 0))
+            span.set("completion_tokens", response.usage.get("completion_tokens", 0))
+            span.set("tool_calls", len(response.tool_calls))
+            span.set("finish_reason", response.finish_reason)
+            return response
+
+    async def _process_message(
+        self,
+        msg: InboundMessage,
+        stream: "bool | _ReplyStream" = False,
+        ephemeral: bool = False,
+    ) -> OutboundMessage | None:
         """
         Process a single inbound message.
         
         Args:
             msg: The inbound message to process.
+            stream: Publish partial replies to the bus while the LLM generates
+                (True for a new reply stream, or the stream to use).
+            ephemeral: Run in a fresh session that is neither loaded nor saved.
         
         Returns:
             The response message, or None if no response needed.
@@ -221,7 +473,11 @@ class AgentLoop:
         logger.info(f"Processing message from {msg.channel}:{msg.sender_id}: {preview}")
         
         # Get or create session
-        session = self.sessions.get_or_create(msg.session_key)
+        if ephemeral:
+            session = Session(key=msg.session_key)
+        else:
+            with tracing.span("session.load"):
+                session = self.sessions.get_or_create(msg.session_key)
         
         # Update tool contexts
         message_tool = self.tools.get("message")
@@ -240,28 +496,33 @@ class AgentLoop:
         _usage.set_context(msg.sender_id, msg.channel)
 
         # Build initial messages (use get_history for LLM-formatted messages)
-        messages = self.context.build_messages(
-            history=session.get_history(),
-            current_message=msg.content,
-            media=msg.media if msg.media else None,
-            channel=msg.channel,
-            chat_id=msg.chat_id,
-        )
+        with tracing.span("context.build") as span:
+            messages = self.context.build_messages(
+                history=self._get_history(session),
+                current_message=msg.content,
+                media=msg.media if msg.media else None,
+                channel=msg.channel,
+                chat_id=msg.chat_id,
+                summary=session.metadata.get(SUMMARY_KEY),
+            )
+            span.set("messages", len(messages))
+        route = self.router.start_turn(msg.content, msg.channel, messages) if self.router else None
+        self._log_prompt_tokens(session.key, messages, route)
         
         # Agent loop
         iteration = 0
         final_content = None
         progress_only_corrections = 0
+        if isinstance(stream, _ReplyStream):
+            reply_stream = stream
+        else:
+            reply_stream = _ReplyStream(self.bus, msg) if stream else None
         
         while iteration < self.max_iterations:
             iteration += 1
             
             # Call LLM
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model
-            )
+            response = await self._call_llm(messages, reply_stream, route)
             
             # Handle tool calls
             if response.has_tool_calls:
@@ -281,17 +542,16 @@ class AgentLoop:
                     messages, response.content, tool_call_dicts,
                     reasoning_content=response.reasoning_content,
                 )
+                # Any streamed preamble was not the answer
+                if reply_stream:
+                    await reply_stream.restart()
                 
                 # Execute tools
-                for tool_call in response.tool_calls:
-                    args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
-                    logger.info(f"Tool call: {tool_call.name}({args_str[:200]})")
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
-                    messages = self.context.add_tool_result(
-                        messages, tool_call.id, tool_call.name, result
-                    )
+                messages = await self._execute_tool_calls(messages, response.tool_calls)
             else:
                 if self._is_progress_only_response(response.content):
+                    if reply_stream:
+                        await reply_stream.restart()
                     progress_only_corrections += 1
                     logger.warning(
                         f"Model returned progress-only response for {msg.channel}:{msg.sender_id}; correction #{progress_only_corrections}"
@@ -323,15 +583,20 @@ class AgentLoop:
         logger.info(f"Response to {msg.channel}:{msg.sender_id}: {preview}")
         
         # Save to session
-        session.add_message("user", msg.content)
-        session.add_message("assistant", final_content)
-        self.sessions.save(session)
+        if not ephemeral:
+            session.add_message("user", msg.content)
+            session.add_message("assistant", final_content)
+            with tracing.span("session.save"):
+                self.sessions.save(session)
+            if self.summarizer:
+                self.summarizer.maybe_schedule(session)
         
         return OutboundMessage(
             channel=msg.channel,
             chat_id=msg.chat_id,
             content=final_content,
             metadata=msg.metadata or {},  # Pass through for channel-specific needs (e.g. Slack thread_ts)
+            stream_id=reply_stream.id if reply_stream else None,
         )
     
     async def _process_system_message(self, msg: InboundMessage) -> OutboundMessage | None:
@@ -355,7 +620,8 @@ class AgentLoop:
         
         # Use the origin session for context
         session_key = f"{origin_channel}:{origin_chat_id}"
-        session = self.sessions.get_or_create(session_key)
+        with tracing.span("session.load"):
+            session = self.sessions.get_or_create(session_key)
         
         # Update tool contexts
         message_tool = self.tools.get("message")
@@ -375,11 +641,13 @@ class AgentLoop:
 
         # Build messages with the announce content
         messages = self.context.build_messages(
-            history=session.get_history(),
+            history=self._get_history(session),
             current_message=msg.content,
             channel=origin_channel,
             chat_id=origin_chat_id,
+            summary=session.metadata.get(SUMMARY_KEY),
         )
+        self._log_prompt_tokens(session.key, messages)
         
         # Agent loop (limited for announce handling)
         iteration = 0
@@ -389,11 +657,7 @@ class AgentLoop:
         while iteration < self.max_iterations:
             iteration += 1
             
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model
-            )
+            response = await self._call_llm(messages)
             
             if response.has_tool_calls:
                 tool_call_dicts = [
@@ -412,13 +676,7 @@ class AgentLoop:
                     reasoning_content=response.reasoning_content,
                 )
                 
-                for tool_call in response.tool_calls:
-                    args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
-                    logger.info(f"Tool call: {tool_call.name}({args_str[:200]})")
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
-                    messages = self.context.add_tool_result(
-                        messages, tool_call.id, tool_call.name, result
-                    )
+                messages = await self._execute_tool_calls(messages, response.tool_calls)
             else:
                 if self._is_progress_only_response(response.content):
                     progress_only_corrections += 1
@@ -449,7 +707,10 @@ class AgentLoop:
         # Save to session (mark as system message in history)
         session.add_message("user", f"[System: {msg.sender_id}] {msg.content}")
         session.add_message("assistant", final_content)
-        self.sessions.save(session)
+        with tracing.span("session.save"):
+            self.sessions.save(session)
+        if self.summarizer:
+            self.summarizer.maybe_schedule(session)
         
         return OutboundMessage(
             channel=origin_channel,
@@ -467,6 +728,10 @@ class AgentLoop:
         """
         Process a message directly (for CLI or cron usage).
         
+        Inside ``llm_cache()`` the turn runs in a fresh session that is not
+        saved: without earlier runs in the prompt, a repeated job sends the
+        same request and can be answered from the response cache.
+        
         Args:
             content: The message content.
             session_key: Session identifier.
@@ -483,5 +748,8 @@ class AgentLoop:
             content=content
         )
         
-        response = await self._process_message(msg)
+        tracing.inject(msg.metadata)
+        async with self._session_lock(msg.session_key):
+            with tracing.turn(msg.metadata, channel=channel, session=msg.session_key):
+                response = await self._process_message(msg, ephemeral=cache_opted_in())
         return response.content if response else ""
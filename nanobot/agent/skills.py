@@ -22,6 +22,41 @@ class SkillsLoader:
         self.workspace = workspace
         self.workspace_skills = workspace / "skills"
         self.builtin_skills = builtin_skills_dir or BUILTIN_SKILLS_DIR
+        # SKILL.md contents keyed by path, revalidated by (mtime_ns, size)
+        self._file_cache: dict[Path, tuple[int, int, str]] = {}
+    
+    def _read_skill_file(self, path: Path) -> str | None:
+        """Read a SKILL.md, reusing the cached text while the file is unchanged."""
+        try:
+            st = path.stat()
+        except OSError:
+            self._file_cache.pop(path, None)
+            return None
+        cached = self._file_cache.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        content = path.read_text(encoding="utf-8")
+        self._file_cache[path] = (st.st_mtime_ns, st.st_size, content)
+        return content
+    
+    def watched_paths(self) -> list[Path]:
+        """
+        Paths whose metadata changes whenever the skill set or a SKILL.md changes.
+        
+        Covers the skill roots (skills added/removed), each skill directory
+        (SKILL.md created/deleted) and each SKILL.md (edited).
+        """
+        paths: list[Path] = []
+        for root in (self.workspace_skills, self.builtin_skills):
+            if not root:
+                continue
+            paths.append(root)
+            if root.exists():
+                for skill_dir in root.iterdir():
+                    if skill_dir.is_dir():
+                        paths.append(skill_dir)
+                        paths.append(skill_dir / "SKILL.md")
+        return paths
     
     def list_skills(self, filter_unavailable: bool = True) -> list[dict[str, str]]:
         """
@@ -67,15 +102,13 @@ class SkillsLoader:
             Skill content or None if not found.
         """
         # Check workspace first
-        workspace_skill = self.workspace_skills / name / "SKILL.md"
-        if workspace_skill.exists():
-            return workspace_skill.read_text(encoding="utf-8")
+        content = self._read_skill_file(self.workspace_skills / name / "SKILL.md")
+        if content is not None:
+            return content
         
         # Check built-in
         if self.builtin_skills:
-            builtin_skill = self.builtin_skills / name / "SKILL.md"
-            if builtin_skill.exists():
-                return builtin_skill.read_text(encoding="utf-8")
+            return self._read_skill_file(self.builtin_skills / name / "SKILL.md")
         
         return None
     
@@ -190,6 +223,11 @@ class SkillsLoader:
         meta = self.get_skill_metadata(name) or {}
         return self._parse_nanobot_metadata(meta.get("metadata", ""))
     
+    def get_skill_tools(self, name: str) -> list[str]:
+        """Tools a skill declares it needs (``"tools": [...]`` in its nanobot metadata)."""
+        tools = self._get_skill_meta(name).get("tools", [])
+        return [t for t in tools if isinstance(t, str)] if isinstance(tools, list) else []
+    
     def get_always_skills(self) -> list[str]:
         """Get skills marked as always=true that meet requirements."""
         result = []
@@ -11,6 +11,8 @@ from loguru import logger
 from nanobot.bus.events import InboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.providers.base import LLMProvider
+from nanobot.providers.limiter import Priority, llm_priority
+from nanobot.utils import tracing
 from nanobot.agent.tools.registry import ToolRegistry
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, ListDirTool
 from nanobot.agent.tools.shell import ExecTool
@@ -35,6 +37,7 @@ class SubagentManager:
         brave_api_key: str | None = None,
         exec_config: "ExecToolConfig | None" = None,
         restrict_to_workspace: bool = False,
+        max_parallel_tool_calls: int = 5,
     ):
         from nanobot.config.schema import ExecToolConfig
         self.provider = provider
@@ -44,6 +47,7 @@ class SubagentManager:
         self.brave_api_key = brave_api_key
         self.exec_config = exec_config or ExecToolConfig()
         self.restrict_to_workspace = restrict_to_workspace
+        self.max_parallel_tool_calls = max_parallel_tool_calls
         self._running_tasks: dict[str, asyncio.Task[None]] = {}
     
     async def spawn(
@@ -73,10 +77,11 @@ class SubagentManager:
             "chat_id": origin_chat_id,
         }
         
-        # Create background task
-        bg_task = asyncio.create_task(
-            self._run_subagent(task_id, task, display_label, origin)
-        )
+        # Create background task (its LLM calls yield to interactive turns)
+        with llm_priority(Priority.BACKGROUND), tracing.detached():
+            bg_task = asyncio.create_task(
+                self._run_subagent(task_id, task, display_label, origin)
+            )
         self._running_tasks[task_id] = bg_task
         
         # Cleanup when done
@@ -150,11 +155,15 @@ class SubagentManager:
                         "tool_calls": tool_call_dicts,
                     })
                     
-                    # Execute tools
+                    # Execute tools (independent calls run concurrently)
                     for tool_call in response.tool_calls:
                         args_str = json.dumps(tool_call.arguments)
                         logger.debug(f"Subagent [{task_id}] executing: {tool_call.name} with arguments: {args_str}")
-                        result = await tools.execute(tool_call.name, tool_call.arguments)
+                    results = await tools.execute_many(
+                        [(tc.name, tc.arguments) for tc in response.tool_calls],
+                        max_concurrency=self.max_parallel_tool_calls,
+                    )
+                    for tool_call, result in zip(response.tool_calls, results):
                         messages.append({
                             "role": "tool",
                             "tool_call_id": tool_call.id,
@@ -0,0 +1,140 @@
+"""Rolling background summarization of long sessions."""
+
+import asyncio
+from typing import Any
+
+from loguru import logger
+
+from nanobot.providers.base import LLMProvider
+from nanobot.providers.limiter import Priority, llm_priority
+from nanobot.session.manager import SUMMARY_KEY, SUMMARY_UPTO_KEY, Session, SessionManager
+from nanobot.utils import tracing
+from nanobot.utils.tokens import truncate_to_tokens
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant.
+Merge the previous summary with the new messages into one updated summary.
+Keep facts, decisions, names, numbers, user preferences and open questions; drop greetings and filler.
+Write in the conversation's language, as concise bullet points, at most {max_words} words.
+Reply with the summary only."""
+
+
+class SessionSummarizer:
+    """
+    Compresses older turns of long sessions into a running summary.
+
+    Once a session has more than ``trigger_messages`` unsummarized messages
+    beyond the newest ``keep_recent``, a background task asks a (cheap) model
+    to fold them into ``Session.metadata["summary"]``. ``summary_upto``
+    records how many messages the summary covers; get_history skips those
+    and ContextBuilder injects the summary ahead of the recent window.
+    Summarization never runs on the reply path: turns only schedule it.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        sessions: SessionManager,
+        model: str | None = None,
+        trigger_messages: int = 40,
+        keep_recent: int = 20,
+        max_summary_tokens: int = 1024,
+        max_input_message_tokens: int = 1000,
+    ):
+        self.provider = provider
+        self.sessions = sessions
+        self.model = model or provider.get_default_model()
+        self.trigger_messages = trigger_messages
+        self.keep_recent = keep_recent
+        self.max_summary_tokens = max_summary_tokens
+        self.max_input_message_tokens = max_input_message_tokens
+        self._running: dict[str, asyncio.Task[None]] = {}
+
+    def _pending_range(self, session: Session) -> tuple[int, int] | None:
+        """Absolute [start, end) message range due for summarization, if any."""
+        total = session._offset + len(session.messages)
+        start = max(session.metadata.get(SUMMARY_UPTO_KEY, 0), session._offset)
+        end = total - self.keep_recent
+        if end - start < self.trigger_messages:
+            return None
+        return start, end
+
+    def maybe_schedule(self, session: Session) -> bool:
+        """
+        Start a background summarization for a session if it crossed the threshold.
+
+        Returns:
+            True if a task was started.
+        """
+        if session.key in self._running or self._pending_range(session) is None:
+            return False
+
+        with llm_priority(Priority.BACKGROUND), tracing.detached():
+            task = asyncio.create_task(self._summarize(session.key))
+        self._running[session.key] = task
+        task.add_done_callback(lambda _: self._running.pop(session.key, None))
+        return True
+
+    async def _summarize(self, key: str) -> None:
+        """Fold the pending range of a session into its running summary."""
+        session = self.sessions.get_or_create(key)
+        span = self._pending_range(session)
+        if span is None:
+            return
+        start, end = span
+        previous = session.metadata.get(SUMMARY_KEY, "")
+        chunk = session.messages[start - session._offset:end - session._offset]
+
+        try:
+            summary = await self._generate(previous, chunk)
+        except Exception as e:
+            logger.warning(f"Summarization failed for {key}: {e}")
+            return
+        if not summary:
+            return
+
+        # The session may have been evicted, reloaded or cleared meanwhile:
+        # apply the result to the live object only if it still lines up.
+        session = self.sessions.get_or_create(key)
+        total = session._offset + len(session.messages)
+        if session.metadata.get(SUMMARY_KEY, "") != previous or total < end:
+            logger.debug(f"Discarding stale summary for {key}")
+            return
+
+        session.metadata[SUMMARY_KEY] = summary
+        session.metadata[SUMMARY_UPTO_KEY] = end
+        self.sessions.save(session)
+        logger.info(f"Summarized {end - start} messages of {key} ({len(summary)} chars)")
+
+    async def _generate(self, previous: str, chunk: list[dict[str, Any]]) -> str | None:
+        """Ask the model for an updated summary."""
+        lines = []
+        for m in chunk:
+            content = m.get("content")
+            if not isinstance(content, str) or not content.strip():
+                continue
+            content = truncate_to_tokens(content, self.max_input_message_tokens, self.model)
+            lines.append(f"{m.get('role', 'user')}: {content}")
+
+        user = f"Previous summary:\n{previous or '(none)'}\n\nNew messages:\n" + "\n\n".join(lines)
+        response = await self.provider.chat(
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT.format(max_words=self.max_summary_tokens // 2)},
+                {"role": "user", "content": user},
+            ],
+            model=self.model,
+            max_tokens=self.max_summary_tokens,
+            temperature=0.2,
+        )
+        if response.finish_reason == "error":
+            raise RuntimeError(response.content)
+        return (response.content or "").strip() or None
+
+    async def wait(self) -> None:
+        """Wait for running summarizations (used by tests and shutdown)."""
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    def cancel(self) -> None:
+        """Cancel running summarizations."""
+        for task in self._running.values():
+            task.cancel()
@@ -1,7 +1,188 @@
 """Base class for agent tools."""
 
+import json
+import math
+import re
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Callable
+
+# check(value, path, errors) -> value: appends violations to ``errors`` and
+# returns the value, coerced to the schema's type if that was needed and allowed
+Validator = Callable[[Any, str, list[str]], Any]
+
+_TYPE_MAP = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+_INVALID = object()
+_INT_RE = re.compile(r"\s*[+-]?\d+\s*")
+
+
+def _to_integer(val: Any) -> Any:
+    if isinstance(val, str) and _INT_RE.fullmatch(val):
+        return int(val)
+    if isinstance(val, float) and val.is_integer():
+        return int(val)
+    return _INVALID
+
+
+def _to_number(val: Any) -> Any:
+    if not isinstance(val, str):
+        return _INVALID
+    if _INT_RE.fullmatch(val):
+        return int(val)
+    try:
+        num = float(val)
+    except ValueError:
+        return _INVALID
+    return num if math.isfinite(num) else _INVALID
+
+
+def _to_boolean(val: Any) -> Any:
+    if isinstance(val, str) and val.strip().lower() in ("true", "false"):
+        return val.strip().lower() == "true"
+    return _INVALID
+
+
+def _to_string(val: Any) -> Any:
+    if isinstance(val, (int, float)) and not isinstance(val, bool):
+        return str(val)
+    return _INVALID
+
+
+def _from_json(kind: type) -> Callable[[Any], Any]:
+    def parse(val: Any) -> Any:
+        if isinstance(val, str):
+            try:
+                parsed = json.loads(val)
+            except ValueError:
+                return _INVALID
+            if isinstance(parsed, kind):
+                return parsed
+        return _INVALID
+    return parse
+
+
+# Repairs for values LLMs commonly send with the wrong JSON type
+_COERCE: dict[str, Callable[[Any], Any]] = {
+    "integer": _to_integer,
+    "number": _to_number,
+    "boolean": _to_boolean,
+    "string": _to_string,
+    "array": _from_json(list),
+    "object": _from_json(dict),
+}
+
+
+def compile_schema(schema: dict[str, Any], coerce: bool = False) -> Validator:
+    """
+    Compile a JSON schema (the subset tools use) into a validator closure.
+
+    The schema is walked once here; the returned closure only runs the checks
+    that apply to it. Supports type, enum, minimum/maximum, minLength/maxLength,
+    object properties/required and array items.
+
+    Args:
+        schema: JSON schema for one value.
+        coerce: Repair values sent with the wrong type (``"3"`` for an integer,
+            ``"true"`` for a boolean, a number for a string, a JSON string for
+            an array or object) instead of reporting them.
+
+    Returns:
+        A validator called as ``check(value, path, errors)``.
+    """
+    t = schema.get("type")
+    expected = _TYPE_MAP.get(t)
+    repair = _COERCE.get(t) if coerce else None
+    checks: list[Callable[[Any, str, list[str]], None]] = []
+
+    if "enum" in schema:
+        enum = schema["enum"]
+
+        def check_enum(val: Any, label: str, errors: list[str]) -> None:
+            if val not in enum:
+                errors.append(f"{label} must be one of {enum}")
+        checks.append(check_enum)
+    if t in ("integer", "number"):
+        if "minimum" in schema:
+            low = schema["minimum"]
+
+            def check_minimum(val: Any, label: str, errors: list[str]) -> None:
+                if val < low:
+                    errors.append(f"{label} must be >= {low}")
+            checks.append(check_minimum)
+        if "maximum" in schema:
+            high = schema["maximum"]
+
+            def check_maximum(val: Any, label: str, errors: list[str]) -> None:
+                if val > high:
+                    errors.append(f"{label} must be <= {high}")
+            checks.append(check_maximum)
+    if t == "string":
+        if "minLength" in schema:
+            shortest = schema["minLength"]
+
+            def check_min_length(val: Any, label: str, errors: list[str]) -> None:
+                if len(val) < shortest:
+                    errors.append(f"{label} must be at least {shortest} chars")
+            checks.append(check_min_length)
+        if "maxLength" in schema:
+            longest = schema["maxLength"]
+
+            def check_max_length(val: Any, label: str, errors: list[str]) -> None:
+                if len(val) > longest:
+                    errors.append(f"{label} must be at most {longest} chars")
+            checks.append(check_max_length)
+
+    props: dict[str, Validator] = {}
+    required: tuple[str, ...] = ()
+    item: Validator | None = None
+    if t == "object":
+        props = {k: compile_schema(v, coerce) for k, v in schema.get("properties", {}).items()}
+        required = tuple(schema.get("required", []))
+    elif t == "array" and "items" in schema:
+        item = compile_schema(schema["items"], coerce)
+
+    def check(val: Any, path: str, errors: list[str]) -> Any:
+        label = path or "parameter"
+        if expected is not None and not isinstance(val, expected):
+            fixed = repair(val) if repair else _INVALID
+            if fixed is _INVALID:
+                errors.append(f"{label} should be {t}")
+                return val
+            val = fixed
+        for run in checks:
+            run(val, label, errors)
+        if props or required:
+            for k in required:
+                if k not in val:
+                    errors.append(f"missing required {path + '.' + k if path else k}")
+            copied = False
+            for k, v in val.items():
+                sub = props.get(k)
+                if sub is None:
+                    continue
+                new = sub(v, path + "." + k if path else k, errors)
+                if new is not v:
+                    if not copied:
+                        val, copied = dict(val), True
+                    val[k] = new
+        elif item is not None:
+            copied = False
+            for i, v in enumerate(val):
+                new = item(v, f"{path}[{i}]" if path else f"[{i}]", errors)
+                if new is not v:
+                    if not copied:
+                        val, copied = list(val), True
+                    val[i] = new
+        return val
+
+    return check
 
 
 class Tool(ABC):
@@ -12,14 +193,18 @@ class Tool(ABC):
     the environment, such as reading files, executing commands, etc.
     """
     
-    _TYPE_MAP = {
-        "string": str,
-        "integer": int,
-        "number": (int, float),
-        "boolean": bool,
-        "array": list,
-        "object": dict,
-    }
+    _TYPE_MAP = _TYPE_MAP
+
+    # (strict, coercing) validators compiled from ``parameters``
+    _validators: tuple[Validator, Validator] | None = None
+
+    # Tools with side effects that must not overlap with other calls in the
+    # same LLM response (e.g. file writes) set this to True.
+    serial: bool = False
+
+    # Extra words (any language) that make a user message select this tool
+    # when per-turn tool routing is on; the name and description always count.
+    keywords: tuple[str, ...] = ()
     
     @property
     @abstractmethod
@@ -52,43 +237,49 @@ class Tool(ABC):
         """
         pass
 
-    def validate_params(self, params: dict[str, Any]) -> list[str]:
-        """Validate tool parameters against JSON schema. Returns error list (empty if valid)."""
+    def compile_params(self) -> None:
+        """
+        Compile the parameter schema into validators.
+
+        Done by ``ToolRegistry.register`` (or on first use), so each call only
+        runs the compiled checks. Call again if ``parameters`` changes.
+        """
         schema = self.parameters or {}
         if schema.get("type", "object") != "object":
-            raise ValueError(f"Schema must be object type, got {schema.get('type')!r}")
-        return self._validate(params, {**schema, "type": "object"}, "")
+            message = f"Schema must be object type, got {schema.get('type')!r}"
 
-    def _validate(self, val: Any, schema: dict[str, Any], path: str) -> list[str]:
-        t, label = schema.get("type"), path or "parameter"
-        if t in self._TYPE_MAP and not isinstance(val, self._TYPE_MAP[t]):
-            return [f"{label} should be {t}"]
-        
-        errors = []
-        if "enum" in schema and val not in schema["enum"]:
-            errors.append(f"{label} must be one of {schema['enum']}")
-        if t in ("integer", "number"):
-            if "minimum" in schema and val < schema["minimum"]:
-                errors.append(f"{label} must be >= {schema['minimum']}")
-            if "maximum" in schema and val > schema["maximum"]:
-                errors.append(f"{label} must be <= {schema['maximum']}")
-        if t == "string":
-            if "minLength" in schema and len(val) < schema["minLength"]:
-                errors.append(f"{label} must be at least {schema['minLength']} chars")
-            if "maxLength" in schema and len(val) > schema["maxLength"]:
-                errors.append(f"{label} must be at most {schema['maxLength']} chars")
-        if t == "object":
-            props = schema.get("properties", {})
-            for k in schema.get("required", []):
-                if k not in val:
-                    errors.append(f"missing required {path + '.' + k if path else k}")
-            for k, v in val.items():
-                if k in props:
-                    errors.extend(self._validate(v, props[k], path + '.' + k if path else k))
-        if t == "array" and "items" in schema:
-            for i, item in enumerate(val):
-                errors.extend(self._validate(item, schema["items"], f"{path}[{i}]" if path else f"[{i}]"))
+            def invalid(val: Any, path: str, errors: list[str]) -> Any:
+                raise ValueError(message)
+
+            self._validators = (invalid, invalid)
+            return
+        schema = {**schema, "type": "object"}
+        self._validators = (compile_schema(schema), compile_schema(schema, coerce=True))
+
+    def validate_params(self, params: dict[str, Any]) -> list[str]:
+        """Validate tool parameters against JSON schema. Returns error list (empty if valid)."""
+        if self._validators is None:
+            self.compile_params()
+        errors: list[str] = []
+        self._validators[0](params, "", errors)
         return errors
+
+    def prepare_params(self, params: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+        """
+        Validate tool parameters, first repairing common LLM type slips.
+
+        Args:
+            params: Arguments from the LLM (never modified).
+
+        Returns:
+            The arguments to call ``execute`` with (``params`` itself unless
+            something was coerced, e.g. ``"3"`` for an integer) and the error list.
+        """
+        if self._validators is None:
+            self.compile_params()
+        errors: list[str] = []
+        params = self._validators[1](params, "", errors)
+        return params, errors
     
     def to_schema(self) -> dict[str, Any]:
         """Convert tool to OpenAI function schema format."""
@@ -60,6 +60,8 @@ class ReadFileTool(Tool):
 class WriteFileTool(Tool):
     """Tool to write content to a file."""
     
+    serial = True
+
     def __init__(self, allowed_dir: Path | None = None):
         self._allowed_dir = allowed_dir
 
@@ -103,6 +105,8 @@ class WriteFileTool(Tool):
 class EditFileTool(Tool):
     """Tool to edit a file by replacing text."""
     
+    serial = True
+
     def __init__(self, allowed_dir: Path | None = None):
         self._allowed_dir = allowed_dir
 
@@ -1,5 +1,6 @@
 """Message tool for sending messages to users."""
 
+from contextvars import ContextVar
 from typing import Any, Callable, Awaitable
 
 from nanobot.agent.tools.base import Tool
@@ -9,6 +10,9 @@ from nanobot.bus.events import OutboundMessage
 class MessageTool(Tool):
     """Tool to send messages to users on chat channels."""
     
+    serial = True  # keep multiple sends in the order the model issued them
+    keywords = ("send", "notify", "forward", "发送", "通知", "转发")
+    
     def __init__(
         self, 
         send_callback: Callable[[OutboundMessage], Awaitable[None]] | None = None,
@@ -16,13 +20,14 @@ class MessageTool(Tool):
         default_chat_id: str = ""
     ):
         self._send_callback = send_callback
-        self._default_channel = default_channel
-        self._default_chat_id = default_chat_id
+        # Task-local so concurrent turns each keep their own target chat
+        self._context: ContextVar[tuple[str, str]] = ContextVar(
+            "message_tool_context", default=(default_channel, default_chat_id)
+        )
     
     def set_context(self, channel: str, chat_id: str) -> None:
         """Set the current message context."""
-        self._default_channel = channel
-        self._default_chat_id = chat_id
+        self._context.set((channel, chat_id))
     
     def set_send_callback(self, callback: Callable[[OutboundMessage], Awaitable[None]]) -> None:
         """Set the callback for sending messages."""
@@ -70,8 +75,9 @@ class MessageTool(Tool):
         media: list[str] | None = None,
         **kwargs: Any
     ) -> str:
-        channel = channel or self._default_channel
-        chat_id = chat_id or self._default_chat_id
+        default_channel, default_chat_id = self._context.get()
+        channel = channel or default_channel
+        chat_id = chat_id or default_chat_id
 
         if not channel or not chat_id:
             return "Error: No target channel/chat specified"
@@ -1,8 +1,34 @@
 """Tool registry for dynamic tool management."""
 
+import asyncio
+import json
+import time
+from functools import cached_property
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.utils import metrics, tracing
+
+
+class ToolDefinitions(list):
+    """
+    Tool definitions in OpenAI format, as cached by a ToolRegistry.
+
+    A plain list to providers, plus the registry ``version`` it was built at
+    and its JSON serialization, computed once on first use. ``version`` names
+    the registry state, which every subset taken from it shares; ``key``
+    (version plus tool names) identifies this exact list, for keying caches.
+    Treat it as read-only: it is shared by every call until the registry changes.
+    """
+
+    def __init__(self, definitions: list[dict[str, Any]], version: int):
+        super().__init__(definitions)
+        self.version = version
+        self.key = (version, tuple(d["function"]["name"] for d in definitions))
+
+    @cached_property
+    def json(self) -> str:
+        return json.dumps(self, ensure_ascii=False)
 
 
 class ToolRegistry:
@@ -14,14 +40,25 @@ class ToolRegistry:
     
     def __init__(self):
         self._tools: dict[str, Tool] = {}
+        self._definitions: ToolDefinitions | None = None
+        # Bumped whenever the set of tools changes; lets callers key caches off it
+        self.version = 0
     
     def register(self, tool: Tool) -> None:
-        """Register a tool."""
+        """Register a tool (compiling its parameter validators)."""
+        tool.compile_params()
         self._tools[tool.name] = tool
+        self.invalidate()
     
     def unregister(self, name: str) -> None:
         """Unregister a tool by name."""
-        self._tools.pop(name, None)
+        if self._tools.pop(name, None) is not None:
+            self.invalidate()
+    
+    def invalidate(self) -> None:
+        """Drop the cached definitions (call after changing a registered tool's schema)."""
+        self._definitions = None
+        self.version += 1
     
     def get(self, name: str) -> Tool | None:
         """Get a tool by name."""
@@ -31,9 +68,11 @@ class ToolRegistry:
         """Check if a tool is registered."""
         return name in self._tools
     
-    def get_definitions(self) -> list[dict[str, Any]]:
-        """Get all tool definitions in OpenAI format."""
-        return [tool.to_schema() for tool in self._tools.values()]
+    def get_definitions(self) -> ToolDefinitions:
+        """Get all tool definitions in OpenAI format (cached until the registry changes)."""
+        if self._definitions is None:
+            self._definitions = ToolDefinitions([tool.to_schema() for tool in self._tools.values()], self.version)
+        return self._definitions
     
     async def execute(self, name: str, params: dict[str, Any]) -> str:
         """
@@ -53,13 +92,61 @@ class ToolRegistry:
         if not tool:
             return f"Error: Tool '{name}' not found"
 
-        try:
-            errors = tool.validate_params(params)
-            if errors:
-                return f"Error: Invalid parameters for tool '{name}': " + "; ".join(errors)
-            return await tool.execute(**params)
-        except Exception as e:
-            return f"Error executing {name}: {str(e)}"
+        with tracing.span("tool.execute", tool=name) as span:
+            start = time.monotonic()
+            try:
+                params, errors = tool.prepare_params(params)
+                if errors:
+                    result = f"Error: Invalid parameters for tool '{name}': " + "; ".join(errors)
+                else:
+                    result = await tool.execute(**params)
+            except Exception as e:
+                result = f"Error executing {name}: {str(e)}"
+            metrics.TOOL_LATENCY.observe(time.monotonic() - start, tool=name)
+            span.set("result_chars", len(result))
+            if result.startswith("Error"):
+                span.set("error", result[:200])
+                metrics.TOOL_ERRORS.inc(tool=name)
+            return result
+
+    async def execute_many(
+        self,
+        calls: list[tuple[str, dict[str, Any]]],
+        max_concurrency: int = 5,
+    ) -> list[str]:
+        """
+        Execute several tool calls, running independent ones concurrently.
+        
+        Calls to tools marked ``serial`` act as barriers: every earlier call
+        finishes first and the serial call runs on its own.
+        
+        Args:
+            calls: (name, params) pairs in the order the LLM issued them.
+            max_concurrency: Maximum number of calls running at once.
+        
+        Returns:
+            Results in the same order as ``calls``.
+        """
+        results: list[str] = [""] * len(calls)
+        slots = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run(index: int, name: str, params: dict[str, Any]) -> None:
+            async with slots:
+                results[index] = await self.execute(name, params)
+
+        pending = []
+        for index, (name, params) in enumerate(calls):
+            tool = self._tools.get(name)
+            if tool and tool.serial:
+                if pending:
+                    await asyncio.gather(*pending)
+                    pending = []
+                await run(index, name, params)
+            else:
+                pending.append(run(index, name, params))
+        if pending:
+            await asyncio.gather(*pending)
+        return results
     
     @property
     def tool_names(self) -> list[str]:
@@ -0,0 +1,254 @@
+"""Per-turn tool routing: offer the LLM only the tools a turn is likely to need."""
+
+import json
+import math
+import re
+from typing import TYPE_CHECKING, Any
+
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolDefinitions, ToolRegistry
+
+if TYPE_CHECKING:
+    from nanobot.agent.skills import SkillsLoader
+
+LOAD_TOOLS = "load_tools"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CJK_RE = re.compile("[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")  # Kana, Han, Hangul
+_SKILL_FILE_RE = re.compile(r"skills/([^/]+)/SKILL\.md$")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from get has have how i if in is it me my "
+    "of on or please that the this to use what when with you your".split()
+)
+
+
+def terms(text: str) -> set[str]:
+    """Lexical terms of ``text``: lowercase words, plus character bigrams for CJK runs."""
+    text = text.lower()
+    out = {w for w in _WORD_RE.findall(text) if len(w) > 1 and w not in _STOPWORDS}
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            out.add(run)
+        out.update(run[i:i + 2] for i in range(len(run) - 1))
+    return out
+
+
+class ToolRoute:
+    """
+    The tools offered during one turn.
+
+    Starts from the router's per-message selection and grows as the turn
+    goes on: tools the model has called, tools declared by skills it has
+    read, and tools it asked for through ``load_tools``.
+    """
+
+    def __init__(self, router: "ToolRouter", names: set[str], start: int):
+        self.router = router
+        self.names = names
+        self.start = start  # Messages before this index belong to earlier turns
+        self.full = False
+
+    def definitions(self, messages: list[dict[str, Any]]) -> ToolDefinitions:
+        """Definitions to send with the next LLM call of this turn."""
+        for message in messages[self.start:]:
+            if message.get("role") != "assistant":
+                continue
+            for call in message.get("tool_calls") or []:
+                self._observe(call.get("function", {}))
+        self.start = max(self.start, len(messages))
+        if self.full:
+            return self.router.subset(set(self.router.registry.tool_names))
+        return self.router.subset(self.names)
+
+    def _observe(self, function: dict[str, Any]) -> None:
+        name = function.get("name", "")
+        self.names.add(name)
+        try:
+            args = json.loads(function.get("arguments") or "{}")
+        except (TypeError, ValueError):
+            return
+        if not isinstance(args, dict):
+            return
+        if name == LOAD_TOOLS:
+            # Read the arguments the way the tool itself received them
+            tool = self.router.registry.get(LOAD_TOOLS)
+            if tool is not None:
+                args, errors = tool.prepare_params(args)
+                if errors:
+                    return
+            if args.get("all") is True:
+                self.full = True
+            names = args.get("names")
+            if isinstance(names, list):
+                self.names.update(n for n in names if isinstance(n, str))
+        elif name == "read_file":
+            match = _SKILL_FILE_RE.search(str(args.get("path", "")).replace("\\", "/"))
+            if match:
+                self.names.update(self.router.skill_tools(match.group(1)))
+
+
+class ToolRouter:
+    """
+    Pick a relevant subset of the registered tools for each turn.
+
+    A turn is offered the core tools, the tools configured for its channel,
+    the tools declared by always-on skills, and up to ``max_matched`` other
+    tools whose name, description, parameters or keywords share terms with
+    the user's message (IDF-weighted, keyword hits counting double). No
+    embeddings or extra LLM calls are involved. While anything is held
+    back, a ``load_tools`` tool lets the model ask for more.
+
+    Args:
+        registry: The registry to route over.
+        core: Tools offered on every turn.
+        max_matched: Most tools added by matching the message.
+        min_score: Lowest match score that selects a tool.
+        channel_tools: Tools always offered on a given channel.
+        keywords: Extra trigger words per tool name, on top of ``Tool.keywords``.
+        skills: Loader used to look up the tools a skill declares.
+    """
+
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        core: list[str],
+        max_matched: int = 4,
+        min_score: float = 2.0,
+        channel_tools: dict[str, list[str]] | None = None,
+        keywords: dict[str, list[str]] | None = None,
+        skills: "SkillsLoader | None" = None,
+    ):
+        self.registry = registry
+        self.core = list(core)
+        self.max_matched = max_matched
+        self.min_score = min_score
+        self.channel_tools = channel_tools or {}
+        self.keywords = keywords or {}
+        self.skills = skills
+        self._version = -1
+        self._docs: dict[str, tuple[set[str], set[str]]] = {}  # name -> (description terms, keyword terms)
+        self._idf: dict[str, float] = {}
+        self._subsets: dict[frozenset[str], ToolDefinitions] = {}
+
+    def _index(self) -> None:
+        """Rebuild the term index when the registry has changed."""
+        if self._version == self.registry.version:
+            return
+        self._docs.clear()
+        self._subsets.clear()
+        df: dict[str, int] = {}
+        for name in self.registry.tool_names:
+            tool = self.registry.get(name)
+            if tool is None or name == LOAD_TOOLS:
+                continue
+            text = [name.replace("_", " "), tool.description]
+            for param, spec in (tool.parameters.get("properties") or {}).items():
+                text += [param.replace("_", " "), str(spec.get("description", ""))]
+            words = terms(" ".join(text))
+            hints = terms(" ".join([*tool.keywords, *self.keywords.get(name, [])]))
+            self._docs[name] = (words, hints)
+            for term in words | hints:
+                df[term] = df.get(term, 0) + 1
+        n = len(self._docs)
+        self._idf = {term: math.log(1 + n / count) for term, count in df.items()}
+        self._version = self.registry.version
+
+    def scores(self, text: str) -> dict[str, float]:
+        """Match score of every routable tool against ``text``."""
+        self._index()
+        query = terms(text)
+        return {
+            name: sum(self._idf[t] for t in query & words) + 2 * sum(self._idf[t] for t in query & hints)
+            for name, (words, hints) in self._docs.items()
+        }
+
+    def skill_tools(self, skill: str) -> list[str]:
+        """Tools declared by a skill (empty without a skills loader)."""
+        return self.skills.get_skill_tools(skill) if self.skills else []
+
+    def optional(self) -> list[str]:
+        """Registered tools that are not in the core set."""
+        return [n for n in self.registry.tool_names if n not in self.core and n != LOAD_TOOLS]
+
+    def start_turn(self, text: str, channel: str, messages: list[dict[str, Any]]) -> ToolRoute:
+        """
+        Select the tools for a new turn.
+
+        Args:
+            text: The user's message.
+            channel: Channel the message arrived on.
+            messages: The turn's initial prompt; later tool calls are read from what follows it.
+
+        Returns:
+            A route whose ``definitions()`` are passed to each LLM call of the turn.
+        """
+        names = set(self.core) | set(self.channel_tools.get(channel, []))
+        if self.skills:
+            for skill in self.skills.get_always_skills():
+                names.update(self.skills.get_skill_tools(skill))
+        ranked = sorted(
+            ((score, name) for name, score in self.scores(text).items() if name not in names),
+            reverse=True,
+        )
+        names.update(name for score, name in ranked[:self.max_matched] if score >= self.min_score)
+        return ToolRoute(self, names, len(messages))
+
+    def subset(self, names: set[str]) -> ToolDefinitions:
+        """Definitions of ``names`` in registry order, plus ``load_tools`` if anything is left out."""
+        self._index()
+        key = frozenset(n for n in names if n in self._docs)
+        cached = self._subsets.get(key)
+        if cached is None:
+            keep = set(key)
+            if len(key) < len(self._docs):
+                keep.add(LOAD_TOOLS)
+            full = self.registry.get_definitions()
+            cached = ToolDefinitions([d for d in full if d["function"]["name"] in keep], full.version)
+            self._subsets[key] = cached
+        return cached
+
+
+class LoadToolsTool(Tool):
+    """Escape hatch for tool routing: lets the model enable tools it was not offered."""
+
+    def __init__(self, router: ToolRouter):
+        self._router = router
+
+    @property
+    def name(self) -> str:
+        return LOAD_TOOLS
+
+    @property
+    def description(self) -> str:
+        return (
+            "Only the tools that looked relevant to this message are enabled. "
+            "Call this to enable more for the rest of the turn. "
+            f"Available: {', '.join(self._router.optional())}. "
+            "Pass all=true if unsure."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "names": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Tool names to enable",
+                },
+                "all": {"type": "boolean", "description": "Enable every tool"},
+            },
+        }
+
+    async def execute(self, names: list[str] | None = None, all: bool = False, **kwargs: Any) -> str:
+        # The route picks the call up from the conversation; nothing to change here
+        if all:
+            return "All tools are now enabled."
+        names = names or []
+        unknown = [n for n in names if not self._router.registry.has(n)]
+        if unknown:
+            return f"Error: Unknown tools: {', '.join(unknown)}. Available: {', '.join(self._router.optional())}"
+        if not names:
+            return "Error: Pass tool names or all=true."
+        return f"Enabled: {', '.join(names)}."
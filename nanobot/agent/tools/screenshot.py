@@ -12,6 +12,8 @@ from nanobot.agent.tools.base import Tool
 class ScreenshotTool(Tool):
     """Tool to capture screenshots of the screen."""
 
+    keywords = ("screenshot", "screen", "截图", "截屏")
+
     def __init__(self, workspace: Path):
         """Initialize the screenshot tool.
 
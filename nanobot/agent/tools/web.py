@@ -48,6 +48,7 @@ class WebSearchTool(Tool):
     
     name = "web_search"
     description = "Search the web. Returns titles, URLs, and snippets."
+    keywords = ("search", "latest", "news", "搜索", "最新", "新闻")
     parameters = {
         "type": "object",
         "properties": {
@@ -95,6 +96,7 @@ class WebFetchTool(Tool):
     
     name = "web_fetch"
     description = "Fetch URL and extract readable content (HTML → markdown/text)."
+    keywords = ("http", "https", "link", "website", "网页", "链接", "网址")
     parameters = {
         "type": "object",
         "properties": {
@@ -1,12 +1,37 @@
-"""API usage tracker — appends one JSONL record per LLM call."""
+"""API usage tracker — appends one JSONL record per LLM call.
 
+Records are queued in memory and written in batches by a background
+thread, so an LLM call never waits on the filesystem. The queue is a
+bounded ring buffer: if the disk stalls long enough to fill it, the oldest
+records are dropped and counted rather than growing memory without limit.
+Everything still queued is flushed at interpreter exit. When the UTC day
+changes, the log is rotated into the daily archive (see
+:mod:`nanobot.utils.usage_archive`).
+"""
+
+import atexit
 import json
+import threading
+from collections import deque
 from contextvars import ContextVar
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Callable
+
+from loguru import logger
+
+from nanobot.utils import metrics, usage_archive
 
 _usage_file: Path | None = None
 
+BUFFER_SIZE = 10_000     # Records held in memory before the oldest are dropped
+BATCH_SIZE = 256         # Wake the writer once this many records are queued
+FLUSH_INTERVAL_S = 1.0   # ...or this long after the last write
+
+DROPPED = metrics.REGISTRY.register(metrics.Counter(
+    "nanobot_usage_records_dropped_total", "Usage records lost because the buffer was full or a write failed.",
+))
+
 # ── Per-request context (set by the agent loop before each LLM call) ──────────
 _ctx_sender:  ContextVar[str] = ContextVar("nanobot_sender",  default="unknown")
 _ctx_channel: ContextVar[str] = ContextVar("nanobot_channel", default="unknown")
@@ -27,13 +52,158 @@ def _file() -> Path:
     return _usage_file
 
 
+class UsageWriter:
+    """
+    Ring buffer of pending records drained by a daemon thread.
+
+    Args:
+        capacity: Maximum records held; appending to a full buffer drops the oldest.
+        batch_size: Queue length that wakes the writer before the interval elapses.
+        flush_interval_s: Longest a record waits before being written.
+        rotate: Roll the log over into the daily archive when the UTC day changes.
+    """
+
+    def __init__(
+        self,
+        capacity: int = BUFFER_SIZE,
+        batch_size: int = BATCH_SIZE,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+        rotate: bool = True,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.rotate = rotate
+        self._days: dict[Path, str] = {}  # UTC day last written to each log
+        self.dropped = 0
+        self._buffer: deque[tuple[Path, dict[str, Any]]] = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # Keeps batches in order between the thread and flush()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def submit(self, path: Path, entry: dict[str, Any]) -> None:
+        """Queue a record (never blocks on I/O)."""
+        with self._cond:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._drop(1)
+            self._buffer.append((path, entry))
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="nanobot-usage", daemon=True)
+                self._thread.start()
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+    def _drop(self, count: int) -> None:
+        self.dropped += count
+        DROPPED.inc(count)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and len(self._buffer) < self.batch_size:
+                    self._cond.wait(self.flush_interval_s)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self) -> None:
+        """Write everything queued so far (blocking; for shutdown and tests)."""
+        with self._write_lock:
+            with self._cond:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: list[tuple[Path, dict[str, Any]]]) -> None:
+        # Consecutive records for the same file and UTC day are written together
+        runs: list[tuple[Path, str, list[str]]] = []
+        for path, entry in batch:
+            line, day = json.dumps(_finalize(entry)), str(entry.get("ts", ""))[:10]
+            if runs and runs[-1][0] == path and runs[-1][1] == day:
+                runs[-1][2].append(line)
+            else:
+                runs.append((path, day, [line]))
+        for path, day, lines in runs:
+            if self.rotate:
+                self._rotate_before(path, day)
+            try:
+                # Shared lock: a rotation in another process waits for the append
+                with usage_archive.log_lock(path), open(path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except Exception as e:
+                self._drop(len(lines))
+                logger.warning(f"Dropped {len(lines)} usage records: {e}")
+
+    def _rotate_before(self, path: Path, day: str) -> None:
+        """Close the log's previous day before writing the first record of a later one."""
+        if not day or self._days.get(path) == day:
+            return
+        # Check the file itself: another process may have rotated it already
+        current = usage_archive.log_day(path)
+        if current and current < day:
+            try:
+                usage_archive.rotate(path)
+            except Exception as e:
+                logger.warning(f"Usage log rotation failed: {e}")
+        self._days[path] = day
+
+    def close(self) -> None:
+        """Stop the writer thread and flush what is left."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+def _finalize(entry: dict[str, Any]) -> dict[str, Any]:
+    """Resolve a deferred cost and feed the metrics (runs on the writer thread)."""
+    cost = entry["cost"]
+    if callable(cost):
+        try:
+            cost = cost()
+        except Exception:
+            cost = 0.0
+    entry["cost"] = round(cost, 8)
+    metrics.TOKENS.inc(entry["in"], model=entry["model"], type="prompt")
+    metrics.TOKENS.inc(entry["out"], model=entry["model"], type="completion")
+    metrics.COST.inc(cost, model=entry["model"])
+    if entry.get("cached"):
+        metrics.CACHE_SAVED.inc(entry["saved"], model=entry["model"])
+    return entry
+
+
+_writer = UsageWriter()
+atexit.register(_writer.close)
+
+
+def flush() -> None:
+    """Write all queued usage records now."""
+    _writer.flush()
+
+
+def dropped() -> int:
+    """Records lost to a full buffer or failed writes since startup."""
+    return _writer.dropped
+
+
 def record(
     model: str,
     prompt_tokens: int,
     completion_tokens: int,
-    cost_usd: float,
+    cost_usd: float | Callable[[], float],
+    cached: bool = False,
+    saved_usd: float = 0.0,
 ) -> None:
-    """Append one usage record to ~/.nanobot/usage.jsonl (fire-and-forget)."""
+    """Queue one usage record for ~/.nanobot/usage.jsonl (fire-and-forget).
+
+    ``cost_usd`` may be a callable, evaluated on the writer thread, so
+    expensive cost lookups stay off the event loop. Cache hits are recorded
+    with ``cached: true``, zero cost and the cost of the original call as
+    ``saved``.
+    """
     entry = {
         "ts":      datetime.now(timezone.utc).isoformat(),
         "sender":  _ctx_sender.get(),
@@ -42,10 +212,12 @@ def record(
         "in":      prompt_tokens,
         "out":     completion_tokens,
         "total":   prompt_tokens + completion_tokens,
-        "cost":    round(cost_usd, 8),
+        "cost":    cost_usd,
     }
+    if cached:
+        entry["cached"] = True
+        entry["saved"] = round(saved_usd, 8)
     try:
-        with open(_file(), "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry) + "\n")
+        _writer.submit(_file(), entry)
     except Exception:
         pass  # never crash the main flow
@@ -0,0 +1,5 @@
+"""Offline benchmarks of the gateway hot path."""
+
+from nanobot.bench.harness import BenchReport, BenchSettings, SyntheticChannel, run_bench
+
+__all__ = ["BenchReport", "BenchSettings", "SyntheticChannel", "run_bench"]
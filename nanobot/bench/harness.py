@@ -0,0 +1,379 @@
+"""End-to-end gateway benchmark: synthetic users -> bus -> agent loop -> channel."""
+
+import asyncio
+import math
+import random
+import resource
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.base import BaseChannel
+from nanobot.channels.manager import ChannelManager
+from nanobot.config.schema import Config
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.session.manager import SessionManager
+
+SEQ_KEY = "bench_seq"  # metadata key correlating replies with the messages that caused them
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..100); 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered), max(1, math.ceil(q / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux), or peak RSS where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if peak > 1 << 32 else peak * 1024
+
+
+@dataclass
+class BenchSettings:
+    """Load shape and system-under-test settings."""
+
+    users: int = 20
+    rate: float = 10.0  # messages per second across all users (Poisson arrivals)
+    messages: int = 200
+    message_chars: int = 80
+    max_concurrent_turns: int = 4
+    max_inflight_turns: int = 16
+    stream: bool = False  # exercise the streaming reply path
+    session_backend: str = "jsonl"  # jsonl | sqlite
+    reply_timeout_s: float = 60.0  # wait for stragglers after the last send
+    sample_interval_s: float = 0.1  # queue depth / RSS sampling period
+    seed: int = 0
+
+
+@dataclass
+class BenchReport:
+    """Results of one run; ``summary()`` is the flat view printed by the CLI."""
+
+    settings: BenchSettings
+    sent: int = 0
+    completed: int = 0
+    unmatched: int = 0  # replies without a sequence number (e.g. error replies)
+    duration_s: float = 0.0
+    latencies_s: list[float] = field(default_factory=list)
+    first_update_s: list[float] = field(default_factory=list)
+    stages: dict[str, list[float]] = field(default_factory=dict)
+    # (seconds since start, inbound queued, outbound queued, turns in flight, rss bytes)
+    timeline: list[tuple[float, int, int, int, int]] = field(default_factory=list)
+    rss_start: int = 0
+    rss_end: int = 0
+
+    def summary(self) -> dict[str, Any]:
+        lat = self.latencies_s
+        out: dict[str, Any] = {
+            "sent": self.sent,
+            "completed": self.completed,
+            "unmatched": self.unmatched,
+            "duration_s": round(self.duration_s, 3),
+            "throughput_msg_s": round(self.completed / self.duration_s, 2) if self.duration_s else 0.0,
+            "latency_p50_ms": round(percentile(lat, 50) * 1000, 1),
+            "latency_p95_ms": round(percentile(lat, 95) * 1000, 1),
+            "latency_p99_ms": round(percentile(lat, 99) * 1000, 1),
+            "latency_max_ms": round(max(lat, default=0.0) * 1000, 1),
+            "inbound_queue_max": max((s[1] for s in self.timeline), default=0),
+            "outbound_queue_max": max((s[2] for s in self.timeline), default=0),
+            "turns_in_flight_max": max((s[3] for s in self.timeline), default=0),
+            "rss_start_mb": round(self.rss_start / 2**20, 1),
+            "rss_end_mb": round(self.rss_end / 2**20, 1),
+            "rss_peak_mb": round(max((s[4] for s in self.timeline), default=self.rss_end) / 2**20, 1),
+            "rss_growth_mb": round((self.rss_end - self.rss_start) / 2**20, 1),
+        }
+        if self.first_update_s:
+            out["first_update_p50_ms"] = round(percentile(self.first_update_s, 50) * 1000, 1)
+            out["first_update_p95_ms"] = round(percentile(self.first_update_s, 95) * 1000, 1)
+        return out
+
+    def stage_summary(self) -> dict[str, dict[str, float]]:
+        """Per-stage call counts and p50/p95/total milliseconds."""
+        return {
+            name: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "total_ms": round(sum(values) * 1000, 1),
+            }
+            for name, values in self.stages.items()
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "settings": self.settings.__dict__,
+            "summary": self.summary(),
+            "stages": self.stage_summary(),
+            "timeline": [list(s) for s in self.timeline],
+        }
+
+
+class _StageClock:
+    """Collects durations per stage name."""
+
+    def __init__(self, report: BenchReport):
+        self.report = report
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.report.stages.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage: str, fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        async def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return timed
+
+
+class SyntheticChannel(BaseChannel):
+    """
+    In-memory channel: simulated users publish through ``inject`` and
+    replies are matched back to their message by sequence number.
+    """
+
+    name = "bench"
+
+    def __init__(self, bus: MessageBus, report: BenchReport, expected: int, streaming: bool = False):
+        super().__init__(config=None, bus=bus)
+        self.expected = expected
+        self.supports_streaming = streaming
+        self.stream_edit_interval = 0.0
+        self.report = report
+        self._sent_at: dict[int, float] = {}
+        self._first_update: set[int] = set()
+        self.all_replied = asyncio.Event()
+
+    async def start(self) -> None:
+        self._running = True
+
+    async def stop(self) -> None:
+        self._running = False
+
+    async def inject(self, seq: int, user: int, content: str) -> None:
+        self._sent_at[seq] = time.perf_counter()
+        self.report.sent += 1
+        await self._handle_message(
+            sender_id=f"user{user}",
+            chat_id=f"chat{user}",
+            content=content,
+            metadata={SEQ_KEY: seq, "bench_published": time.perf_counter()},
+        )
+
+    def _seq(self, msg: OutboundMessage) -> int | None:
+        seq = (msg.metadata or {}).get(SEQ_KEY)
+        return seq if seq in self._sent_at else None
+
+    async def send(self, msg: OutboundMessage) -> None:
+        seq = self._seq(msg)
+        if seq is None:
+            self.report.unmatched += 1
+        else:
+            self.report.latencies_s.append(time.perf_counter() - self._sent_at.pop(seq))
+            self.report.completed += 1
+        if not self._sent_at and self.report.sent >= self.expected:
+            self.all_replied.set()
+
+    async def _stream_start(self, msg: OutboundMessage) -> Any:
+        seq = self._seq(msg)
+        if seq is not None and seq not in self._first_update:
+            self._first_update.add(seq)
+            self.report.first_update_s.append(time.perf_counter() - self._sent_at[seq])
+        return seq
+
+    async def _stream_edit(self, handle: Any, msg: OutboundMessage) -> bool:
+        if not msg.streaming:
+            await self.send(msg)
+        return True
+
+
+class _TimedBus(MessageBus):
+    """MessageBus that times queue waits (inbound) and dispatch hops (outbound)."""
+
+    def __init__(self, clock: _StageClock):
+        super().__init__()
+        self.clock = clock
+
+    async def consume_inbound(self) -> InboundMessage:
+        msg = await super().consume_inbound()
+        published = msg.metadata.pop("bench_published", None)
+        if published is not None:
+            self.clock.add("inbound_queue", time.perf_counter() - published)
+        return msg
+
+    async def publish_outbound(self, msg: OutboundMessage) -> None:
+        if not (msg.streaming or msg.retracted):
+            msg.metadata = {**(msg.metadata or {}), "bench_outbound": time.perf_counter()}
+        await super().publish_outbound(msg)
+
+    async def consume_outbound(self) -> OutboundMessage:
+        msg = await super().consume_outbound()
+        queued = (msg.metadata or {}).get("bench_outbound")
+        if queued is not None:
+            self.clock.add("outbound_queue", time.perf_counter() - queued)
+        return msg
+
+
+class _TimedProvider(LLMProvider):
+    """Measures LLM call time (and time to first delta when streaming)."""
+
+    def __init__(self, inner: LLMProvider, clock: _StageClock):
+        super().__init__()
+        self.inner = inner
+        self.clock = clock
+
+    async def chat(self, messages: list[dict[str, Any]], **kwargs: Any) -> LLMResponse:
+        start = time.perf_counter()
+        try:
+            return await self.inner.chat(messages=messages, **kwargs)
+        finally:
+            self.clock.add("llm", time.perf_counter() - start)
+
+    async def chat_stream(self, messages: list[dict[str, Any]], **kwargs: Any):
+        start = time.perf_counter()
+        first = True
+        try:
+            async for chunk in self.inner.chat_stream(messages=messages, **kwargs):
+                if first and chunk.delta:
+                    first = False
+                    self.clock.add("llm_first_delta", time.perf_counter() - start)
+                yield chunk
+        finally:
+            self.clock.add("llm", time.perf_counter() - start)
+
+    def get_default_model(self) -> str:
+        return self.inner.get_default_model()
+
+
+def _message_text(rng: random.Random, seq: int, chars: int) -> str:
+    words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+    text = f"message {seq}:"
+    while len(text) < chars:
+        text += " " + rng.choice(words)
+    return text[:max(chars, len(f"message {seq}:"))]
+
+
+async def run_bench(
+    provider: LLMProvider,
+    settings: BenchSettings | None = None,
+    workspace: Path | None = None,
+) -> BenchReport:
+    """
+    Drive a full gateway stack with synthetic users.
+
+    Boots MessageBus, AgentLoop, ChannelManager (with a SyntheticChannel) and
+    SessionManager in a scratch workspace, publishes ``settings.messages``
+    messages from ``settings.users`` users with Poisson arrivals at
+    ``settings.rate`` per second, and waits for every reply.
+
+    Args:
+        provider: LLM provider, normally an offline ReplayProvider.
+        settings: Load shape; defaults to BenchSettings().
+        workspace: Workspace to use; defaults to a temporary directory.
+
+    Returns:
+        A BenchReport with end-to-end latencies, per-stage timings, queue
+        depth / RSS samples and throughput.
+    """
+    settings = settings or BenchSettings()
+    with tempfile.TemporaryDirectory(prefix="nanobot-bench-") as tmp:
+        workspace = workspace or Path(tmp) / "workspace"
+        workspace.mkdir(parents=True, exist_ok=True)
+        return await _run(provider, settings, workspace, Path(tmp))
+
+
+async def _run(provider: LLMProvider, settings: BenchSettings, workspace: Path, scratch: Path) -> BenchReport:
+    from nanobot.session.backends import JsonlSessionBackend, SqliteSessionBackend
+
+    report = BenchReport(settings=settings)
+    clock = _StageClock(report)
+    bus = _TimedBus(clock)
+
+    if settings.session_backend == "sqlite":
+        backend = SqliteSessionBackend(scratch / "sessions.db")
+    else:
+        (scratch / "sessions").mkdir(exist_ok=True)
+        backend = JsonlSessionBackend(scratch / "sessions")
+    sessions = SessionManager(workspace, backend=backend)
+    sessions.save = _sync_timed(clock, "session_save", sessions.save)
+
+    loop = AgentLoop(
+        bus=bus,
+        provider=_TimedProvider(provider, clock),
+        workspace=workspace,
+        session_manager=sessions,
+        max_concurrent_turns=settings.max_concurrent_turns,
+        max_inflight_turns=settings.max_inflight_turns,
+        stream_responses=settings.stream,
+    )
+    loop.tools.execute = clock.wrap("tool", loop.tools.execute)
+    loop._process_message = clock.wrap("turn", loop._process_message)
+
+    channel = SyntheticChannel(bus, report, expected=settings.messages, streaming=settings.stream)
+    channels = ChannelManager(Config(), bus, session_manager=sessions)
+    channels.channels[channel.name] = channel
+
+    report.rss_start = rss_bytes()
+    agent_task = asyncio.create_task(loop.run())
+    channels_task = asyncio.create_task(channels.start_all())
+    start = time.perf_counter()
+
+    async def sample() -> None:
+        while True:
+            report.timeline.append((
+                round(time.perf_counter() - start, 3),
+                bus.inbound_size,
+                bus.outbound_size,
+                len(loop._inflight),
+                rss_bytes(),
+            ))
+            await asyncio.sleep(settings.sample_interval_s)
+
+    sampler = asyncio.create_task(sample())
+    rng = random.Random(settings.seed)
+    try:
+        for seq in range(settings.messages):
+            user = rng.randrange(settings.users)
+            await channel.inject(seq, user, _message_text(rng, seq, settings.message_chars))
+            if settings.rate > 0:
+                await asyncio.sleep(rng.expovariate(settings.rate))
+        try:
+            await asyncio.wait_for(channel.all_replied.wait(), timeout=settings.reply_timeout_s)
+        except asyncio.TimeoutError:
+            pass
+        report.duration_s = time.perf_counter() - start
+    finally:
+        sampler.cancel()
+        loop.stop()
+        await asyncio.gather(agent_task, sampler, return_exceptions=True)
+        await channels.stop_all()
+        channels_task.cancel()
+        await asyncio.gather(channels_task, return_exceptions=True)
+        sessions.close()
+        report.rss_end = rss_bytes()
+    return report
+
+
+def _sync_timed(clock: _StageClock, stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    def timed(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            clock.add(stage, time.perf_counter() - start)
+    return timed
@@ -33,5 +33,13 @@ class OutboundMessage:
     reply_to: str | None = None
     media: list[str] = field(default_factory=list)
     metadata: dict[str, Any] = field(default_factory=dict)
+    # Streaming: all updates of one reply share a stream_id. Partial updates
+    # (streaming=True) carry the full text so far and are edited into the same
+    # message by channels that support it; the final message has streaming=False.
+    stream_id: str | None = None
+    streaming: bool = False
+    # Abandoned stream (the text was not the final answer): channels delete
+    # the partial message; content is empty.
+    retracted: bool = False
 
 
@@ -1,11 +1,13 @@
 """Async message queue for decoupled channel-agent communication."""
 
 import asyncio
+import time
 from typing import Callable, Awaitable
 
 from loguru import logger
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.utils import tracing
 
 
 class MessageBus:
@@ -24,6 +26,7 @@ class MessageBus:
     
     async def publish_inbound(self, msg: InboundMessage) -> None:
         """Publish a message from a channel to the agent."""
+        tracing.inject(msg.metadata)
         await self.inbound.put(msg)
     
     async def consume_inbound(self) -> InboundMessage:
@@ -32,6 +35,8 @@ class MessageBus:
     
     async def publish_outbound(self, msg: OutboundMessage) -> None:
         """Publish a response from the agent to channels."""
+        if not (msg.streaming or msg.retracted) and msg.metadata and tracing.TRACE_ID_KEY in msg.metadata:
+            msg.metadata[tracing.OUTBOUND_AT_KEY] = time.time_ns()
         await self.outbound.put(msg)
     
     async def consume_outbound(self) -> OutboundMessage:
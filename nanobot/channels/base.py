@@ -1,5 +1,6 @@
 """Base channel interface for chat platforms."""
 
+import time
 from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import Any
@@ -20,6 +21,11 @@ class BaseChannel(ABC):
 
     name: str = "base"
 
+    # Channels that can edit a sent message set this and implement
+    # _stream_start/_stream_edit; others only receive final messages.
+    supports_streaming: bool = False
+    stream_edit_interval: float = 1.0  # Min seconds between edits of one message
+
     def __init__(self, config: Any, bus: MessageBus, *, groq_api_key: str = ""):
         """
         Initialize the channel.
@@ -33,6 +39,7 @@ class BaseChannel(ABC):
         self.bus = bus
         self.groq_api_key = groq_api_key
         self._running = False
+        self._streams: dict[str, list[Any]] = {}  # stream_id -> [handle, last_edit_monotonic]
     
     @abstractmethod
     async def start(self) -> None:
@@ -61,6 +68,67 @@ class BaseChannel(ABC):
         """
         pass
     
+    async def send_stream(self, msg: OutboundMessage) -> None:
+        """
+        Deliver one update of a streamed reply.
+        
+        The first partial update sends a new message; later ones edit it in
+        place, at most once per ``stream_edit_interval`` (partials carry the
+        full text so far, so skipped ones lose nothing). The final update
+        always edits, or falls back to a normal send. A retraction deletes
+        the partial message.
+        
+        Args:
+            msg: An outbound message with ``stream_id`` set.
+        """
+        state = self._streams.get(msg.stream_id)
+        now = time.monotonic()
+
+        if msg.retracted:
+            self._streams.pop(msg.stream_id, None)
+            if state is not None and state[0] is not None and not await self._stream_delete(state[0], msg):
+                logger.debug(f"{self.name}: could not retract streamed message {msg.stream_id}")
+            return
+
+        if msg.streaming:
+            if state is None:
+                self._streams[msg.stream_id] = [await self._stream_start(msg), now]
+            elif state[0] is not None and now - state[1] >= self.stream_edit_interval:
+                state[1] = now
+                await self._stream_edit(state[0], msg)
+            return
+
+        self._streams.pop(msg.stream_id, None)
+        if state is None or state[0] is None or not await self._stream_edit(state[0], msg):
+            await self.send(msg)
+
+    async def _stream_start(self, msg: OutboundMessage) -> Any:
+        """
+        Send the first partial message of a stream.
+        
+        Returns:
+            A handle identifying the sent message for later edits, or None on failure.
+        """
+        return None
+
+    async def _stream_edit(self, handle: Any, msg: OutboundMessage) -> bool:
+        """
+        Replace the text of a streamed message.
+        
+        Returns:
+            True if the message was updated.
+        """
+        return False
+
+    async def _stream_delete(self, handle: Any, msg: OutboundMessage) -> bool:
+        """
+        Delete a streamed message whose text turned out not to be the reply.
+        
+        Returns:
+            True if the message was deleted.
+        """
+        return False
+    
     def is_allowed(self, sender_id: str) -> bool:
         """
         Check if a sender is allowed to use this bot.
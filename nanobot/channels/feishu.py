@@ -21,8 +21,11 @@ try:
         CreateMessageRequestBody,
         CreateMessageReactionRequest,
         CreateMessageReactionRequestBody,
+        DeleteMessageRequest,
         Emoji,
         P2ImMessageReceiveV1,
+        PatchMessageRequest,
+        PatchMessageRequestBody,
     )
     FEISHU_AVAILABLE = True
 except ImportError:
@@ -52,6 +55,7 @@ class FeishuChannel(BaseChannel):
     """
     
     name = "feishu"
+    supports_streaming = True
     
     def __init__(self, config: FeishuConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -198,6 +202,73 @@ class FeishuChannel(BaseChannel):
             elements.append({"tag": "markdown", "content": remaining})
         return elements or [{"tag": "markdown", "content": content}]
 
+    def _build_card(self, content: str, updatable: bool = False) -> str:
+        """Serialize an interactive card (markdown + tables); updatable cards can be patched later."""
+        config: dict[str, Any] = {"wide_screen_mode": True}
+        if updatable:
+            config["update_multi"] = True
+        card = {
+            "config": config,
+            "elements": self._build_card_elements(content),
+        }
+        return json.dumps(card, ensure_ascii=False)
+    
+    def _create_card_sync(self, chat_id: str, card: str) -> str | None:
+        """Send a card message; returns its message_id, or None on failure."""
+        # Determine receive_id_type based on chat_id format
+        # open_id starts with "ou_", chat_id starts with "oc_"
+        if chat_id.startswith("oc_"):
+            receive_id_type = "chat_id"
+        else:
+            receive_id_type = "open_id"
+        
+        request = CreateMessageRequest.builder() \
+            .receive_id_type(receive_id_type) \
+            .request_body(
+                CreateMessageRequestBody.builder()
+                .receive_id(chat_id)
+                .msg_type("interactive")
+                .content(card)
+                .build()
+            ).build()
+        
+        response = self._client.im.v1.message.create(request)
+        
+        if not response.success():
+            logger.error(
+                f"Failed to send Feishu message: code={response.code}, "
+                f"msg={response.msg}, log_id={response.get_log_id()}"
+            )
+            return None
+        logger.debug(f"Feishu message sent to {chat_id}")
+        return response.data.message_id if response.data else None
+    
+    def _patch_card_sync(self, message_id: str, card: str) -> bool:
+        """Replace the content of a previously sent card message."""
+        request = PatchMessageRequest.builder() \
+            .message_id(message_id) \
+            .request_body(
+                PatchMessageRequestBody.builder()
+                .content(card)
+                .build()
+            ).build()
+        
+        response = self._client.im.v1.message.patch(request)
+        
+        if not response.success():
+            logger.warning(f"Failed to update Feishu card: code={response.code}, msg={response.msg}")
+            return False
+        return True
+    
+    def _delete_message_sync(self, message_id: str) -> bool:
+        """Recall a previously sent message."""
+        request = DeleteMessageRequest.builder().message_id(message_id).build()
+        response = self._client.im.v1.message.delete(request)
+        if not response.success():
+            logger.warning(f"Failed to delete Feishu message: code={response.code}, msg={response.msg}")
+            return False
+        return True
+    
     async def send(self, msg: OutboundMessage) -> None:
         """Send a message through Feishu."""
         if not self._client:
@@ -205,44 +276,45 @@ class FeishuChannel(BaseChannel):
             return
         
         try:
-            # Determine receive_id_type based on chat_id format
-            # open_id starts with "ou_", chat_id starts with "oc_"
-            if msg.chat_id.startswith("oc_"):
-                receive_id_type = "chat_id"
-            else:
-                receive_id_type = "open_id"
-            
-            # Build card with markdown + table support
-            elements = self._build_card_elements(msg.content)
-            card = {
-                "config": {"wide_screen_mode": True},
-                "elements": elements,
-            }
-            content = json.dumps(card, ensure_ascii=False)
-            
-            request = CreateMessageRequest.builder() \
-                .receive_id_type(receive_id_type) \
-                .request_body(
-                    CreateMessageRequestBody.builder()
-                    .receive_id(msg.chat_id)
-                    .msg_type("interactive")
-                    .content(content)
-                    .build()
-                ).build()
-            
-            response = self._client.im.v1.message.create(request)
-            
-            if not response.success():
-                logger.error(
-                    f"Failed to send Feishu message: code={response.code}, "
-                    f"msg={response.msg}, log_id={response.get_log_id()}"
-                )
-            else:
-                logger.debug(f"Feishu message sent to {msg.chat_id}")
-                
+            self._create_card_sync(msg.chat_id, self._build_card(msg.content))
         except Exception as e:
             logger.error(f"Error sending Feishu message: {e}")
     
+    async def _stream_start(self, msg: OutboundMessage) -> Any:
+        """Send the first partial reply as an updatable card (non-blocking); returns its message_id."""
+        if not self._client:
+            return None
+        loop = asyncio.get_running_loop()
+        try:
+            card = self._build_card(msg.content, updatable=True)
+            return await loop.run_in_executor(None, self._create_card_sync, msg.chat_id, card)
+        except Exception as e:
+            logger.warning(f"Error starting Feishu stream: {e}")
+            return None
+    
+    async def _stream_edit(self, handle: Any, msg: OutboundMessage) -> bool:
+        """Update a streamed card in place (non-blocking)."""
+        if not self._client:
+            return False
+        loop = asyncio.get_running_loop()
+        try:
+            card = self._build_card(msg.content, updatable=True)
+            return await loop.run_in_executor(None, self._patch_card_sync, handle, card)
+        except Exception as e:
+            logger.warning(f"Error updating Feishu card: {e}")
+            return False
+    
+    async def _stream_delete(self, handle: Any, msg: OutboundMessage) -> bool:
+        """Recall an abandoned streamed card (non-blocking)."""
+        if not self._client:
+            return False
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, self._delete_message_sync, handle)
+        except Exception as e:
+            logger.warning(f"Error deleting Feishu card: {e}")
+            return False
+    
     def _on_message_sync(self, data: "P2ImMessageReceiveV1") -> None:
         """
         Sync handler for incoming messages (called from WebSocket thread).
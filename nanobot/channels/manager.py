@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from typing import Any, TYPE_CHECKING
 
 from loguru import logger
@@ -11,6 +12,7 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import Config
+from nanobot.utils import tracing
 
 if TYPE_CHECKING:
     from nanobot.session.manager import SessionManager
@@ -202,10 +204,21 @@ class ChannelManager:
                 
                 channel = self.channels.get(msg.channel)
                 if channel:
-                    try:
-                        await channel.send(msg)
-                    except Exception as e:
-                        logger.error(f"Error sending to {msg.channel}: {e}")
+                    # Trace the final reply only (partials share its metadata)
+                    traced = None if msg.streaming or msg.retracted else msg.metadata
+                    with tracing.span("outbound.dispatch", metadata=traced, channel=msg.channel) as span:
+                        queued = (traced or {}).pop(tracing.OUTBOUND_AT_KEY, None)
+                        if queued:
+                            span.set("queued_ms", round((time.time_ns() - queued) / 1e6, 3))
+                        try:
+                            if msg.stream_id and channel.supports_streaming:
+                                await channel.send_stream(msg)
+                            elif not msg.streaming and not msg.retracted:
+                                # Channels that cannot edit only get the final reply
+                                await channel.send(msg)
+                        except Exception as e:
+                            span.set("error", str(e)[:200])
+                            logger.error(f"Error sending to {msg.channel}: {e}")
                 else:
                     logger.warning(f"Unknown channel: {msg.channel}")
                     
@@ -20,6 +20,7 @@ class SlackChannel(BaseChannel):
     """Slack channel using Socket Mode."""
 
     name = "slack"
+    supports_streaming = True
 
     def __init__(self, config: SlackConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -71,25 +72,65 @@ class SlackChannel(BaseChannel):
                 logger.warning(f"Slack socket close failed: {e}")
             self._socket_client = None
 
+    @staticmethod
+    def _reply_thread(msg: OutboundMessage) -> str | None:
+        """Thread to reply in: only for channel/group messages; DMs don't use threads."""
+        slack_meta = msg.metadata.get("slack", {}) if msg.metadata else {}
+        thread_ts = slack_meta.get("thread_ts")
+        channel_type = slack_meta.get("channel_type")
+        return thread_ts if thread_ts and channel_type != "im" else None
+
     async def send(self, msg: OutboundMessage) -> None:
         """Send a message through Slack."""
         if not self._web_client:
             logger.warning("Slack client not running")
             return
         try:
-            slack_meta = msg.metadata.get("slack", {}) if msg.metadata else {}
-            thread_ts = slack_meta.get("thread_ts")
-            channel_type = slack_meta.get("channel_type")
-            # Only reply in thread for channel/group messages; DMs don't use threads
-            use_thread = thread_ts and channel_type != "im"
             await self._web_client.chat_postMessage(
                 channel=msg.chat_id,
                 text=msg.content or "",
-                thread_ts=thread_ts if use_thread else None,
+                thread_ts=self._reply_thread(msg),
             )
         except Exception as e:
             logger.error(f"Error sending Slack message: {e}")
 
+    async def _stream_start(self, msg: OutboundMessage) -> Any:
+        """Post the first partial reply; returns its ts."""
+        if not self._web_client:
+            return None
+        try:
+            response = await self._web_client.chat_postMessage(
+                channel=msg.chat_id,
+                text=msg.content or "",
+                thread_ts=self._reply_thread(msg),
+            )
+            return response.get("ts")
+        except Exception as e:
+            logger.warning(f"Error starting Slack stream: {e}")
+            return None
+
+    async def _stream_edit(self, handle: Any, msg: OutboundMessage) -> bool:
+        """Edit a streamed reply in place (chat_update)."""
+        if not self._web_client:
+            return False
+        try:
+            await self._web_client.chat_update(channel=msg.chat_id, ts=handle, text=msg.content or "")
+            return True
+        except Exception as e:
+            logger.warning(f"Error updating Slack message: {e}")
+            return False
+
+    async def _stream_delete(self, handle: Any, msg: OutboundMessage) -> bool:
+        """Delete an abandoned streamed reply (chat_delete)."""
+        if not self._web_client:
+            return False
+        try:
+            await self._web_client.chat_delete(channel=msg.chat_id, ts=handle)
+            return True
+        except Exception as e:
+            logger.warning(f"Error deleting Slack message: {e}")
+            return False
+
     async def _on_socket_request(
         self,
         client: SocketModeClient,
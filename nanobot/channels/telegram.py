@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import re
-from typing import TYPE_CHECKING
+from typing import Any, TYPE_CHECKING
 
 from loguru import logger
 from telegram import BotCommand, Update
@@ -91,6 +91,7 @@ class TelegramChannel(BaseChannel):
     """
     
     name = "telegram"
+    supports_streaming = True
     
     # Commands registered with Telegram's command menu
     BOT_COMMANDS = [
@@ -216,6 +217,59 @@ class TelegramChannel(BaseChannel):
             except Exception as e2:
                 logger.error(f"Error sending Telegram message: {e2}")
     
+    async def _stream_start(self, msg: OutboundMessage) -> Any:
+        """Send the first partial reply as plain text; returns its message_id."""
+        if not self._app:
+            return None
+        self._stop_typing(msg.chat_id)
+        try:
+            sent = await self._app.bot.send_message(chat_id=int(msg.chat_id), text=msg.content)
+            return sent.message_id
+        except Exception as e:
+            logger.warning(f"Error starting Telegram stream: {e}")
+            return None
+    
+    async def _stream_edit(self, handle: Any, msg: OutboundMessage) -> bool:
+        """Edit a streamed reply (edit_message_text); only the final text is rendered as HTML."""
+        if not self._app:
+            return False
+        try:
+            chat_id = int(msg.chat_id)
+            if not msg.streaming:
+                # Partial text may hold unbalanced markdown, so HTML only at the end
+                try:
+                    await self._app.bot.edit_message_text(
+                        chat_id=chat_id,
+                        message_id=handle,
+                        text=_markdown_to_telegram_html(msg.content),
+                        parse_mode="HTML",
+                    )
+                    return True
+                except Exception as e:
+                    if "not modified" in str(e).lower():
+                        return True
+                    logger.warning(f"HTML parse failed, falling back to plain text: {e}")
+            await self._app.bot.edit_message_text(
+                chat_id=chat_id, message_id=handle, text=msg.content
+            )
+            return True
+        except Exception as e:
+            if "not modified" in str(e).lower():
+                return True
+            logger.warning(f"Error editing Telegram message: {e}")
+            return False
+    
+    async def _stream_delete(self, handle: Any, msg: OutboundMessage) -> bool:
+        """Delete an abandoned streamed reply."""
+        if not self._app:
+            return False
+        try:
+            await self._app.bot.delete_message(chat_id=int(msg.chat_id), message_id=handle)
+            return True
+        except Exception as e:
+            logger.warning(f"Error deleting Telegram message: {e}")
+            return False
+    
     async def _on_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /start command."""
         if not update.message or not update.effective_user:
@@ -267,29 +267,174 @@ This file stores important information that should persist across sessions.
 def _make_provider(config):
     """Create LiteLLMProvider from config. Exits if no API key found."""
     from nanobot.providers.litellm_provider import LiteLLMProvider
+    from nanobot.providers.registry import find_by_name
+    from nanobot.providers.limiter import LLMLimiter, ModelLimits
+    from nanobot.providers.resilience import RetryPolicy
+    from nanobot.providers.response_cache import ResponseCache
+    replay = config.agents.defaults.replay
+    if replay.replay_path:
+        from nanobot.providers.replay import Latency, load_replay_provider
+        return load_replay_provider(
+            Path(replay.replay_path).expanduser(),
+            latency=Latency.parse(replay.latency) if replay.latency else None,
+        )
     p = config.get_provider()
     model = config.agents.defaults.model
     if not (p and p.api_key) and not model.startswith("bedrock/"):
         console.print("[red]Error: No API key configured.[/red]")
         console.print("Set one in ~/.nanobot/config.json under providers section")
         raise typer.Exit(1)
-    return LiteLLMProvider(
-        api_key=p.api_key if p else None,
-        api_base=config.get_api_base(),
-        default_model=model,
-        extra_headers=p.extra_headers if p else None,
-        provider_name=config.get_provider_name(),
+    retry = config.agents.defaults.retry
+    limits = config.agents.defaults.limits
+    limiter = LLMLimiter(
+        default=ModelLimits(**limits.default.model_dump()),
+        models={k: ModelLimits(**v.model_dump()) for k, v in limits.models.items()},
+    ) if limits.enabled else None
+    cache_cfg = config.agents.defaults.response_cache
+    response_cache = None
+    if cache_cfg.enabled:
+        from nanobot.config.loader import get_data_dir
+        response_cache = ResponseCache(
+            Path(cache_cfg.path).expanduser() if cache_cfg.path else get_data_dir() / "cache" / "responses.db",
+            max_entries=cache_cfg.max_entries,
+            ttl_s=cache_cfg.ttl_s,
+        )
+    
+    def build(provider_config, name, api_base, default_model):
+        return LiteLLMProvider(
+            api_key=provider_config.api_key if provider_config else None,
+            api_base=api_base,
+            default_model=default_model,
+            extra_headers=provider_config.extra_headers if provider_config else None,
+            provider_name=name,
+            retry=RetryPolicy(
+                max_retries=retry.max_retries,
+                base_delay=retry.base_delay_s,
+                max_delay=retry.max_delay_s,
+            ),
+            breaker_failures=retry.breaker_failures,
+            breaker_cooldown_s=retry.breaker_cooldown_s,
+            limiter=limiter,
+            response_cache=response_cache,
+        )
+    
+    provider = build(p, config.get_provider_name(), config.get_api_base(), model)
+    
+    def upstream(name, upstream_model, role):
+        """Provider instance for another upstream (None = the primary; False = unusable)."""
+        if name:
+            fp = getattr(config.providers, name, None)
+            if not (fp and fp.api_key):
+                console.print(f"[yellow]Warning: {role} provider '{name}' has no API key, skipped[/yellow]")
+                return False
+            if name == config.get_provider_name():
+                return None
+            spec = find_by_name(name)
+            api_base = fp.api_base or (spec.default_api_base if spec and spec.is_gateway else None)
+            return build(fp, name, api_base, upstream_model)
+        if config.get_provider_name(upstream_model) == config.get_provider_name():
+            return None
+        return build(
+            config.get_provider(upstream_model), config.get_provider_name(upstream_model),
+            config.get_api_base(upstream_model), upstream_model,
+        )
+    
+    for fb in config.agents.defaults.fallbacks:
+        fallback = upstream(fb.provider, fb.model, "fallback")
+        if fallback is not False:
+            provider.add_fallback(fb.model, fallback)
+    
+    hedge = config.agents.defaults.hedge
+    if hedge.enabled:
+        from nanobot.providers.hedging import Hedger, HedgePolicy
+        from nanobot.providers.registry import PROVIDERS, find_hedge_partner
+        hedger = Hedger(HedgePolicy(
+            percentile=hedge.percentile,
+            min_delay=hedge.min_delay_s,
+            max_delay=hedge.max_delay_s,
+            initial_delay=hedge.initial_delay_s,
+            min_samples=hedge.min_samples,
+            budget=hedge.budget,
+            interactive_only=hedge.interactive_only,
+        ))
+        hedge_provider, hedge_model = hedge.provider, hedge.model or None
+        if not hedge_provider:
+            available = [s.name for s in PROVIDERS if getattr(config.providers, s.name).api_key]
+            partner = find_hedge_partner(model, config.get_provider_name(), available)
+            if partner:
+                hedge_provider, hedge_model = partner[0].name, hedge_model or partner[1]
+        target = upstream(hedge_provider, hedge_model or model, "hedge") if hedge_provider else None
+        if target is not False:
+            provider.set_hedge(hedger, target, hedge_model)
+    if replay.record_path:
+        from nanobot.providers.replay import RecordingProvider
+        return RecordingProvider(provider, Path(replay.record_path).expanduser())
+    return provider
+
+
+def _sqlite_session_path(config) -> Path:
+    """Resolve the SQLite session database path."""
+    from nanobot.config.loader import get_data_dir
+    if config.sessions.sqlite_path:
+        return Path(config.sessions.sqlite_path).expanduser()
+    return get_data_dir() / "sessions" / "sessions.db"
+
+
+def _make_session_manager(config):
+    """Create the SessionManager with the configured storage backend."""
+    from nanobot.session.manager import SessionManager
+    from nanobot.session.backends import SqliteSessionBackend
+
+    sessions = config.sessions
+    backend = None
+    if sessions.backend == "sqlite":
+        backend = SqliteSessionBackend(_sqlite_session_path(config))
+    elif sessions.backend != "jsonl":
+        console.print(f"[red]Error: Unknown session backend '{sessions.backend}'[/red]")
+        raise typer.Exit(1)
+
+    return SessionManager(
+        config.workspace_path,
+        compact_after=sessions.compact_after,
+        cache_max_entries=sessions.cache_max_entries,
+        cache_max_messages=sessions.cache_max_messages,
+        cache_idle_ttl_s=sessions.cache_idle_ttl_s,
+        backend=backend,
+        load_max_messages=sessions.load_max_messages or None,
     )
 
 
+def _configure_tracing(config) -> None:
+    """Enable per-turn tracing if configured."""
+    if not config.tracing.enabled:
+        return
+    from nanobot.config.loader import get_data_dir
+    from nanobot.utils import tracing
+    path = Path(config.tracing.path).expanduser() if config.tracing.path else get_data_dir() / "traces" / "traces.jsonl"
+    tracing.configure(path, sample_rate=config.tracing.sample_rate, slow_turn_s=config.tracing.slow_turn_s)
+
+
 # ============================================================================
 # Gateway / Server
 # ============================================================================
 
 
+def _register_gateway_metrics(bus, agent, session_manager, cron) -> None:
+    """Expose live gateway state as scrape-time gauges."""
+    from nanobot.utils.metrics import REGISTRY
+
+    REGISTRY.gauge(
+        "nanobot_bus_queue_depth", "Messages waiting on the bus.",
+        lambda: {("inbound",): bus.inbound_size, ("outbound",): bus.outbound_size}, ("queue",),
+    )
+    REGISTRY.gauge("nanobot_turns_inflight", "Turns queued on a session lock or being processed.", lambda: agent.inflight_count)
+    REGISTRY.gauge("nanobot_session_cache_size", "Sessions held in memory.", lambda: session_manager.cache_stats["size"])
+    REGISTRY.gauge("nanobot_cron_lag_seconds", "How far the most overdue cron job is behind schedule.", cron.lag_s)
+
+
 @app.command()
 def gateway(
-    port: int = typer.Option(18790, "--port", "-p", help="Gateway port"),
+    port: int = typer.Option(None, "--port", "-p", help="Gateway port (default: gateway.port, 18790)"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output"),
 ):
     """Start the nanobot gateway."""
@@ -297,21 +442,24 @@ def gateway(
     from nanobot.bus.queue import MessageBus
     from nanobot.agent.loop import AgentLoop
     from nanobot.channels.manager import ChannelManager
-    from nanobot.session.manager import SessionManager
     from nanobot.cron.service import CronService
     from nanobot.cron.types import CronJob
     from nanobot.heartbeat.service import HeartbeatService
+    from nanobot.providers.limiter import Priority, llm_priority
+    from nanobot.providers.response_cache import llm_cache
     
     if verbose:
         import logging
         logging.basicConfig(level=logging.DEBUG)
     
+    config = load_config()
+    port = port or config.gateway.port
     console.print(f"{__logo__} Starting nanobot gateway on port {port}...")
     
-    config = load_config()
+    _configure_tracing(config)
     bus = MessageBus()
     provider = _make_provider(config)
-    session_manager = SessionManager(config.workspace_path)
+    session_manager = _make_session_manager(config)
     
     # Create cron service first (callback set after agent creation)
     cron_store_path = get_data_dir() / "cron" / "jobs.json"
@@ -324,8 +472,19 @@ def gateway(
         workspace=config.workspace_path,
         model=config.agents.defaults.model,
         max_iterations=config.agents.defaults.max_tool_iterations,
+        max_concurrent_turns=config.agents.defaults.max_concurrent_turns,
+        max_inflight_turns=config.agents.defaults.max_inflight_turns,
+        max_parallel_tool_calls=config.agents.defaults.max_parallel_tool_calls,
+        stream_responses=config.agents.defaults.stream_responses,
+        history_max_messages=config.agents.defaults.history_max_messages,
+        history_max_tokens=config.agents.defaults.history_max_tokens or None,
+        history_message_max_tokens=config.agents.defaults.history_message_max_tokens or None,
+        summarize_after=config.agents.defaults.summarize_after,
+        summary_keep_recent=config.agents.defaults.summary_keep_recent,
+        summary_model=config.agents.defaults.summary_model or None,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
+        tool_routing=config.tools.routing,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
         session_manager=session_manager,
@@ -335,12 +494,13 @@ def gateway(
     # Set cron callback (needs agent)
     async def on_cron_job(job: CronJob) -> str | None:
         """Execute a cron job through the agent."""
-        response = await agent.process_direct(
-            job.payload.message,
-            session_key=f"cron:{job.id}",
-            channel=job.payload.channel or "cli",
-            chat_id=job.payload.to or "direct",
-        )
+        with llm_priority(Priority.BACKGROUND), llm_cache():
+            response = await agent.process_direct(
+                job.payload.message,
+                session_key=f"cron:{job.id}",
+                channel=job.payload.channel or "cli",
+                chat_id=job.payload.to or "direct",
+            )
         if job.payload.deliver and job.payload.to:
             from nanobot.bus.events import OutboundMessage
             await bus.publish_outbound(OutboundMessage(
@@ -354,7 +514,8 @@ def gateway(
     # Create heartbeat service
     async def on_heartbeat(prompt: str) -> str:
         """Execute heartbeat through the agent."""
-        return await agent.process_direct(prompt, session_key="heartbeat")
+        with llm_priority(Priority.BACKGROUND), llm_cache():
+            return await agent.process_direct(prompt, session_key="heartbeat")
     
     heartbeat = HeartbeatService(
         workspace=config.workspace_path,
@@ -377,8 +538,19 @@ def gateway(
     
     console.print(f"[green]✓[/green] Heartbeat: every 30m")
     
+    if config.gateway.http_enabled:
+        _register_gateway_metrics(bus, agent, session_manager, cron)
+    
+    def health() -> tuple[bool, str]:
+        return (True, "ok") if agent.is_running else (False, "agent loop not running")
+    
     async def run():
+        server = None
         try:
+            if config.gateway.http_enabled:
+                from nanobot.utils import metrics
+                server = await metrics.serve(config.gateway.host, port, health=health)
+                console.print(f"[green]✓[/green] Metrics: http://{config.gateway.host}:{port}/metrics")
             await cron.start()
             await heartbeat.start()
             await asyncio.gather(
@@ -387,10 +559,15 @@ def gateway(
             )
         except KeyboardInterrupt:
             console.print("\nShutting down...")
+        finally:
+            # Ctrl-C arrives here as CancelledError under asyncio.run
             heartbeat.stop()
             cron.stop()
             agent.stop()
             await channels.stop_all()
+            session_manager.close()
+            if server is not None:
+                server.close()
     
     asyncio.run(run())
 
@@ -416,6 +593,7 @@ def agent(
     from loguru import logger
     
     config = load_config()
+    _configure_tracing(config)
     
     bus = MessageBus()
     provider = _make_provider(config)
@@ -425,14 +603,24 @@ def agent(
     else:
         logger.disable("nanobot")
     
+    session_manager = _make_session_manager(config)
     agent_loop = AgentLoop(
         bus=bus,
         provider=provider,
         workspace=config.workspace_path,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
+        tool_routing=config.tools.routing,
         restrict_to_workspace=config.tools.restrict_to_workspace,
         mcp_configs=config.tools.mcp or None,
+        max_parallel_tool_calls=config.agents.defaults.max_parallel_tool_calls,
+        history_max_messages=config.agents.defaults.history_max_messages,
+        history_max_tokens=config.agents.defaults.history_max_tokens or None,
+        history_message_max_tokens=config.agents.defaults.history_message_max_tokens or None,
+        summarize_after=config.agents.defaults.summarize_after,
+        summary_keep_recent=config.agents.defaults.summary_keep_recent,
+        summary_model=config.agents.defaults.summary_model or None,
+        session_manager=session_manager,
     )
     
     # Show spinner when logs are off (no output to miss); skip when logs are on
@@ -450,7 +638,10 @@ def agent(
                 response = await agent_loop.process_direct(message, session_id)
             _print_agent_response(response, render_markdown=markdown)
         
-        asyncio.run(run_once())
+        try:
+            asyncio.run(run_once())
+        finally:
+            session_manager.close()
     else:
         # Interactive mode
         _init_prompt_session()
@@ -489,7 +680,10 @@ def agent(
                     console.print("\nGoodbye!")
                     break
         
-        asyncio.run(run_interactive())
+        try:
+            asyncio.run(run_interactive())
+        finally:
+            session_manager.close()
 
 
 # ============================================================================
@@ -643,6 +837,201 @@ def channels_login():
         console.print("[red]npm not found. Please install Node.js.[/red]")
 
 
+# ============================================================================
+# Session Commands
+# ============================================================================
+
+sessions_app = typer.Typer(help="Manage conversation sessions")
+app.add_typer(sessions_app, name="sessions")
+
+
+@sessions_app.command("migrate")
+def sessions_migrate(
+    db: str = typer.Option(None, "--db", help="SQLite database path (default: from config)"),
+    overwrite: bool = typer.Option(False, "--overwrite", help="Replace sessions already in the database"),
+):
+    """Copy JSONL session files into the SQLite session store."""
+    from nanobot.config.loader import load_config, get_data_dir
+    from nanobot.session.backends import (
+        JsonlSessionBackend,
+        SqliteSessionBackend,
+        migrate_jsonl_to_sqlite,
+    )
+    
+    config = load_config()
+    db_path = Path(db).expanduser() if db else _sqlite_session_path(config)
+    source = JsonlSessionBackend(get_data_dir() / "sessions")
+    target = SqliteSessionBackend(db_path)
+    try:
+        migrated, skipped = migrate_jsonl_to_sqlite(source, target, overwrite=overwrite)
+    finally:
+        target.close()
+    
+    console.print(f"[green]✓[/green] Migrated {migrated} sessions to {db_path} ({skipped} skipped)")
+    if config.sessions.backend != "sqlite":
+        console.print('Set "sessions": {"backend": "sqlite"} in config to use it.')
+
+
+# ============================================================================
+# Usage Commands
+# ============================================================================
+
+usage_app = typer.Typer(help="Query and archive LLM usage records")
+app.add_typer(usage_app, name="usage")
+
+
+def _usage_file() -> Path:
+    from nanobot.agent.usage import _file
+    return _file()
+
+
+@usage_app.command("report")
+def usage_report(
+    since: str = typer.Option("7d", "--since", help="First day: YYYY-MM-DD, today, yesterday or Nd (N days ago)"),
+    until: str = typer.Option(None, "--until", help="Last day (default: today)"),
+    sender: str = typer.Option(None, "--sender", help="Only this sender"),
+    by: str = typer.Option("day", "--by", help="Group by: comma-separated day, hour, sender, channel, model"),
+):
+    """Summarize token usage and cost over a date range."""
+    from rich.table import Table
+    from nanobot.agent import usage
+    from nanobot.utils.usage_archive import parse_day, query
+    
+    usage.flush()
+    fields = [f.strip() for f in by.split(",") if f.strip()]
+    try:
+        rows = query(
+            _usage_file(),
+            since=parse_day(since) if since else None,
+            until=parse_day(until) if until else None,
+            sender=sender,
+            by=fields,
+        )
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+    
+    table = Table(title="LLM usage")
+    for name in fields:
+        table.add_column(name.capitalize())
+    for name in ("Calls", "Input", "Output", "Total", "Cost"):
+        table.add_column(name, justify="right")
+    totals = {"calls": 0, "in": 0, "out": 0, "total": 0, "cost": 0.0}
+    for key, s in sorted(rows.items()):
+        table.add_row(*key, str(s["calls"]), f"{s['in']:,}", f"{s['out']:,}", f"{s['total']:,}", f"${s['cost']:.4f}")
+        for k in totals:
+            totals[k] += s[k]
+    if len(rows) > 1:
+        table.add_row(
+            "[bold]total[/bold]", *[""] * (len(fields) - 1), str(totals["calls"]), f"{totals['in']:,}",
+            f"{totals['out']:,}", f"{totals['total']:,}", f"${totals['cost']:.4f}",
+        )
+    console.print(table if rows else "No usage recorded in that range.")
+
+
+@usage_app.command("archive")
+def usage_archive_cmd():
+    """Rotate a usage log left over from an earlier day and archive closed days."""
+    from nanobot.agent import usage
+    from nanobot.utils.usage_archive import archive_dir, archive_pending, rotate_if_stale
+    
+    usage.flush()
+    live = _usage_file()
+    rotated = rotate_if_stale(live)
+    built = archive_pending(archive_dir(live))
+    console.print(
+        f"[green]✓[/green] Rotated {len(rotated)} day(s) into {archive_dir(live)}; "
+        f"rebuilt {len(built)} columnar file(s)"
+    )
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+
+@app.command()
+def bench(
+    users: int = typer.Option(20, "--users", "-u", help="Simulated users (one chat each)"),
+    rate: float = typer.Option(10.0, "--rate", "-r", help="Messages per second across all users (0 = as fast as possible)"),
+    messages: int = typer.Option(200, "--messages", "-n", help="Messages to send"),
+    chars: int = typer.Option(80, "--chars", help="Characters per message"),
+    concurrency: int = typer.Option(4, "--concurrency", "-c", help="Agent max_concurrent_turns"),
+    max_inflight: int = typer.Option(16, "--max-inflight", help="Agent max_inflight_turns"),
+    stream: bool = typer.Option(False, "--stream", help="Use the streaming reply path"),
+    backend: str = typer.Option("jsonl", "--backend", help="Session backend: jsonl or sqlite"),
+    script: str = typer.Option(None, "--script", help="Replay recording (.jsonl) or script (.json)"),
+    tools: bool = typer.Option(False, "--tools", help="Default script calls a tool before replying"),
+    latency: str = typer.Option("lognormal:0.05,0.5", "--latency", help="LLM latency, e.g. 0.2 or lognormal:0.8,0.5"),
+    seed: int = typer.Option(0, "--seed", help="Random seed for arrivals and latency"),
+    json_out: str = typer.Option(None, "--json", help="Also write the full report (with timeline) to this file"),
+    logs: bool = typer.Option(False, "--logs/--no-logs", help="Show nanobot runtime logs"),
+):
+    """Benchmark the gateway hot path offline (synthetic channel, replay LLM)."""
+    import json
+    import tempfile
+    from loguru import logger
+    from nanobot.bench import BenchSettings, run_bench
+    from nanobot.providers.replay import Latency, ReplayProvider, load_replay_provider
+    
+    if logs:
+        logger.enable("nanobot")
+    else:
+        logger.disable("nanobot")
+    
+    settings = BenchSettings(
+        users=users,
+        rate=rate,
+        messages=messages,
+        message_chars=chars,
+        max_concurrent_turns=concurrency,
+        max_inflight_turns=max_inflight,
+        stream=stream,
+        session_backend=backend,
+        seed=seed,
+    )
+    
+    with tempfile.TemporaryDirectory(prefix="nanobot-bench-") as tmp:
+        workspace = Path(tmp)
+        lat = Latency.parse(latency) if latency else None
+        if script:
+            provider = load_replay_provider(Path(script).expanduser(), latency=lat, seed=seed)
+        elif tools:
+            provider = ReplayProvider(script=[
+                {"tool_calls": [{"name": "list_dir", "arguments": {"path": str(workspace)}}]},
+                {"content": "Done: {user}"},
+            ], latency=lat, seed=seed)
+        else:
+            provider = ReplayProvider(script=[{"content": "Echo: {user}"}], latency=lat, seed=seed)
+        
+        console.print(
+            f"{__logo__} Benchmarking: {messages} messages from {users} users at "
+            f"{rate:g}/s, concurrency {concurrency}, {backend} sessions..."
+        )
+        report = asyncio.run(run_bench(provider, settings, workspace=workspace))
+    
+    table = Table(title="Benchmark")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", justify="right")
+    for key, value in report.summary().items():
+        table.add_row(key, str(value))
+    console.print(table)
+    
+    stages = Table(title="Stages")
+    stages.add_column("Stage", style="cyan")
+    for column in ("count", "p50_ms", "p95_ms", "total_ms"):
+        stages.add_column(column, justify="right")
+    for name, values in report.stage_summary().items():
+        stages.add_row(name, *(str(v) for v in values.values()))
+    console.print(stages)
+    
+    if json_out:
+        Path(json_out).expanduser().write_text(json.dumps(report.to_dict(), indent=2), encoding="utf-8")
+        console.print(f"Full report written to {json_out}")
+    if report.completed < report.sent:
+        console.print(f"[yellow]{report.sent - report.completed} messages got no reply in time[/yellow]")
+
+
 # ============================================================================
 # Cron Commands
 # ============================================================================
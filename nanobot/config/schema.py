@@ -154,6 +154,64 @@ class ChannelsConfig(BaseModel):
     qq: QQConfig = Field(default_factory=QQConfig)
 
 
+class LLMRetryConfig(BaseModel):
+    """Retry and circuit-breaker settings for LLM calls."""
+    max_retries: int = 2  # Retries per upstream for 429/5xx/timeouts
+    base_delay_s: float = 1.0  # Backoff base (full jitter, doubled per attempt)
+    max_delay_s: float = 20.0  # Longer Retry-After hints fail over instead of waiting
+    breaker_failures: int = 3  # Consecutive failures before an upstream is skipped
+    breaker_cooldown_s: float = 60.0  # How long a tripped upstream is skipped
+
+
+class ModelLimitConfig(BaseModel):
+    """Request limits for one model (0 = unlimited)."""
+    max_concurrency: int = 0  # In-flight requests
+    rpm: int = 0  # Requests per minute
+    tpm: int = 0  # Tokens per minute (estimated up front, corrected by reported usage)
+
+
+class LLMLimitsConfig(BaseModel):
+    """Shared LLM limiter; interactive turns are admitted before cron/heartbeat/subagent calls."""
+    enabled: bool = True
+    default: ModelLimitConfig = Field(default_factory=lambda: ModelLimitConfig(max_concurrency=8))
+    models: dict[str, ModelLimitConfig] = Field(default_factory=dict)  # Keyed by model-name substring
+
+
+class ResponseCacheConfig(BaseModel):
+    """Exact-match LLM response cache (temperature-0 calls, or callers that opt in)."""
+    enabled: bool = False
+    path: str = ""  # Defaults to ~/.nanobot/cache/responses.db
+    max_entries: int = 1000
+    ttl_s: int = 86400
+
+
+class ModelFallbackConfig(BaseModel):
+    """One entry of the model fallback chain."""
+    model: str
+    provider: str = ""  # Key under "providers" (empty = matched by model name)
+
+
+class HedgeConfig(BaseModel):
+    """Hedged requests: race a slow first attempt against a second upstream."""
+    enabled: bool = False
+    provider: str = ""  # Key under "providers" for the hedge (empty = paired via the registry, else same provider)
+    model: str = ""  # Model for the hedge (empty = same model)
+    percentile: float = 0.95  # Hedge when time-to-first-byte exceeds this latency percentile
+    min_delay_s: float = 1.0
+    max_delay_s: float = 30.0
+    initial_delay_s: float = 8.0  # Used until min_samples latencies were observed
+    min_samples: int = 20
+    budget: float = 0.05  # Max fraction of calls that get a hedge
+    interactive_only: bool = True  # Never hedge cron/heartbeat/subagent calls
+
+
+class ReplayConfig(BaseModel):
+    """Record LLM traffic, or serve it offline for load tests and benchmarks."""
+    record_path: str = ""  # Append every LLM call to this JSONL file
+    replay_path: str = ""  # Serve a recording (.jsonl) or script (.json) instead of a live model
+    latency: str = ""  # Replay latency override, e.g. "0.5" or "lognormal:0.8,0.5"
+
+
 class AgentDefaults(BaseModel):
     """Default agent configuration."""
     workspace: str = "~/.nanobot/workspace"
@@ -161,6 +219,22 @@ class AgentDefaults(BaseModel):
     max_tokens: int = 8192
     temperature: float = 0.7
     max_tool_iterations: int = 20
+    max_concurrent_turns: int = 4  # Sessions processed in parallel by the gateway (1 = sequential)
+    max_inflight_turns: int = 16  # Turns taken off the inbound queue at once, running or waiting; the rest stay queued
+    max_parallel_tool_calls: int = 5  # Tool calls from one LLM response run concurrently (1 = sequential)
+    stream_responses: bool = True  # Progressively edit replies on channels that support it
+    history_max_messages: int = 200  # Newest session messages considered for the prompt
+    history_max_tokens: int = 12000  # Token budget for history, filled newest-first (0 = no budget)
+    history_message_max_tokens: int = 2000  # Truncate single history messages above this (0 = never)
+    summarize_after: int = 0  # Summarize once this many messages precede the recent window (0 = off; e.g. 40)
+    summary_keep_recent: int = 20  # Newest messages always kept verbatim
+    summary_model: str = ""  # Cheap model for summaries (empty = agent model)
+    retry: LLMRetryConfig = Field(default_factory=LLMRetryConfig)
+    limits: LLMLimitsConfig = Field(default_factory=LLMLimitsConfig)
+    response_cache: ResponseCacheConfig = Field(default_factory=ResponseCacheConfig)
+    fallbacks: list[ModelFallbackConfig] = Field(default_factory=list)  # Tried in order when the model fails
+    hedge: HedgeConfig = Field(default_factory=HedgeConfig)
+    replay: ReplayConfig = Field(default_factory=ReplayConfig)
 
 
 class AgentsConfig(BaseModel):
@@ -168,6 +242,17 @@ class AgentsConfig(BaseModel):
     defaults: AgentDefaults = Field(default_factory=AgentDefaults)
 
 
+class SessionsConfig(BaseModel):
+    """Session storage and in-memory cache configuration."""
+    backend: str = "jsonl"  # "jsonl" (one file per session) or "sqlite" (single WAL database)
+    sqlite_path: str = ""  # Defaults to ~/.nanobot/sessions/sessions.db
+    load_max_messages: int = 0  # SQLite: newest messages loaded per session (0 = all)
+    compact_after: int = 200  # Appended saves before a session file is compacted
+    cache_max_entries: int = 1000  # Sessions kept in memory (LRU)
+    cache_max_messages: int = 200000  # Total messages across cached sessions
+    cache_idle_ttl_s: int = 3600  # Evict sessions idle longer than this
+
+
 class ProviderConfig(BaseModel):
     """LLM provider configuration."""
     api_key: str = ""
@@ -195,6 +280,7 @@ class GatewayConfig(BaseModel):
     """Gateway/server configuration."""
     host: str = "0.0.0.0"
     port: int = 18790
+    http_enabled: bool = True  # Serve /metrics (Prometheus) and /healthz on host:port
 
 
 class WebSearchConfig(BaseModel):
@@ -213,6 +299,16 @@ class ExecToolConfig(BaseModel):
     timeout: int = 60
 
 
+class ToolRoutingConfig(BaseModel):
+    """Offer each turn only the tools that look relevant (saves prompt tokens on simple turns)."""
+    enabled: bool = False
+    core: list[str] = ["read_file", "write_file", "edit_file", "list_dir", "exec"]  # Offered on every turn
+    max_matched: int = 4  # Most extra tools picked by matching the message against tool descriptions
+    min_score: float = 2.0  # Lowest match score that picks a tool
+    channel_tools: dict[str, list[str]] = {}  # Always offered on a channel, e.g. {"telegram": ["message"]}
+    keywords: dict[str, list[str]] = {}  # Extra trigger words per tool name (useful for MCP tools)
+
+
 class MCPServerConfig(BaseModel):
     """Configuration for a single MCP server."""
     command: str
@@ -226,15 +322,26 @@ class ToolsConfig(BaseModel):
     exec: ExecToolConfig = Field(default_factory=ExecToolConfig)
     restrict_to_workspace: bool = False  # If true, restrict all tool access to workspace directory
     mcp: list[MCPServerConfig] = []
+    routing: ToolRoutingConfig = Field(default_factory=ToolRoutingConfig)
+
+
+class TracingConfig(BaseModel):
+    """Per-turn tracing spans appended to a JSONL file (OpenTelemetry field names)."""
+    enabled: bool = False
+    path: str = ""  # Defaults to ~/.nanobot/traces/traces.jsonl
+    sample_rate: float = 1.0  # Fraction of messages traced
+    slow_turn_s: float = 20.0  # Log a per-stage breakdown of turns slower than this (0 = never)
 
 
 class Config(BaseSettings):
     """Root configuration for nanobot."""
     agents: AgentsConfig = Field(default_factory=AgentsConfig)
+    sessions: SessionsConfig = Field(default_factory=SessionsConfig)
     channels: ChannelsConfig = Field(default_factory=ChannelsConfig)
     providers: ProvidersConfig = Field(default_factory=ProvidersConfig)
     gateway: GatewayConfig = Field(default_factory=GatewayConfig)
     tools: ToolsConfig = Field(default_factory=ToolsConfig)
+    tracing: TracingConfig = Field(default_factory=TracingConfig)
     
     @property
     def workspace_path(self) -> Path:
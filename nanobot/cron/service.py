@@ -177,6 +177,17 @@ class CronService:
                  if j.enabled and j.state.next_run_at_ms]
         return min(times) if times else None
     
+    def lag_s(self) -> float:
+        """How far the most overdue enabled job is behind its scheduled time (0 if none)."""
+        if not self._store or not self._running:
+            return 0.0
+        now = _now_ms()
+        overdue = [
+            now - j.state.next_run_at_ms for j in self._store.jobs
+            if j.enabled and j.state.next_run_at_ms and j.state.next_run_at_ms < now
+        ]
+        return max(overdue) / 1000 if overdue else 0.0
+    
     def _arm_timer(self) -> None:
         """Schedule the next timer tick."""
         if self._timer_task:
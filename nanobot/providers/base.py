@@ -2,7 +2,7 @@
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, AsyncIterator
 
 
 @dataclass
@@ -28,6 +28,13 @@ class LLMResponse:
         return len(self.tool_calls) > 0
 
 
+@dataclass
+class LLMStreamChunk:
+    """One item of a streamed response: a content delta, or the final response."""
+    delta: str = ""
+    response: LLMResponse | None = None  # Set on the last chunk only (content + tool calls assembled)
+
+
 class LLMProvider(ABC):
     """
     Abstract base class for LLM providers.
@@ -64,6 +71,33 @@ class LLMProvider(ABC):
         """
         pass
     
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """
+        Stream a chat completion.
+        
+        Yields content deltas as they arrive, then exactly one final chunk whose
+        ``response`` holds the full content and assembled tool calls. Providers
+        without native streaming inherit this fallback, which yields the whole
+        reply as a single delta.
+        """
+        response = await self.chat(
+            messages=messages,
+            tools=tools,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        if response.content:
+            yield LLMStreamChunk(delta=response.content)
+        yield LLMStreamChunk(response=response)
+    
     @abstractmethod
     def get_default_model(self) -> str:
         """Get the default model for this provider."""
@@ -0,0 +1,171 @@
+"""Hedged LLM requests: a second upstream races a slow first byte."""
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+from loguru import logger
+
+from nanobot.providers.limiter import Priority, current_priority
+
+
+@dataclass
+class HedgePolicy:
+    """When to hedge and how often."""
+
+    percentile: float = 0.95  # hedge once the primary is slower than this share of its calls
+    min_delay: float = 1.0
+    max_delay: float = 30.0
+    initial_delay: float = 8.0  # used until min_samples latencies were observed
+    min_samples: int = 20
+    window: int = 200  # recent latencies kept per upstream
+    budget: float = 0.05  # max long-run fraction of calls that get a hedge
+    interactive_only: bool = True  # never hedge cron/heartbeat/subagent calls
+
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Rolling window of latencies for one upstream."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> float | None:
+        """Nearest-rank percentile (``q`` in 0..1), or None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = min(len(ordered), max(1, math.ceil(q * len(ordered))))
+        return ordered[rank - 1]
+
+
+class Hedger:
+    """
+    Hedging state shared by every call of one provider.
+
+    The hedge delay for an upstream is the configured percentile of its
+    recent time-to-first-byte, clamped to [min_delay, max_delay], so only
+    the slow tail gets a second request. A credit budget bounds the hedged
+    fraction: each eligible call deposits ``budget`` credits (capped), each
+    hedge spends one.
+    """
+
+    def __init__(self, policy: HedgePolicy | None = None):
+        self.policy = policy or HedgePolicy()
+        self._latency: dict[str, LatencyTracker] = {}
+        self._credits = 1.0  # allow one hedge before the first deposits
+        self._max_credits = max(1.0, self.policy.budget * 100)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def eligible(self) -> bool:
+        """Whether the current call may be hedged (priority check)."""
+        return not self.policy.interactive_only or current_priority() == Priority.INTERACTIVE
+
+    def delay(self, key: str) -> float:
+        """Seconds to wait for the primary's first byte before hedging."""
+        tracker = self._latency.get(key)
+        if tracker is None or len(tracker) < self.policy.min_samples:
+            return self.policy.initial_delay
+        value = tracker.percentile(self.policy.percentile) or self.policy.initial_delay
+        return min(self.policy.max_delay, max(self.policy.min_delay, value))
+
+    def observe(self, key: str, seconds: float) -> None:
+        tracker = self._latency.get(key)
+        if tracker is None:
+            tracker = self._latency[key] = LatencyTracker(self.policy.window)
+        tracker.observe(seconds)
+
+    def record_call(self) -> None:
+        self.calls += 1
+        self._credits = min(self._max_credits, self._credits + self.policy.budget)
+
+    def try_hedge(self) -> bool:
+        """Spend one credit for a hedge if the budget allows."""
+        if self._credits < 1.0:
+            return False
+        self._credits -= 1.0
+        self.hedged += 1
+        return True
+
+    async def race(
+        self,
+        key: str,
+        primary: Callable[[], Awaitable[T]],
+        secondary: Callable[[], Awaitable[T]],
+        discard: Callable[[T, bool], Awaitable[None]] | None = None,
+    ) -> tuple[T, bool]:
+        """
+        Run ``primary``, hedging with ``secondary`` if it is slow.
+
+        If the primary has not completed after :meth:`delay` and the budget
+        allows, the secondary is started and the first successful result
+        wins; the other request is cancelled. A primary that fails before the
+        delay is not hedged (the caller's retry/fallback logic handles it).
+
+        Args:
+            key: Upstream the primary goes to (latency is tracked per key).
+            primary: Factory for the primary request.
+            secondary: Factory for the hedge request.
+            discard: Cleanup for a losing request that completed anyway,
+                called with (result, whether it was the secondary).
+
+        Returns:
+            (result, True if the secondary won).
+
+        Raises:
+            The primary's exception if no request succeeded.
+        """
+        self.record_call()
+        delay = self.delay(key)
+        start = time.monotonic()
+        tasks = [asyncio.create_task(primary())]
+        winner: asyncio.Task | None = None
+        try:
+            await asyncio.wait(tasks, timeout=delay)
+            if not tasks[0].done() and self.try_hedge():
+                logger.info(f"LLM hedge: no response from {key} after {delay:.1f}s, sending a second request")
+                tasks.append(asyncio.create_task(secondary()))
+
+            pending = set(tasks)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in tasks if t in done and t.exception() is None), None)
+
+            if winner is None:
+                raise tasks[0].exception()
+            # When the hedge wins, the primary took at least this long
+            self.observe(key, time.monotonic() - start)
+            hedge_won = winner is not tasks[0]
+            if hedge_won:
+                self.hedge_wins += 1
+            return winner.result(), hedge_won
+        finally:
+            losers = [t for t in tasks if t is not winner]
+            for task in losers:
+                task.cancel()
+            results = await asyncio.gather(*losers, return_exceptions=True)
+            if discard:
+                for task, result in zip(losers, results):
+                    if not isinstance(result, BaseException):
+                        await discard(result, task is not tasks[0])
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedged_fraction": round(self.hedged / self.calls, 4) if self.calls else 0.0,
+        }
@@ -0,0 +1,231 @@
+"""Shared LLM concurrency and rate limiter with request priorities."""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import AsyncIterator, Iterator
+
+from loguru import logger
+
+
+class Priority(IntEnum):
+    """Lower value is served first."""
+
+    INTERACTIVE = 0  # user turns
+    BACKGROUND = 1  # cron, heartbeat, subagents, summaries
+
+
+_priority: ContextVar[Priority] = ContextVar("nanobot_llm_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(level: Priority) -> Iterator[None]:
+    """Run LLM calls made inside the block (and tasks spawned from it) at ``level``."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+@dataclass
+class ModelLimits:
+    """Limits for one model; 0 disables a limit."""
+
+    max_concurrency: int = 0
+    rpm: int = 0  # requests per minute
+    tpm: int = 0  # tokens per minute
+
+
+class TokenBucket:
+    """Continuous-refill bucket holding up to one minute of capacity."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken (requests larger than the bucket wait for a full one)."""
+        self._refill()
+        need = min(amount, self.capacity)
+        return 0.0 if self.tokens >= need else (need - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the fact; may go into debt."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class _ModelState:
+    """Concurrency slots, buckets and the priority queue for one model."""
+
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self.in_flight = 0
+        self.rpm = TokenBucket(limits.rpm) if limits.rpm else None
+        self.tpm = TokenBucket(limits.tpm) if limits.tpm else None
+        self.waiters: list[_Waiter] = []
+        self.timer: asyncio.TimerHandle | None = None
+
+    def wait_time(self, tokens: int) -> float | None:
+        """0 if a request can start now, seconds to wait for buckets, None if no slot is free."""
+        if self.limits.max_concurrency and self.in_flight >= self.limits.max_concurrency:
+            return None
+        wait = 0.0
+        if self.rpm:
+            wait = max(wait, self.rpm.wait_time(1))
+        if self.tpm:
+            wait = max(wait, self.tpm.wait_time(tokens))
+        return wait
+
+    def admit(self, tokens: int) -> None:
+        self.in_flight += 1
+        if self.rpm:
+            self.rpm.take(1)
+        if self.tpm:
+            self.tpm.take(tokens)
+
+
+class Reservation:
+    """Handle for an admitted request; report actual usage with :meth:`reconcile`."""
+
+    def __init__(self, state: _ModelState, estimated: int):
+        self._state = state
+        self.estimated = estimated
+
+    def reconcile(self, actual_tokens: int) -> None:
+        """Correct the TPM bucket by the difference between actual and estimated tokens."""
+        if self._state.tpm and actual_tokens:
+            self._state.tpm.adjust(actual_tokens - self.estimated)
+            self.estimated = actual_tokens
+
+
+class LLMLimiter:
+    """
+    Process-wide limiter for LLM requests, shared by all provider instances.
+
+    Each model gets a concurrency cap plus requests-per-minute and
+    tokens-per-minute buckets. Requests are admitted strictly in (priority,
+    arrival) order per model, so queued interactive turns always start
+    before queued background work. Token counts are estimated before the
+    call and reconciled with the reported usage afterwards.
+    """
+
+    def __init__(self, default: ModelLimits | None = None, models: dict[str, ModelLimits] | None = None):
+        self.default = default or ModelLimits()
+        self.models = models or {}
+        self._states: dict[str, _ModelState] = {}
+        self._seq = itertools.count()
+
+    def _limits_for(self, model: str) -> ModelLimits:
+        """Most specific configured entry whose key is a substring of the model."""
+        model_lower = model.lower()
+        matches = [key for key in self.models if key.lower() in model_lower]
+        return self.models[max(matches, key=len)] if matches else self.default
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._states.get(model)
+        if state is None:
+            state = self._states[model] = _ModelState(self._limits_for(model))
+        return state
+
+    @asynccontextmanager
+    async def acquire(
+        self, model: str, estimated_tokens: int, priority: Priority | None = None
+    ) -> AsyncIterator[Reservation]:
+        """
+        Wait for capacity to send one request to ``model``.
+
+        Args:
+            model: Resolved model name.
+            estimated_tokens: Prompt plus expected completion tokens.
+            priority: Defaults to the priority bound with :func:`llm_priority`.
+
+        Yields:
+            A Reservation; call ``reconcile(actual_tokens)`` once usage is known.
+        """
+        state = self._state(model)
+        level = current_priority() if priority is None else priority
+        waiter = _Waiter(int(level), next(self._seq), estimated_tokens, asyncio.get_running_loop().create_future())
+        heapq.heappush(state.waiters, waiter)
+        self._pump(state)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(state)  # admitted just as we were cancelled
+            elif waiter in state.waiters:
+                state.waiters.remove(waiter)
+                heapq.heapify(state.waiters)
+                self._pump(state)
+            raise
+        try:
+            yield Reservation(state, estimated_tokens)
+        finally:
+            self._release(state)
+
+    def _release(self, state: _ModelState) -> None:
+        state.in_flight -= 1
+        self._pump(state)
+
+    def _pump(self, state: _ModelState) -> None:
+        """Admit queued requests from the head while capacity allows."""
+        if state.timer:
+            state.timer.cancel()
+            state.timer = None
+        while state.waiters:
+            head = state.waiters[0]
+            if head.future.done():
+                heapq.heappop(state.waiters)
+                continue
+            wait = state.wait_time(head.tokens)
+            if wait is None:
+                return  # a release will pump again
+            if wait > 0:
+                if head.priority > Priority.INTERACTIVE:
+                    logger.debug(f"LLM limiter: background request waits {wait:.1f}s for rate budget")
+                state.timer = asyncio.get_running_loop().call_later(wait, self._pump, state)
+                return
+            heapq.heappop(state.waiters)
+            state.admit(head.tokens)
+            head.future.set_result(None)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Per-model in-flight and queued counts plus remaining bucket capacity."""
+        out = {}
+        for model, state in self._states.items():
+            entry: dict[str, float] = {"in_flight": state.in_flight, "queued": len(state.waiters)}
+            if state.rpm:
+                entry["rpm_available"] = round(state.rpm.tokens, 1)
+            if state.tpm:
+                entry["tpm_available"] = round(state.tpm.tokens)
+            out[model] = entry
+        return out
@@ -1,14 +1,40 @@
 """LiteLLM provider implementation for multi-provider support."""
 
+import asyncio
 import json
 import os
-from typing import Any
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator
 
 import litellm
 from litellm import acompletion
+from loguru import logger
 
-from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamChunk, ToolCallRequest
+from nanobot.providers.hedging import Hedger
+from nanobot.providers.limiter import LLMLimiter, Reservation
 from nanobot.providers.registry import find_by_model, find_gateway
+from nanobot.providers.resilience import CircuitBreaker, RetryPolicy, is_client_error, is_retryable
+from nanobot.providers.response_cache import ResponseCache, cache_requested
+from nanobot.utils.tokens import estimate_message_tokens, estimate_tools_tokens
+
+
+@dataclass
+class _OpenedStream:
+    """A streaming response whose first chunk has arrived."""
+
+    kwargs: dict[str, Any]
+    stack: AsyncExitStack  # holds the limiter reservation and the connection
+    reservation: Reservation | None
+    rest: AsyncIterator[Any]
+    first: Any | None
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        if self.first is not None:
+            yield self.first
+        async for chunk in self.rest:
+            yield chunk
 
 
 class LiteLLMProvider(LLMProvider):
@@ -18,6 +44,22 @@ class LiteLLMProvider(LLMProvider):
     Supports OpenRouter, Anthropic, OpenAI, Gemini, MiniMax, and many other providers through
     a unified interface.  Provider-specific logic is driven by the registry
     (see providers/registry.py) — no if-elif chains needed here.
+    
+    Transient upstream errors (429, 5xx, timeouts) are retried with jittered
+    exponential backoff honoring ``Retry-After``. If an upstream still fails,
+    the request moves down the fallback chain (see :meth:`add_fallback`);
+    each upstream has a circuit breaker that skips it for a cooldown after
+    repeated failures.
+    
+    An optional shared :class:`LLMLimiter` gates every attempt by per-model
+    concurrency and RPM/TPM budgets, serving interactive turns first.
+    
+    With a :class:`ResponseCache`, temperature-0 calls (or calls inside
+    ``llm_cache()``) are answered from an exact-match on-disk cache.
+    
+    With a :class:`Hedger` (see :meth:`set_hedge`), a first attempt whose
+    first byte is slower than the upstream's usual tail latency is raced
+    against a second upstream, within a budget on the hedged fraction.
     """
     
     def __init__(
@@ -27,11 +69,26 @@ class LiteLLMProvider(LLMProvider):
         default_model: str = "anthropic/claude-opus-4-5",
         extra_headers: dict[str, str] | None = None,
         provider_name: str | None = None,
+        retry: RetryPolicy | None = None,
+        breaker_failures: int = 3,
+        breaker_cooldown_s: float = 60.0,
+        limiter: LLMLimiter | None = None,
+        response_cache: ResponseCache | None = None,
     ):
         super().__init__(api_key, api_base)
         self.default_model = default_model
         self.extra_headers = extra_headers or {}
         self._provider_name = provider_name
+        self.retry = retry or RetryPolicy()
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown_s = breaker_cooldown_s
+        # Ordered (provider, model) upstreams tried after the primary
+        self.fallbacks: list[tuple["LiteLLMProvider", str]] = []
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.limiter = limiter
+        self.response_cache = response_cache
+        self.hedger: Hedger | None = None
+        self._hedge_target: tuple["LiteLLMProvider", str | None] | None = None
         
         # Detect gateway / local deployment.
         # provider_name (from config key) is the primary signal;
@@ -42,8 +99,8 @@ class LiteLLMProvider(LLMProvider):
         if api_key:
             self._setup_env(api_key, api_base, default_model)
         
-        if api_base:
-            litellm.api_base = api_base
+        # api_base is passed per call (see _build_kwargs) rather than set on
+        # the litellm module, so fallback providers can use other endpoints.
         
         # Disable LiteLLM logging noise
         litellm.suppress_debug_info = True
@@ -117,29 +174,55 @@ class LiteLLMProvider(LLMProvider):
                     kwargs.update(overrides)
                     return
     
-    async def chat(
-        self,
-        messages: list[dict[str, Any]],
-        tools: list[dict[str, Any]] | None = None,
-        model: str | None = None,
-        max_tokens: int = 4096,
-        temperature: float = 0.7,
-    ) -> LLMResponse:
+    def _supports_cache_control(self, model: str) -> bool:
+        """Whether cache_control breakpoints reach a provider that honors them."""
+        spec = find_by_model(model)
+        if not (spec and spec.supports_prompt_caching):
+            return False
+        return self._gateway is None or self._gateway.supports_prompt_caching
+
+    @staticmethod
+    def _apply_cache_control(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """
-        Send a chat completion request via LiteLLM.
-        
-        Args:
-            messages: List of message dicts with 'role' and 'content'.
-            tools: Optional list of tool definitions in OpenAI format.
-            model: Model identifier (e.g., 'anthropic/claude-sonnet-4-5').
-            max_tokens: Maximum tokens in response.
-            temperature: Sampling temperature.
+        Mark prompt-cache breakpoints (Anthropic-style ``cache_control``).
         
-        Returns:
-            LLMResponse with content and/or tool calls.
+        Breakpoints go on the system prompt (which also covers the tool
+        definitions placed before it) and on the latest user message, so the
+        static prefix is shared across all chats and the conversation prefix
+        is reused across tool iterations of one turn. Input is not mutated.
         """
-        model = self._resolve_model(model or self.default_model)
-        
+        marker = {"type": "ephemeral"}
+
+        def mark(msg: dict[str, Any]) -> dict[str, Any]:
+            content = msg.get("content")
+            if isinstance(content, str):
+                if not content:
+                    return msg
+                blocks = [{"type": "text", "text": content, "cache_control": marker}]
+            elif isinstance(content, list) and content:
+                blocks = content[:-1] + [{**content[-1], "cache_control": marker}]
+            else:
+                return msg
+            return {**msg, "content": blocks}
+
+        out = list(messages)
+        if out and out[0].get("role") == "system":
+            out[0] = mark(out[0])
+        for i in range(len(out) - 1, 0, -1):
+            if out[i].get("role") == "user":
+                out[i] = mark(out[i])
+                break
+        return out
+
+    def _build_kwargs(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> dict[str, Any]:
+        """Assemble acompletion() arguments for an already-resolved model."""
         kwargs: dict[str, Any] = {
             "model": model,
             "messages": messages,
@@ -162,20 +245,345 @@ class LiteLLMProvider(LLMProvider):
         if self.extra_headers:
             kwargs["extra_headers"] = self.extra_headers
         
+        if self._supports_cache_control(model):
+            kwargs["messages"] = self._apply_cache_control(messages)
+        
         if tools:
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
+        return kwargs
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        """
+        Send a chat completion request via LiteLLM.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'.
+            tools: Optional list of tool definitions in OpenAI format.
+            model: Model identifier (e.g., 'anthropic/claude-sonnet-4-5').
+            max_tokens: Maximum tokens in response.
+            temperature: Sampling temperature.
+        
+        Returns:
+            LLMResponse with content and/or tool calls.
+        """
+        model = model or self.default_model
+        cache_key = None
+        if self.response_cache is not None and cache_requested(temperature):
+            cache_key = ResponseCache.make_key(model, messages, tools, temperature, max_tokens)
+            hit = await asyncio.to_thread(self.response_cache.get, cache_key)
+            if hit:
+                cached, cached_model, saved = hit
+                self._record_cache_hit(cached, cached_model, saved)
+                return cached
+        
+        last_error: BaseException | None = None
+        primary = self._resolve_model(model)
+        for provider, resolved, breaker in self._iter_upstreams(model):
+            kwargs = provider._build_kwargs(messages, tools, resolved, max_tokens, temperature)
+            try:
+                if provider is self and resolved == primary and self._hedging():
+                    response, resolved = await self._hedged_call(kwargs, messages, tools, model, max_tokens, temperature)
+                else:
+                    response = await self._call_with_retries(kwargs)
+            except Exception as e:
+                self._record_failure(breaker, resolved, e)
+                last_error = e
+                continue
+            except BaseException:
+                # Cancelled: no outcome, but don't leave a half-open probe held
+                breaker.release()
+                raise
+            if resolved == kwargs["model"]:
+                breaker.record_success()
+            else:
+                # The hedge answered first: nothing learned about the primary
+                breaker.release()
+            cost = self._record_usage(response, resolved, need_cost=bool(cache_key))
+            parsed = self._parse_response(response)
+            if cache_key and parsed.finish_reason != "error":
+                await asyncio.to_thread(self.response_cache.put, cache_key, parsed, resolved, cost)
+            return parsed
+        
+        # Return error as content for graceful handling
+        return LLMResponse(
+            content=f"Error calling LLM: {str(last_error)}",
+            finish_reason="error",
+        )
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        """
+        Stream a chat completion via LiteLLM.
+        
+        Content deltas are yielded as they arrive; the raw chunks are then
+        reassembled with ``litellm.stream_chunk_builder`` so tool calls, usage
+        and cost come out exactly as in :meth:`chat`. Retries and fallbacks
+        apply until the first delta has been yielded; a stream that breaks
+        after that ends with an error response.
+        """
+        model = model or self.default_model
+        last_error: BaseException | None = None
+        emitted = False
+        primary = self._resolve_model(model)
+        for provider, resolved, breaker in self._iter_upstreams(model):
+            kwargs = provider._build_kwargs(messages, tools, resolved, max_tokens, temperature)
+            kwargs["stream"] = True
+            kwargs["stream_options"] = {"include_usage": True}
+            attempt = 0
+            while True:
+                try:
+                    if attempt == 0 and provider is self and resolved == primary and self._hedging():
+                        opened = await self._hedged_stream(kwargs, messages, tools, model, max_tokens, temperature)
+                    else:
+                        opened = await self._open_stream(kwargs)
+                    async with opened.stack:
+                        chunks = []
+                        async for chunk in opened:
+                            chunks.append(chunk)
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            if delta:
+                                emitted = True
+                                yield LLMStreamChunk(delta=delta)
+                        response = litellm.stream_chunk_builder(chunks, messages=opened.kwargs["messages"])
+                        self._reconcile(opened.reservation, response)
+                    final = self._parse_response(response)
+                except Exception as e:
+                    last_error = e
+                    attempt += 1
+                    delay = None if emitted or not is_retryable(e) else self.retry.delay(attempt, e)
+                    if delay is not None:
+                        self._log_retry(resolved, attempt, delay, e)
+                        await asyncio.sleep(delay)
+                        continue
+                    self._record_failure(breaker, resolved, e)
+                    break
+                except BaseException:
+                    # Cancelled or closed by the consumer mid-stream
+                    breaker.release()
+                    raise
+                if opened.kwargs is kwargs:
+                    breaker.record_success()
+                else:
+                    breaker.release()
+                self._record_usage(response, opened.kwargs["model"])
+                yield LLMStreamChunk(response=final)
+                return
+            if emitted:
+                break
+        
+        yield LLMStreamChunk(response=LLMResponse(
+            content=f"Error calling LLM: {str(last_error)}",
+            finish_reason="error",
+        ))
+
+    def add_fallback(self, model: str, provider: "LiteLLMProvider | None" = None) -> None:
+        """
+        Append an upstream to the fallback chain.
         
+        Args:
+            model: Model to request from that upstream.
+            provider: Provider (API key / endpoint) to use; defaults to this one.
+        """
+        self.fallbacks.append((provider or self, model))
+
+    def set_hedge(
+        self,
+        hedger: Hedger,
+        provider: "LiteLLMProvider | None" = None,
+        model: str | None = None,
+    ) -> None:
+        """
+        Enable hedged requests for the primary model.
+        
+        Args:
+            hedger: Delay, budget and latency state.
+            provider: Upstream for the hedge request; defaults to this one
+                (a fresh connection to the same upstream).
+            model: Model to request from it; defaults to the requested model.
+        """
+        self.hedger = hedger
+        self._hedge_target = (provider or self, model)
+
+    def _hedging(self) -> bool:
+        return self.hedger is not None and self.hedger.eligible()
+
+    def _hedge_kwargs(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> dict[str, Any]:
+        """acompletion() arguments for the hedge request."""
+        provider, hedge_model = self._hedge_target
+        resolved = provider._resolve_model(hedge_model or model)
+        return provider._build_kwargs(messages, tools, resolved, max_tokens, temperature)
+
+    async def _hedged_call(
+        self,
+        kwargs: dict[str, Any],
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> tuple[Any, str]:
+        """Race a non-streaming call against the hedge upstream. Returns (response, model used)."""
+        alt = self._hedge_kwargs(messages, tools, model, max_tokens, temperature)
+
+        async def discard(response: Any, secondary: bool) -> None:
+            # Both finished: the loser was billed too
+            self._record_usage(response, (alt if secondary else kwargs)["model"])
+
+        response, hedge_won = await self.hedger.race(
+            kwargs["model"],
+            lambda: self._call_with_retries(kwargs),
+            lambda: self._call_with_retries(alt),
+            discard,
+        )
+        return response, (alt if hedge_won else kwargs)["model"]
+
+    async def _hedged_stream(
+        self,
+        kwargs: dict[str, Any],
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> _OpenedStream:
+        """Race the first chunk of a stream against the hedge upstream."""
+        alt = self._hedge_kwargs(messages, tools, model, max_tokens, temperature)
+        alt["stream"] = True
+        alt["stream_options"] = kwargs["stream_options"]
+
+        async def discard(opened: _OpenedStream, secondary: bool) -> None:
+            await opened.stack.aclose()
+
+        opened, _ = await self.hedger.race(
+            f"{kwargs['model']} (stream)",
+            lambda: self._open_stream(kwargs),
+            lambda: self._open_stream(alt),
+            discard,
+        )
+        return opened
+
+    async def _open_stream(self, kwargs: dict[str, Any]) -> _OpenedStream:
+        """Send a streaming request and wait for its first chunk."""
+        stack = AsyncExitStack()
         try:
-            response = await acompletion(**kwargs)
-            self._record_usage(response, model)
-            return self._parse_response(response)
-        except Exception as e:
-            # Return error as content for graceful handling
-            return LLMResponse(
-                content=f"Error calling LLM: {str(e)}",
-                finish_reason="error",
-            )
+            reservation = await stack.enter_async_context(self._limited(kwargs))
+            stream = await acompletion(**kwargs)
+            if hasattr(stream, "aclose"):
+                stack.push_async_callback(stream.aclose)
+            rest = stream.__aiter__()
+            try:
+                first = await rest.__anext__()
+            except StopAsyncIteration:
+                first = None
+        except BaseException:
+            await stack.aclose()
+            raise
+        return _OpenedStream(kwargs, stack, reservation, rest, first)
+
+    def _iter_upstreams(self, model: str) -> Iterator[tuple["LiteLLMProvider", str, CircuitBreaker]]:
+        """
+        Yield (provider, resolved model, breaker) in fallback order.
+        
+        Upstreams whose breaker is open are skipped. Breakers are consulted
+        lazily, right before each attempt. If every upstream is cooling down
+        the primary is tried anyway rather than failing without a request.
+        """
+        chain = [(self, model)] + self.fallbacks
+        tried = False
+        first = None
+        for provider, upstream_model in chain:
+            resolved = provider._resolve_model(upstream_model)
+            key = f"{provider.api_base or provider._provider_name or ''}|{resolved}"
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(
+                    failure_threshold=self.breaker_failures, cooldown_s=self.breaker_cooldown_s
+                )
+            if first is None:
+                first = (provider, resolved, breaker)
+            if not breaker.allow():
+                logger.debug(f"LLM upstream {resolved} is cooling down, skipping")
+                continue
+            tried = True
+            yield provider, resolved, breaker
+        if not tried and first is not None:
+            logger.warning(f"All LLM upstreams are cooling down; trying {first[1]} anyway")
+            yield first
+
+    async def _call_with_retries(self, kwargs: dict[str, Any]) -> Any:
+        """Call acompletion, retrying transient errors with backoff."""
+        attempt = 0
+        while True:
+            try:
+                async with self._limited(kwargs) as reservation:
+                    response = await acompletion(**kwargs)
+                    self._reconcile(reservation, response)
+                    return response
+            except Exception as e:
+                attempt += 1
+                delay = self.retry.delay(attempt, e) if is_retryable(e) else None
+                if delay is None:
+                    raise
+                self._log_retry(kwargs["model"], attempt, delay, e)
+                await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def _limited(self, kwargs: dict[str, Any]) -> AsyncIterator[Reservation | None]:
+        """Hold a limiter reservation for one request attempt (no-op without a limiter)."""
+        if self.limiter is None:
+            yield None
+            return
+        model = kwargs["model"]
+        # Prompt estimate plus a bounded completion allowance; corrected by _reconcile
+        estimate = sum(estimate_message_tokens(m, model) for m in kwargs["messages"])
+        estimate += estimate_tools_tokens(kwargs.get("tools"), model)
+        estimate += min(kwargs.get("max_tokens") or 0, 1024)
+        async with self.limiter.acquire(model, estimate) as reservation:
+            yield reservation
+
+    @staticmethod
+    def _reconcile(reservation: Reservation | None, response: Any) -> None:
+        usage = getattr(response, "usage", None)
+        if reservation and usage:
+            reservation.reconcile(getattr(usage, "total_tokens", 0) or 0)
+
+    @staticmethod
+    def _log_retry(model: str, attempt: int, delay: float, error: BaseException) -> None:
+        logger.warning(f"LLM call to {model} failed ({type(error).__name__}); retry {attempt} in {delay:.1f}s")
+
+    @staticmethod
+    def _record_failure(breaker: CircuitBreaker, model: str, error: BaseException) -> None:
+        """Update an upstream's breaker after its retries are exhausted."""
+        if is_client_error(error):
+            # The upstream answered; the request itself was rejected
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        logger.warning(
+            f"LLM upstream {model} failed: {str(error)[:200]}"
+            + (" (circuit open)" if breaker.is_open else "")
+        )
 
     # Fallback pricing table (USD per 1M tokens) for models where LiteLLM
     # cannot compute cost automatically (e.g. via OpenRouter gateway).
@@ -231,33 +639,62 @@ class LiteLLMProvider(LLMProvider):
                     return (prompt_tokens * in_price + completion_tokens * out_price) / 1_000_000
         return 0.0
 
-    def _record_usage(self, response: Any, model: str) -> None:
-        """Record token usage and cost to ~/.nanobot/usage.jsonl."""
+    def _cost(self, response: Any, model: str) -> float:
+        """Cost of a completion, from LiteLLM's price map or the fallback table."""
+        cost = 0.0
+        try:
+            cost = litellm.completion_cost(completion_response=response) or 0.0
+        except Exception:
+            pass
+        # Fallback: estimate from price table when LiteLLM returns 0
+        if cost == 0.0:
+            cost = self._estimate_cost(
+                model,
+                response.usage.prompt_tokens or 0,
+                response.usage.completion_tokens or 0,
+            )
+        return cost
+
+    def _record_usage(self, response: Any, model: str, need_cost: bool = False) -> float:
+        """Record token usage and cost to ~/.nanobot/usage.jsonl.
+
+        The cost lookup is deferred to the usage writer thread unless
+        ``need_cost`` is set, in which case it is computed here and returned
+        (otherwise 0.0 is returned).
+        """
+        cost = 0.0
         try:
             usage = getattr(response, "usage", None)
             if not usage:
-                return
-            cost = 0.0
-            try:
-                cost = litellm.completion_cost(completion_response=response) or 0.0
-            except Exception:
-                pass
-            # Fallback: estimate from price table when LiteLLM returns 0
-            if cost == 0.0:
-                cost = self._estimate_cost(
-                    model,
-                    usage.prompt_tokens or 0,
-                    usage.completion_tokens or 0,
-                )
+                return cost
+            if need_cost:
+                cost = self._cost(response, model)
             from nanobot.agent.usage import record
             record(
                 model=model,
                 prompt_tokens=usage.prompt_tokens or 0,
                 completion_tokens=usage.completion_tokens or 0,
-                cost_usd=cost,
+                cost_usd=cost if need_cost else (lambda: self._cost(response, model)),
             )
         except Exception:
             pass  # never crash the main flow
+        return cost
+
+    @staticmethod
+    def _record_cache_hit(response: LLMResponse, model: str, saved: float) -> None:
+        """Record a cache hit at zero cost, with the cost it saved."""
+        try:
+            from nanobot.agent.usage import record
+            record(
+                model=model,
+                prompt_tokens=response.usage.get("prompt_tokens", 0),
+                completion_tokens=response.usage.get("completion_tokens", 0),
+                cost_usd=0.0,
+                cached=True,
+                saved_usd=saved,
+            )
+        except Exception:
+            pass
 
     def _parse_response(self, response: Any) -> LLMResponse:
         """Parse LiteLLM response into our standard format."""
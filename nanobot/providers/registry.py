@@ -13,7 +13,7 @@ Every entry writes out all fields so you can copy-paste as a template.
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Iterable
 
 
 @dataclass(frozen=True)
@@ -48,6 +48,10 @@ class ProviderSpec:
     # gateway behavior
     strip_model_prefix: bool = False         # strip "provider/" before re-prefixing
 
+    # prompt caching: accepts Anthropic-style "cache_control" breakpoints.
+    # For gateways this means "passes them through" to a provider that does.
+    supports_prompt_caching: bool = False
+
     # per-model param overrides, e.g. (("kimi-k2.5", {"temperature": 1.0}),)
     model_overrides: tuple[tuple[str, dict[str, Any]], ...] = ()
 
@@ -80,6 +84,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="openrouter",
         default_api_base="https://openrouter.ai/api/v1",
         strip_model_prefix=False,
+        supports_prompt_caching=True,
         model_overrides=(),
     ),
 
@@ -100,6 +105,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="aihubmix",
         default_api_base="https://aihubmix.com/v1",
         strip_model_prefix=True,            # anthropic/claude-3 → claude-3 → openai/claude-3
+        supports_prompt_caching=False,
         model_overrides=(),
     ),
 
@@ -120,6 +126,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        supports_prompt_caching=True,
         model_overrides=(),
     ),
 
@@ -138,6 +145,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        supports_prompt_caching=False,
         model_overrides=(),
     ),
 
@@ -156,6 +164,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        supports_prompt_caching=False,
         model_overrides=(),
     ),
 
@@ -174,6 +183,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        supports_prompt_caching=False,
         model_overrides=(),
     ),
 
@@ -196,6 +206,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        supports_prompt_caching=False,
         model_overrides=(),
     ),
 
@@ -214,6 +225,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        supports_prompt_caching=False,
         model_overrides=(),
     ),
 
@@ -236,6 +248,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="https://api.moonshot.ai/v1",   # intl; use api.moonshot.cn for China
         strip_model_prefix=False,
+        supports_prompt_caching=False,
         model_overrides=(
             ("kimi-k2.5", {"temperature": 1.0}),
         ),
@@ -257,6 +270,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="https://api.minimax.io/v1",
         strip_model_prefix=False,
+        supports_prompt_caching=False,
         model_overrides=(),
     ),
 
@@ -278,6 +292,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",                # user must provide in config
         strip_model_prefix=False,
+        supports_prompt_caching=False,
         model_overrides=(),
     ),
 
@@ -299,6 +314,7 @@ PROVIDERS: tuple[ProviderSpec, ...] = (
         detect_by_base_keyword="",
         default_api_base="",
         strip_model_prefix=False,
+        supports_prompt_caching=False,
         model_overrides=(),
     ),
 )
@@ -357,3 +373,45 @@ def find_by_name(name: str) -> ProviderSpec | None:
         if spec.name == name:
             return spec
     return None
+
+
+def find_hedge_partner(
+    model: str,
+    primary: str | None,
+    available: Iterable[str],
+) -> tuple[ProviderSpec, str] | None:
+    """Pick a second route to the same model for hedged requests.
+
+    A gateway primary pairs with the direct provider that serves the model
+    (OpenRouter's "anthropic/claude-..." with Anthropic); a direct primary
+    pairs with the first available gateway. Local deployments never pair.
+
+    Args:
+        model: Model requested from the primary.
+        primary: Registry name of the primary provider.
+        available: Names of providers that have credentials configured.
+
+    Returns:
+        (partner spec, model name to request from it), or None.
+    """
+    available = set(available)
+    primary_spec = find_by_name(primary) if primary else None
+    if primary_spec and primary_spec.is_local:
+        return None
+
+    if primary_spec and primary_spec.is_gateway:
+        # Gateway model ids carry vendor prefixes; direct providers want the bare id
+        bare = model.split("/")[-1]
+        direct = find_by_model(bare) or find_by_model(model)
+        if direct and direct.name in available and direct.name != primary:
+            return direct, bare
+        return None
+
+    direct = primary_spec or find_by_model(model)
+    for spec in PROVIDERS:
+        if spec.is_gateway and spec.name in available:
+            # Gateways route by "vendor/model"
+            if "/" not in model and direct:
+                return spec, f"{direct.name}/{model}"
+            return spec, model
+    return None
@@ -0,0 +1,337 @@
+"""Offline LLM providers: record real traffic, replay it or a script without a network."""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from loguru import logger
+
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamChunk, ToolCallRequest
+from nanobot.utils.helpers import strip_runtime_time
+from nanobot.utils.tokens import estimate_message_tokens, estimate_tokens
+
+
+def request_key(messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None) -> str:
+    """
+    Hash of a request's messages and tool names, used to match recordings.
+
+    The runtime context's clock line is left out, so a recording still
+    matches when replayed at another time.
+    """
+    payload = json.dumps(
+        {"messages": strip_runtime_time(messages), "tools": sorted(t.get("function", {}).get("name", "") for t in tools or [])},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _last_user_text(messages: list[dict[str, Any]]) -> str:
+    for m in reversed(messages):
+        if m.get("role") == "user":
+            content = m.get("content")
+            if isinstance(content, list):
+                return " ".join(b.get("text", "") for b in content if b.get("type") == "text")
+            return content or ""
+    return ""
+
+
+def _turn_step(messages: list[dict[str, Any]]) -> int:
+    """How many assistant replies the current turn already has (0 = first call of the turn)."""
+    step = 0
+    for m in reversed(messages):
+        role = m.get("role")
+        if role == "user":
+            break
+        if role == "assistant":
+            step += 1
+    return step
+
+
+@dataclass
+class Latency:
+    """
+    Simulated response latency.
+
+    ``kind`` selects how the time to first token is drawn from ``value``
+    and ``spread``:
+      constant     — always ``value``
+      uniform      — uniform in [value - spread, value + spread]
+      lognormal    — median ``value``, log-space sigma ``spread`` (long right tail)
+      exponential  — mean ``value``
+    Streamed replies then advance at ``per_token`` seconds per token.
+    """
+
+    kind: str = "constant"
+    value: float = 0.0
+    spread: float = 0.0
+    per_token: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a time to first token in seconds."""
+        if self.kind == "constant":
+            return self.value
+        if self.kind == "uniform":
+            return max(0.0, rng.uniform(self.value - self.spread, self.value + self.spread))
+        if self.kind == "lognormal":
+            return self.value * rng.lognormvariate(0.0, self.spread) if self.value else 0.0
+        if self.kind == "exponential":
+            return rng.expovariate(1.0 / self.value) if self.value else 0.0
+        raise ValueError(f"Unknown latency distribution: {self.kind}")
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """
+        Parse ``kind:value[,spread[,per_token]]``, e.g. ``lognormal:0.8,0.5``.
+
+        A bare number is a constant latency.
+        """
+        kind, _, params = spec.partition(":")
+        if not params:
+            return cls(value=float(kind))
+        values = [float(v) for v in params.split(",")]
+        return cls(kind, *values)
+
+
+def load_recordings(path: Path) -> list[dict[str, Any]]:
+    """Read a JSONL file written by :class:`RecordingProvider`."""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
+
+
+def load_replay_provider(path: Path, latency: Latency | None = None, seed: int | None = None) -> "ReplayProvider":
+    """
+    Build a ReplayProvider from a file.
+
+    Args:
+        path: A ``.jsonl`` recording, or a ``.json`` script — either a list
+            of steps or ``{"script": [...], "model": ...}``.
+        latency: Latency override.
+        seed: Seed for latency sampling.
+    """
+    if path.suffix == ".jsonl":
+        return ReplayProvider(recordings=load_recordings(path), latency=latency, seed=seed)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(data, list):
+        data = {"script": data}
+    return ReplayProvider(
+        script=data["script"],
+        latency=latency,
+        default_model=data.get("model", "replay/offline"),
+        seed=seed,
+    )
+
+
+class ReplayProvider(LLMProvider):
+    """
+    LLM provider that never touches the network.
+
+    Responses come from, in order of preference:
+      1. recordings whose request hash matches exactly;
+      2. a script — a list of steps served by position within the turn
+         (the first call of a turn gets step 0, the call after its tool
+         results step 1, ...), so concurrent sessions replay the same
+         tool-call sequence independently;
+      3. the remaining recordings, cycled in recorded order.
+
+    A script step is a dict with ``content`` and/or ``tool_calls``
+    (``[{"name": ..., "arguments": {...}}]``); ``{user}`` in content is
+    replaced by the current user message. Steps past the end of the script
+    repeat the last one.
+
+    Latency is drawn from ``latency`` when given, otherwise recordings keep
+    their recorded latency and script steps answer immediately. Usage is
+    estimated so token accounting and the limiter behave as with a live model.
+    """
+
+    def __init__(
+        self,
+        recordings: list[dict[str, Any]] | None = None,
+        script: list[dict[str, Any]] | None = None,
+        latency: Latency | None = None,
+        default_model: str = "replay/offline",
+        seed: int | None = None,
+    ):
+        super().__init__()
+        self.default_model = default_model
+        self.latency = latency
+        self.script = script or ([] if recordings else [{"content": "OK"}])
+        self._by_key = {e["key"]: e for e in recordings or [] if e.get("key")}
+        self._cycle = itertools.cycle(recordings) if recordings else None
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self.calls = 0
+
+    def _pick(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None) -> tuple[LLMResponse, float, float]:
+        """Choose a response. Returns (response, first-token latency, per-token pace)."""
+        per_token = self.latency.per_token if self.latency else 0.0
+        recorded = self._by_key.get(request_key(messages, tools)) if self._by_key else None
+        if recorded is None and not self.script and self._cycle:
+            recorded = next(self._cycle)
+        if recorded is not None:
+            data = dict(recorded["response"])
+            data["tool_calls"] = [ToolCallRequest(**tc) for tc in data.get("tool_calls", [])]
+            if self.latency:
+                return LLMResponse(**data), self.latency.sample(self._rng), per_token
+            # Recorded pace: first token, then the rest spread over the completion
+            delay = recorded.get("first_token_s", 0.0)
+            completion = (data.get("usage") or {}).get("completion_tokens") or 0
+            remaining = max(0.0, recorded.get("total_s", delay) - delay)
+            return LLMResponse(**data), delay, remaining / completion if completion else 0.0
+
+        step = self.script[min(_turn_step(messages), len(self.script) - 1)]
+        content = step.get("content")
+        if content:
+            content = content.replace("{user}", _last_user_text(messages))
+        tool_calls = [
+            ToolCallRequest(id=f"call_{next(self._ids)}", name=tc["name"], arguments=tc.get("arguments", {}))
+            for tc in step.get("tool_calls", [])
+        ]
+        delay = self.latency.sample(self._rng) if self.latency else 0.0
+        response = LLMResponse(
+            content=content,
+            tool_calls=tool_calls,
+            finish_reason="tool_calls" if tool_calls else "stop",
+        )
+        return response, delay, per_token
+
+    def _with_usage(self, response: LLMResponse, messages: list[dict[str, Any]], model: str) -> LLMResponse:
+        if not response.usage:
+            prompt = sum(estimate_message_tokens(m, model) for m in messages)
+            completion = estimate_tokens(response.content or "", model) + 20 * len(response.tool_calls)
+            response.usage = {
+                "prompt_tokens": prompt,
+                "completion_tokens": completion,
+                "total_tokens": prompt + completion,
+            }
+        return response
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        self.calls += 1
+        response, delay, per_token = self._pick(messages, tools)
+        response = self._with_usage(response, messages, model or self.default_model)
+        await asyncio.sleep(delay + per_token * response.usage.get("completion_tokens", 0))
+        return response
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        self.calls += 1
+        model = model or self.default_model
+        response, delay, per_token = self._pick(messages, tools)
+        response = self._with_usage(response, messages, model)
+        await asyncio.sleep(delay)
+        # Word-sized deltas, paced by the per-token latency
+        words = (response.content or "").split(" ")
+        for i, word in enumerate(words):
+            piece = word if i == len(words) - 1 else word + " "
+            if not piece:
+                continue
+            if per_token:
+                await asyncio.sleep(per_token * estimate_tokens(piece, model))
+            yield LLMStreamChunk(delta=piece)
+        yield LLMStreamChunk(response=response)
+
+    def get_default_model(self) -> str:
+        return self.default_model
+
+
+class RecordingProvider(LLMProvider):
+    """
+    Wraps a live provider and appends every call to a JSONL file.
+
+    Each line holds the request hash, model, a preview of the user message,
+    the full response and the measured latencies (total and time to first
+    token), in the format :class:`ReplayProvider` reads back.
+    """
+
+    def __init__(self, inner: LLMProvider, path: Path):
+        super().__init__(inner.api_key, inner.api_base)
+        self.inner = inner
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _write(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str | None,
+        response: LLMResponse,
+        first_token_s: float,
+        total_s: float,
+    ) -> None:
+        entry = {
+            "key": request_key(messages, tools),
+            "model": model or self.inner.get_default_model(),
+            "user": _last_user_text(messages)[:200],
+            "step": _turn_step(messages),
+            "first_token_s": round(first_token_s, 4),
+            "total_s": round(total_s, 4),
+            "response": asdict(response),
+        }
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.warning(f"Failed to record LLM call: {e}")
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        start = time.monotonic()
+        response = await self.inner.chat(
+            messages=messages, tools=tools, model=model, max_tokens=max_tokens, temperature=temperature
+        )
+        elapsed = time.monotonic() - start
+        if response.finish_reason != "error":
+            self._write(messages, tools, model, response, elapsed, elapsed)
+        return response
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[LLMStreamChunk]:
+        start = time.monotonic()
+        first_token_s = None
+        async for chunk in self.inner.chat_stream(
+            messages=messages, tools=tools, model=model, max_tokens=max_tokens, temperature=temperature,
+        ):
+            if first_token_s is None:
+                first_token_s = time.monotonic() - start
+            if chunk.response is not None and chunk.response.finish_reason != "error":
+                self._write(messages, tools, model, chunk.response, first_token_s, time.monotonic() - start)
+            yield chunk
+
+    def get_default_model(self) -> str:
+        return self.inner.get_default_model()
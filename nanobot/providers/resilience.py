@@ -0,0 +1,140 @@
+"""Retry, backoff and circuit-breaker helpers for LLM upstreams."""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+# HTTP statuses worth retrying on the same upstream
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429, 500, 502, 503, 504, 520, 522, 524, 529})
+# Statuses that say nothing about upstream health (the request itself is bad)
+CLIENT_ERROR_STATUS = frozenset({400, 404, 413, 422})
+
+
+def status_code(exc: BaseException) -> int | None:
+    """HTTP status of an upstream error, if known."""
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        response = getattr(exc, "response", None)
+        code = getattr(response, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether an error is transient (rate limit, overload, timeout, connection)."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    code = status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    name = type(exc).__name__
+    return name in {"APIConnectionError", "Timeout", "ServiceUnavailableError", "InternalServerError"}
+
+
+def is_client_error(exc: BaseException) -> bool:
+    """Whether an error is caused by the request rather than the upstream."""
+    return status_code(exc) in CLIENT_ERROR_STATUS
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """
+    Read ``Retry-After`` (seconds or HTTP date) or ``retry-after-ms`` from an error.
+
+    Returns:
+        Seconds to wait, or None if the upstream gave no hint.
+    """
+    headers: Any = getattr(exc, "headers", None)
+    if not headers:
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return max(0.0, float(value) / 1000)
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """Jittered exponential backoff for one upstream."""
+
+    max_retries: int = 2
+    base_delay: float = 1.0
+    max_delay: float = 20.0
+
+    def delay(self, attempt: int, exc: BaseException | None = None) -> float | None:
+        """
+        Seconds to wait before retry number ``attempt`` (1-based).
+
+        Returns:
+            The delay, or None if the caller should give up on this upstream:
+            retries exhausted, or the upstream asked for a wait longer than
+            ``max_delay`` (failing over is faster).
+        """
+        if attempt > self.max_retries:
+            return None
+        hint = retry_after_seconds(exc) if exc else None
+        if hint is not None:
+            return hint if hint <= self.max_delay else None
+        # Full jitter: uniform in [0, min(max, base * 2^(n-1))]
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    Skips an upstream for ``cooldown_s`` after ``failure_threshold`` consecutive failures.
+
+    After the cooldown one probe request is let through (half-open); its
+    outcome closes the breaker or re-opens it for another cooldown. Callers
+    must end every allowed request with ``record_success``,
+    ``record_failure`` or ``release`` (including on cancellation), or the
+    probe is never given back.
+    """
+
+    failure_threshold: int = 3
+    cooldown_s: float = 60.0
+    failures: int = 0
+    opened_at: float | None = None
+    _probing: bool = field(default=False, repr=False)
+
+    def allow(self) -> bool:
+        """Whether a request may be sent to this upstream now."""
+        if self.opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self.opened_at < self.cooldown_s:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self) -> None:
+        """End a request without an outcome (cancelled, or a hedge answered first); frees a half-open probe."""
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
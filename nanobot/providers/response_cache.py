@@ -0,0 +1,161 @@
+"""Exact-match on-disk cache for deterministic LLM calls."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Iterator
+
+from loguru import logger
+
+from nanobot.providers.base import LLMResponse, ToolCallRequest
+from nanobot.utils.helpers import strip_runtime_time
+
+_cache_opt_in: ContextVar[bool | None] = ContextVar("nanobot_llm_cache", default=None)
+
+
+@contextmanager
+def llm_cache(enabled: bool = True) -> Iterator[None]:
+    """
+    Opt LLM calls made inside the block into (or out of) the response cache.
+
+    Without this, only temperature-0 calls are cached. The gateway wraps
+    cron jobs and heartbeats in it; ``AgentLoop.process_direct`` then runs
+    them without session history so a repeated job repeats its request.
+    """
+    token = _cache_opt_in.set(enabled)
+    try:
+        yield
+    finally:
+        _cache_opt_in.reset(token)
+
+
+def cache_opted_in() -> bool:
+    """Whether the current code runs inside ``llm_cache()`` (enabled)."""
+    return _cache_opt_in.get() is True
+
+
+def cache_requested(temperature: float) -> bool:
+    """Whether the current call may use the cache."""
+    opt_in = _cache_opt_in.get()
+    return opt_in if opt_in is not None else temperature == 0
+
+
+class ResponseCache:
+    """
+    Bounded SQLite store of LLM responses keyed by a request hash.
+
+    Entries expire ``ttl_s`` after they were written; beyond ``max_entries``
+    the least recently read entries are evicted. ``get`` and ``put`` block on
+    disk; async callers run them in a worker thread.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 1000, ttl_s: float = 86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # One connection shared by worker threads
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                model TEXT NOT NULL,
+                cost REAL NOT NULL DEFAULT 0,
+                response TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at);
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        temperature: float,
+        max_tokens: int,
+    ) -> str:
+        """
+        Hash everything that determines the response, minus the runtime context's clock.
+
+        Tool definitions cached by a ``ToolRegistry`` carry their serialization,
+        which is hashed as is instead of re-encoding every schema per call.
+        """
+        payload = json.dumps(
+            {"model": model, "messages": strip_runtime_time(messages),
+             "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        tools_json = getattr(tools, "json", None) or json.dumps(tools, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(payload.encode("utf-8"))
+        digest.update(b"\0" + tools_json.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> tuple[LLMResponse, str, float] | None:
+        """
+        Look up a response. A store that cannot be read counts as a miss.
+
+        Returns:
+            (response, model that produced it, its original cost) or None.
+        """
+        with self._lock:
+            now = time.time()
+            try:
+                row = self._conn.execute(
+                    "SELECT created_at, model, cost, response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or now - row[0] > self.ttl_s:
+                    if row is not None:
+                        with self._conn:
+                            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.misses += 1
+                    return None
+
+                data = json.loads(row[3])
+                data["tool_calls"] = [ToolCallRequest(**tc) for tc in data.get("tool_calls", [])]
+                response = LLMResponse(**data)
+                with self._conn:
+                    self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            except Exception as e:
+                logger.warning(f"Response cache read failed: {e}")
+                self.misses += 1
+                return None
+            self.hits += 1
+            return response, row[1], row[2]
+
+    def put(self, key: str, response: LLMResponse, model: str, cost: float) -> None:
+        """Store a response, then enforce the TTL and size bounds."""
+        with self._lock:
+            now = time.time()
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, created_at, accessed_at, model, cost, response) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, now, now, model, cost, json.dumps(asdict(response), ensure_ascii=False)),
+                    )
+                    self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_s,))
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+            except Exception as e:
+                logger.warning(f"Response cache write failed: {e}")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,5 +1,16 @@
 """Session management module."""
 
 from nanobot.session.manager import SessionManager, Session
+from nanobot.session.backends import (
+    SessionBackend,
+    JsonlSessionBackend,
+    SqliteSessionBackend,
+)
 
-__all__ = ["SessionManager", "Session"]
+__all__ = [
+    "SessionManager",
+    "Session",
+    "SessionBackend",
+    "JsonlSessionBackend",
+    "SqliteSessionBackend",
+]
@@ -0,0 +1,434 @@
+"""Pluggable storage backends for conversation sessions."""
+
+import json
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.session.manager import Session
+from nanobot.utils.helpers import safe_filename
+
+
+class SessionBackend(ABC):
+    """
+    Abstract session store.
+
+    Backends persist sessions incrementally: ``Session._saved_count`` marks how
+    many of ``session.messages`` are already stored, and ``_needs_rewrite``
+    asks for a full replacement (after a clear or a repaired file).
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    def load(self, key: str, max_messages: int | None = None) -> Session | None:
+        """
+        Load a session.
+
+        Args:
+            key: Session key.
+            max_messages: Load only the newest N messages, if the backend
+                supports it. None loads everything.
+
+        Returns:
+            The session, or None if it does not exist.
+        """
+        pass
+
+    @abstractmethod
+    def save(self, session: Session) -> None:
+        """Persist whatever changed since the session was last saved."""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Delete a session. Returns True if it existed."""
+        pass
+
+    @abstractmethod
+    def list_sessions(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """List session info dicts, most recently updated first."""
+        pass
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+        pass
+
+
+class JsonlSessionBackend(SessionBackend):
+    """
+    One append-only JSONL file per session.
+
+    Files hold message records interleaved with ``_type: metadata`` records,
+    where the last metadata record wins. Each save appends only the new
+    messages plus one metadata record, so persistence cost is O(new messages)
+    rather than O(history). Files are compacted (rewritten atomically with a
+    single metadata record) after ``compact_after`` appends, after a clear, or
+    when a torn trailing line from a crash is found on load.
+    """
+
+    name = "jsonl"
+
+    def __init__(self, sessions_dir: Path, compact_after: int = 200, fsync: bool = True):
+        self.sessions_dir = sessions_dir
+        self.compact_after = compact_after
+        self.fsync = fsync
+
+    def _get_session_path(self, key: str) -> Path:
+        """Get the file path for a session."""
+        safe_key = safe_filename(key.replace(":", "_"))
+        return self.sessions_dir / f"{safe_key}.jsonl"
+
+    @staticmethod
+    def _key_from_path(path: Path) -> str:
+        """Recover a session key from its file name (channel names have no underscores)."""
+        return path.stem.replace("_", ":", 1)
+
+    def load(self, key: str, max_messages: int | None = None) -> Session | None:
+        """Load a session from disk (the whole file is always read)."""
+        path = self._get_session_path(key)
+
+        if not path.exists():
+            return None
+
+        try:
+            messages = []
+            metadata = {}
+            created_at = None
+            updated_at = None
+            metadata_records = 0
+            torn = False
+
+            with open(path, "rb") as f:
+                raw = f.read()
+
+            for line in raw.decode("utf-8").splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    # Partial record from an interrupted append
+                    torn = True
+                    continue
+
+                if data.get("_type") == "metadata":
+                    metadata_records += 1
+                    metadata = data.get("metadata", {})
+                    if data.get("created_at") and created_at is None:
+                        created_at = datetime.fromisoformat(data["created_at"])
+                    if data.get("updated_at"):
+                        updated_at = datetime.fromisoformat(data["updated_at"])
+                else:
+                    messages.append(data)
+
+            session = Session(
+                key=key,
+                messages=messages,
+                created_at=created_at or datetime.now(),
+                updated_at=updated_at or datetime.now(),
+                metadata=metadata
+            )
+            session._saved_count = len(messages)
+            session._appends = max(0, metadata_records - 1)
+            session._needs_rewrite = torn or (bool(raw) and not raw.endswith(b"\n"))
+            return session
+        except Exception as e:
+            logger.warning(f"Failed to load session {key}: {e}")
+            return None
+
+    def _metadata_record(self, session: Session) -> str:
+        """Serialize the session's metadata as one JSONL record."""
+        return json.dumps({
+            "_type": "metadata",
+            "created_at": session.created_at.isoformat(),
+            "updated_at": session.updated_at.isoformat(),
+            "metadata": session.metadata
+        })
+
+    def save(self, session: Session) -> None:
+        """Persist a session, appending only what changed since the last save."""
+        path = self._get_session_path(session.key)
+
+        if (
+            session._needs_rewrite
+            or session._saved_count > len(session.messages)
+            or session._appends >= self.compact_after
+            or not path.exists()
+        ):
+            self.compact(session)
+            return
+
+        lines = [json.dumps(m) for m in session.messages[session._saved_count:]]
+        lines.append(self._metadata_record(session))
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        session._saved_count = len(session.messages)
+        session._appends += 1
+
+    def compact(self, session: Session) -> None:
+        """Rewrite a session file with one metadata record, atomically (temp file + rename)."""
+        path = self._get_session_path(session.key)
+        tmp_path = path.with_name(path.name + ".tmp")
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            # Write metadata first
+            f.write(self._metadata_record(session) + "\n")
+
+            # Write messages
+            for msg in session.messages:
+                f.write(json.dumps(msg) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        session._saved_count = len(session.messages)
+        session._appends = 0
+        session._needs_rewrite = False
+
+    def delete(self, key: str) -> bool:
+        """Delete a session file."""
+        path = self._get_session_path(key)
+        if path.exists():
+            path.unlink()
+            return True
+        return False
+
+    def list_sessions(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """List sessions by reading the newest metadata record of every file."""
+        sessions = []
+
+        for path in self.sessions_dir.glob("*.jsonl"):
+            try:
+                # The newest metadata record is the last line; legacy files
+                # (full rewrites) only have one, on the first line.
+                data = self._read_metadata_record(path)
+                if data:
+                    sessions.append({
+                        "key": self._key_from_path(path),
+                        "created_at": data.get("created_at"),
+                        "updated_at": data.get("updated_at"),
+                        "path": str(path)
+                    })
+            except Exception:
+                continue
+
+        sessions.sort(key=lambda x: x.get("updated_at") or "", reverse=True)
+        return sessions[:limit] if limit is not None else sessions
+
+    @staticmethod
+    def _read_metadata_record(path: Path) -> dict[str, Any] | None:
+        """Read the latest metadata record without scanning the whole file."""
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 65536))
+            tail = f.read().splitlines()
+            f.seek(0)
+            head = f.readline()
+
+        for line in (tail[-1] if tail else b"", head):
+            try:
+                data = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if isinstance(data, dict) and data.get("_type") == "metadata":
+                return data
+        return None
+
+
+class SqliteSessionBackend(SessionBackend):
+    """
+    All sessions in one SQLite database (WAL mode).
+
+    Sessions are indexed by key and by ``updated_at``, so lookups and
+    listings do not touch other sessions. Messages are stored one row per
+    message keyed by (session, seq); loads can fetch only the newest N rows,
+    in which case ``Session._offset`` records how many older messages were
+    left on disk and new messages continue the sequence after them.
+    """
+
+    name = "sqlite"
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            key TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            metadata TEXT NOT NULL DEFAULT '{}',
+            message_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at);
+        CREATE TABLE IF NOT EXISTS messages (
+            session_key TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (session_key, seq)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: Path, fsync: bool = True):
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable against application crashes in WAL mode; FULL also
+        # survives power loss at the cost of an fsync per commit.
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(self._SCHEMA)
+        self._conn.commit()
+
+    def load(self, key: str, max_messages: int | None = None) -> Session | None:
+        """Load a session, optionally only its newest ``max_messages`` messages."""
+        row = self._conn.execute(
+            "SELECT created_at, updated_at, metadata, message_count FROM sessions WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        created_at, updated_at, metadata, message_count = row
+        if max_messages is None:
+            rows = self._conn.execute(
+                "SELECT data FROM messages WHERE session_key = ? ORDER BY seq",
+                (key,),
+            ).fetchall()
+        else:
+            rows = self._conn.execute(
+                "SELECT data FROM messages WHERE session_key = ? ORDER BY seq DESC LIMIT ?",
+                (key, max_messages),
+            ).fetchall()
+            rows.reverse()
+
+        session = Session(
+            key=key,
+            messages=[json.loads(r[0]) for r in rows],
+            created_at=datetime.fromisoformat(created_at),
+            updated_at=datetime.fromisoformat(updated_at),
+            metadata=json.loads(metadata),
+        )
+        session._offset = message_count - len(rows)
+        session._saved_count = len(rows)
+        session._needs_rewrite = False
+        return session
+
+    def save(self, session: Session) -> None:
+        """
+        Upsert the session row and insert new messages in one transaction.
+
+        A rewrite replaces only the loaded window (rows from ``_offset`` on);
+        older messages that were never loaded stay on disk. ``Session.clear``
+        resets the offset, so clearing drops them as well.
+        """
+        rewrite = session._needs_rewrite or session._saved_count > len(session.messages)
+        start = 0 if rewrite else session._saved_count
+
+        new = session.messages[start:]
+        with self._conn:
+            if rewrite:
+                self._conn.execute(
+                    "DELETE FROM messages WHERE session_key = ? AND seq >= ?",
+                    (session.key, session._offset),
+                )
+            self._conn.executemany(
+                "INSERT INTO messages (session_key, seq, data) VALUES (?, ?, ?)",
+                [
+                    (session.key, session._offset + start + i, json.dumps(m))
+                    for i, m in enumerate(new)
+                ],
+            )
+            self._conn.execute(
+                """
+                INSERT INTO sessions (key, created_at, updated_at, metadata, message_count)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    updated_at = excluded.updated_at,
+                    metadata = excluded.metadata,
+                    message_count = excluded.message_count
+                """,
+                (
+                    session.key,
+                    session.created_at.isoformat(),
+                    session.updated_at.isoformat(),
+                    json.dumps(session.metadata),
+                    session._offset + len(session.messages),
+                ),
+            )
+
+        session._saved_count = len(session.messages)
+        session._needs_rewrite = False
+
+    def delete(self, key: str) -> bool:
+        """Delete a session and its messages."""
+        with self._conn:
+            self._conn.execute("DELETE FROM messages WHERE session_key = ?", (key,))
+            cur = self._conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+        return cur.rowcount > 0
+
+    def list_sessions(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """List sessions from the ``updated_at`` index."""
+        rows = self._conn.execute(
+            "SELECT key, created_at, updated_at, message_count FROM sessions "
+            "ORDER BY updated_at DESC LIMIT ?",
+            (-1 if limit is None else limit,),
+        ).fetchall()
+        return [
+            {
+                "key": key,
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "messages": message_count,
+                "path": str(self.db_path),
+            }
+            for key, created_at, updated_at, message_count in rows
+        ]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+def migrate_jsonl_to_sqlite(
+    source: JsonlSessionBackend,
+    target: SqliteSessionBackend,
+    overwrite: bool = False,
+) -> tuple[int, int]:
+    """
+    Copy every JSONL session into a SQLite backend.
+
+    Args:
+        source: Backend reading the existing JSONL files.
+        target: Backend to write into.
+        overwrite: Replace sessions that already exist in the target.
+
+    Returns:
+        (migrated, skipped) session counts.
+    """
+    migrated = skipped = 0
+    for info in source.list_sessions():
+        key = info["key"]
+        if not overwrite and target.load(key, max_messages=0) is not None:
+            skipped += 1
+            continue
+
+        session = source.load(key)
+        if session is None:
+            skipped += 1
+            continue
+
+        session._needs_rewrite = True
+        target.save(session)
+        migrated += 1
+    return migrated, skipped
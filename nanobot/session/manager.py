@@ -1,15 +1,20 @@
 """Session management for conversation history."""
 
-import json
 import re
+import time
+from collections import OrderedDict
 from pathlib import Path
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from loguru import logger
 
-from nanobot.utils.helpers import ensure_dir, safe_filename
+from nanobot.utils.helpers import ensure_dir
+from nanobot.utils.tokens import estimate_message_tokens, truncate_to_tokens
+
+if TYPE_CHECKING:
+    from nanobot.session.backends import SessionBackend
 
 
 LOW_SIGNAL_ASSISTANT_PATTERNS = (
@@ -24,6 +29,16 @@ LOW_SIGNAL_ASSISTANT_PATTERNS = (
     re.compile(r"你可以通过以下渠道了解"),
 )
 
+# One alternation instead of nine separate scans
+LOW_SIGNAL_ASSISTANT_RE = re.compile(
+    "|".join(f"(?:{p.pattern})" for p in LOW_SIGNAL_ASSISTANT_PATTERNS), re.IGNORECASE
+)
+
+
+# Session.metadata keys of the rolling summary (see nanobot.agent.summarizer)
+SUMMARY_KEY = "summary"
+SUMMARY_UPTO_KEY = "summary_upto"  # absolute count of messages the summary covers
+
 
 def _is_low_signal_assistant_message(content: str) -> bool:
     """Filter transient assistant replies that should not steer later turns."""
@@ -34,7 +49,43 @@ def _is_low_signal_assistant_message(content: str) -> bool:
     if len(text) > 1200:
         return False
 
-    return any(pattern.search(text) for pattern in LOW_SIGNAL_ASSISTANT_PATTERNS)
+    return LOW_SIGNAL_ASSISTANT_RE.search(text) is not None
+
+
+def _message_is_low_signal(message: dict[str, Any]) -> bool:
+    """Read the flag stored by Session.add_message, classifying legacy records once."""
+    flag = message.get("low_signal")
+    if flag is None:
+        flag = _is_low_signal_assistant_message(str(message.get("content", "")))
+        message["low_signal"] = flag
+    return flag
+
+
+def _fit_token_budget(
+    history: list[dict[str, Any]],
+    max_tokens: int | None,
+    model: str | None,
+    max_message_tokens: int | None,
+) -> list[dict[str, Any]]:
+    """Keep the newest messages that fit the budget, truncating oversized ones."""
+    kept: list[dict[str, Any]] = []
+    used = 0
+    for message in reversed(history):
+        content = message["content"]
+        if max_message_tokens and isinstance(content, str):
+            content = truncate_to_tokens(content, max_message_tokens, model)
+            message = {"role": message["role"], "content": content}
+        tokens = estimate_message_tokens(message, model)
+        if max_tokens is not None and used + tokens > max_tokens:
+            break
+        kept.append(message)
+        used += tokens
+    kept.reverse()
+
+    # Start on a user turn so the window never opens with an orphaned reply
+    while kept and kept[0]["role"] != "user":
+        kept.pop(0)
+    return kept
 
 
 @dataclass
@@ -42,7 +93,8 @@ class Session:
     """
     A conversation session.
     
-    Stores messages in JSONL format for easy reading and persistence.
+    ``messages`` may hold only the newest part of the history when the
+    backend loaded a window; ``_offset`` counts the older messages on disk.
     """
     
     key: str  # channel:chat_id
@@ -50,6 +102,12 @@ class Session:
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
     metadata: dict[str, Any] = field(default_factory=dict)
+
+    # Persistence bookkeeping (see SessionManager.save)
+    _saved_count: int = field(default=0, init=False, repr=False, compare=False)  # messages on disk
+    _appends: int = field(default=0, init=False, repr=False, compare=False)  # appends since last rewrite
+    _needs_rewrite: bool = field(default=True, init=False, repr=False, compare=False)
+    _offset: int = field(default=0, init=False, repr=False, compare=False)  # older messages not loaded
     
     def add_message(self, role: str, content: str, **kwargs: Any) -> None:
         """Add a message to the session."""
@@ -59,29 +117,45 @@ class Session:
             "timestamp": datetime.now().isoformat(),
             **kwargs
         }
+        if role == "assistant" and "low_signal" not in msg:
+            # Classified once here and persisted, so history assembly is a flag check
+            msg["low_signal"] = _is_low_signal_assistant_message(str(content))
         self.messages.append(msg)
         self.updated_at = datetime.now()
     
-    def get_history(self, max_messages: int = 50) -> list[dict[str, Any]]:
+    def get_history(
+        self,
+        max_messages: int = 50,
+        max_tokens: int | None = None,
+        model: str | None = None,
+        max_message_tokens: int | None = None,
+    ) -> list[dict[str, Any]]:
         """
         Get message history for LLM context.
         
         Args:
-            max_messages: Maximum messages to return.
+            max_messages: Maximum messages to consider.
+            max_tokens: Token budget for the returned history, filled
+                newest-first. None keeps every message in the window.
+            model: Model name used for token estimates.
+            max_message_tokens: Truncate single messages larger than this.
         
         Returns:
             List of messages in LLM format.
         """
+        # Messages already folded into the rolling summary are not repeated
+        messages = self.messages
+        summarized = self.metadata.get(SUMMARY_UPTO_KEY, 0) - self._offset
+        if self.metadata.get(SUMMARY_KEY) and summarized > 0:
+            messages = messages[summarized:]
+
         # Get recent messages
-        recent = self.messages[-max_messages:] if len(self.messages) > max_messages else self.messages
+        recent = messages[-max_messages:] if len(messages) > max_messages else messages
 
         filtered = []
         filtered_count = 0
         for message in recent:
-            if (
-                message.get("role") == "assistant"
-                and _is_low_signal_assistant_message(str(message.get("content", "")))
-            ):
+            if message.get("role") == "assistant" and _message_is_low_signal(message):
                 filtered_count += 1
                 if filtered and filtered[-1].get("role") == "user":
                     filtered.pop()
@@ -95,30 +169,110 @@ class Session:
             )
 
         # Convert to LLM format (just role and content)
-        return [{"role": m["role"], "content": m["content"]} for m in filtered]
+        history = [{"role": m["role"], "content": m["content"]} for m in filtered]
+        if max_tokens is None and max_message_tokens is None:
+            return history
+        return _fit_token_budget(history, max_tokens, model, max_message_tokens)
     
     def clear(self) -> None:
         """Clear all messages in the session."""
         self.messages = []
+        self.metadata.pop(SUMMARY_KEY, None)
+        self.metadata.pop(SUMMARY_UPTO_KEY, None)
         self.updated_at = datetime.now()
+        self._needs_rewrite = True
+        self._offset = 0  # Older messages left on disk are dropped too
 
 
 class SessionManager:
     """
     Manages conversation sessions.
     
-    Sessions are stored as JSONL files in the sessions directory.
+    Storage is delegated to a SessionBackend: append-only JSONL files under
+    ``~/.nanobot/sessions`` by default, or a single SQLite database.
+    
+    Loaded sessions are kept in a bounded LRU cache (by entry count, total
+    cached messages and idle time). Evicted sessions are flushed to the
+    backend if they hold unsaved messages and transparently reloaded on next
+    access.
     """
     
-    def __init__(self, workspace: Path):
+    def __init__(
+        self,
+        workspace: Path,
+        compact_after: int = 200,
+        fsync: bool = True,
+        cache_max_entries: int = 1000,
+        cache_max_messages: int = 200_000,
+        cache_idle_ttl_s: float = 3600,
+        backend: "SessionBackend | None" = None,
+        load_max_messages: int | None = None,
+    ):
         self.workspace = workspace
         self.sessions_dir = ensure_dir(Path.home() / ".nanobot" / "sessions")
-        self._cache: dict[str, Session] = {}
+        if backend is None:
+            from nanobot.session.backends import JsonlSessionBackend
+            backend = JsonlSessionBackend(self.sessions_dir, compact_after=compact_after, fsync=fsync)
+        self.backend = backend
+        self.load_max_messages = load_max_messages
+        self.cache_max_entries = cache_max_entries
+        self.cache_max_messages = cache_max_messages
+        self.cache_idle_ttl_s = cache_idle_ttl_s
+        # LRU order: least recently used first. Values: (session, last access monotonic)
+        self._cache: OrderedDict[str, tuple[Session, float]] = OrderedDict()
+        self._cached_messages: dict[str, int] = {}  # message count seen at last touch
+        self._total_cached_messages = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+    
+    def _touch(self, session: Session) -> None:
+        """Mark a session most recently used and enforce the cache bounds."""
+        key = session.key
+        count = len(session.messages)
+        self._total_cached_messages += count - self._cached_messages.get(key, 0)
+        self._cached_messages[key] = count
+        self._cache[key] = (session, time.monotonic())
+        self._cache.move_to_end(key)
+        self._evict(keep=key)
+    
+    def _drop(self, key: str) -> Session | None:
+        """Remove a session from the cache without persisting it."""
+        entry = self._cache.pop(key, None)
+        self._total_cached_messages -= self._cached_messages.pop(key, 0)
+        return entry[0] if entry else None
+    
+    def _evict(self, keep: str) -> None:
+        """Evict idle sessions, then least recently used ones while over bounds."""
+        now = time.monotonic()
+        while self._cache:
+            key, (session, last_access) = next(iter(self._cache.items()))
+            if key == keep:
+                break
+            over = (
+                len(self._cache) > self.cache_max_entries
+                or self._total_cached_messages > self.cache_max_messages
+                or now - last_access > self.cache_idle_ttl_s
+            )
+            if not over:
+                break
+            self._drop(key)
+            self._evictions += 1
+            if session._saved_count != len(session.messages) or (
+                session._needs_rewrite and (session.messages or session.metadata)
+            ):
+                self.save(session, cache=False)
     
-    def _get_session_path(self, key: str) -> Path:
-        """Get the file path for a session."""
-        safe_key = safe_filename(key.replace(":", "_"))
-        return self.sessions_dir / f"{safe_key}.jsonl"
+    @property
+    def cache_stats(self) -> dict[str, int]:
+        """Session cache counters for monitoring."""
+        return {
+            "size": len(self._cache),
+            "messages": self._total_cached_messages,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+        }
     
     def get_or_create(self, key: str) -> Session:
         """
@@ -131,72 +285,26 @@ class SessionManager:
             The session.
         """
         # Check cache
-        if key in self._cache:
-            return self._cache[key]
+        entry = self._cache.get(key)
+        if entry:
+            self._hits += 1
+            self._touch(entry[0])
+            return entry[0]
         
-        # Try to load from disk
-        session = self._load(key)
+        # Try to load from the backend
+        self._misses += 1
+        session = self.backend.load(key, max_messages=self.load_max_messages)
         if session is None:
             session = Session(key=key)
         
-        self._cache[key] = session
+        self._touch(session)
         return session
     
-    def _load(self, key: str) -> Session | None:
-        """Load a session from disk."""
-        path = self._get_session_path(key)
-        
-        if not path.exists():
-            return None
-        
-        try:
-            messages = []
-            metadata = {}
-            created_at = None
-            
-            with open(path) as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    data = json.loads(line)
-                    
-                    if data.get("_type") == "metadata":
-                        metadata = data.get("metadata", {})
-                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-                    else:
-                        messages.append(data)
-            
-            return Session(
-                key=key,
-                messages=messages,
-                created_at=created_at or datetime.now(),
-                metadata=metadata
-            )
-        except Exception as e:
-            logger.warning(f"Failed to load session {key}: {e}")
-            return None
-    
-    def save(self, session: Session) -> None:
-        """Save a session to disk."""
-        path = self._get_session_path(session.key)
-        
-        with open(path, "w") as f:
-            # Write metadata first
-            metadata_line = {
-                "_type": "metadata",
-                "created_at": session.created_at.isoformat(),
-                "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata
-            }
-            f.write(json.dumps(metadata_line) + "\n")
-            
-            # Write messages
-            for msg in session.messages:
-                f.write(json.dumps(msg) + "\n")
-        
-        self._cache[session.key] = session
+    def save(self, session: Session, cache: bool = True) -> None:
+        """Persist a session, writing only what changed since the last save."""
+        self.backend.save(session)
+        if cache:
+            self._touch(session)
     
     def delete(self, key: str) -> bool:
         """
@@ -209,39 +317,24 @@ class SessionManager:
             True if deleted, False if not found.
         """
         # Remove from cache
-        self._cache.pop(key, None)
-        
-        # Remove file
-        path = self._get_session_path(key)
-        if path.exists():
-            path.unlink()
-            return True
-        return False
+        self._drop(key)
+        return self.backend.delete(key)
     
-    def list_sessions(self) -> list[dict[str, Any]]:
+    def list_sessions(self, limit: int | None = None) -> list[dict[str, Any]]:
         """
-        List all sessions.
+        List sessions, most recently updated first.
+        
+        Args:
+            limit: Return at most this many sessions.
         
         Returns:
             List of session info dicts.
         """
-        sessions = []
-        
-        for path in self.sessions_dir.glob("*.jsonl"):
-            try:
-                # Read just the metadata line
-                with open(path) as f:
-                    first_line = f.readline().strip()
-                    if first_line:
-                        data = json.loads(first_line)
-                        if data.get("_type") == "metadata":
-                            sessions.append({
-                                "key": path.stem.replace("_", ":"),
-                                "created_at": data.get("created_at"),
-                                "updated_at": data.get("updated_at"),
-                                "path": str(path)
-                            })
-            except Exception:
-                continue
-        
-        return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
+        return self.backend.list_sessions(limit=limit)
+    
+    def close(self) -> None:
+        """Flush unsaved cached sessions and close the backend."""
+        for session, _ in list(self._cache.values()):
+            if session._saved_count != len(session.messages):
+                self.save(session, cache=False)
+        self.backend.close()
@@ -1,7 +1,12 @@
 """Utility functions for nanobot."""
 
+import re
 from pathlib import Path
 from datetime import datetime
+from typing import Any
+
+RUNTIME_CONTEXT_TAG = "[Runtime Context]"
+_RUNTIME_TIME_RE = re.compile(re.escape(RUNTIME_CONTEXT_TAG) + r"\nCurrent Time: [^\n]*")
 
 
 def ensure_dir(path: Path) -> Path:
@@ -89,3 +94,29 @@ def parse_session_key(key: str) -> tuple[str, str]:
     if len(parts) != 2:
         raise ValueError(f"Invalid session key: {key}")
     return parts[0], parts[1]
+
+
+def strip_runtime_time(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Copy of ``messages`` with the clock line removed from runtime context blocks.
+
+    The runtime context prepended to user messages carries the current time
+    to the minute; request hashes built from the copy stay stable across
+    otherwise identical calls. The input is not mutated.
+    """
+    def strip(text: str) -> str:
+        return _RUNTIME_TIME_RE.sub(RUNTIME_CONTEXT_TAG, text)
+
+    out = []
+    for msg in messages:
+        content = msg.get("content")
+        if msg.get("role") != "user" or RUNTIME_CONTEXT_TAG not in str(content):
+            out.append(msg)
+        elif isinstance(content, str):
+            out.append({**msg, "content": strip(content)})
+        else:
+            out.append({**msg, "content": [
+                {**b, "text": strip(b["text"])} if isinstance(b.get("text"), str) else b
+                for b in content
+            ]})
+    return out
@@ -0,0 +1,268 @@
+"""Process metrics in the Prometheus text format, served over a tiny HTTP endpoint.
+
+Counters and histograms are updated in place by the code that produces
+them (LLM calls, tool runs, usage records); gauges are read through
+callbacks when ``/metrics`` is scraped, so idle state costs nothing.
+:func:`serve` answers ``GET /metrics`` and ``GET /healthz`` on an asyncio
+server — rendering only reads in-memory values, so the event loop never
+blocks on a scrape.
+"""
+
+import asyncio
+import math
+import threading
+from typing import Any, Callable
+
+from loguru import logger
+
+LabelValues = tuple[str, ...]
+
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TOOL_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LLM_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            else:
+                row[len(self.buckets)] += 1
+            row[-1] += value
+
+    def count(self, **labels: Any) -> int:
+        row = self._values.get(self._key(labels))
+        return int(sum(row[:-1])) if row else 0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, row in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), row[:-1]):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(row[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {_number(cumulative)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Value read from a callback at scrape time.
+
+    The callback returns a number, or a dict mapping label values (a tuple,
+    one entry per label name) to numbers.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], Any], labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.read = read
+
+    def samples(self) -> list[str]:
+        try:
+            value = self.read()
+        except Exception as e:
+            logger.debug(f"Metric {self.name} unavailable: {e}")
+            return []
+        if isinstance(value, dict):
+            return [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in sorted(value.items())]
+        return [f"{self.name} {_number(value)}"]
+
+
+class Registry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric, replacing one with the same name (gauges are re-bound per process)."""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def gauge(self, name: str, help: str, read: Callable[[], Any], labels: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help, read, labels))  # type: ignore[return-value]
+
+    def unregister(self, name: str) -> None:
+        self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        """Prometheus text exposition (format 0.0.4) of every metric."""
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+LLM_LATENCY: Histogram = REGISTRY.register(Histogram(  # type: ignore[assignment]
+    "nanobot_llm_request_seconds", "LLM call latency, including streaming.", ("model",), LLM_BUCKETS,
+))
+TOOL_LATENCY: Histogram = REGISTRY.register(Histogram(  # type: ignore[assignment]
+    "nanobot_tool_seconds", "Tool execution latency.", ("tool",), TOOL_BUCKETS,
+))
+TOOL_ERRORS: Counter = REGISTRY.register(Counter(  # type: ignore[assignment]
+    "nanobot_tool_errors_total", "Tool calls that returned an error.", ("tool",),
+))
+TOKENS: Counter = REGISTRY.register(Counter(  # type: ignore[assignment]
+    "nanobot_llm_tokens_total", "Tokens used, by model and direction (prompt/completion).", ("model", "type"),
+))
+COST: Counter = REGISTRY.register(Counter(  # type: ignore[assignment]
+    "nanobot_llm_cost_usd_total", "Estimated LLM spend in USD.", ("model",),
+))
+CACHE_SAVED: Counter = REGISTRY.register(Counter(  # type: ignore[assignment]
+    "nanobot_llm_cache_saved_usd_total", "Spend avoided by response cache hits.", ("model",),
+))
+PROMPT_CACHE: Counter = REGISTRY.register(Counter(  # type: ignore[assignment]
+    "nanobot_prompt_cache_lookups_total", "System prompt cache lookups, by result (hit/miss).", ("result",),
+))
+
+
+async def _handle(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    registry: Registry,
+    health: Callable[[], tuple[bool, str]],
+) -> None:
+    try:
+        request = await asyncio.wait_for(reader.readline(), timeout=5)
+        # Drain headers; nothing in them matters here
+        for _ in range(100):
+            line = await asyncio.wait_for(reader.readline(), timeout=5)
+            if line in (b"\r\n", b"\n", b""):
+                break
+        parts = request.decode("latin-1").split()
+        method, path = (parts[0], parts[1].split("?", 1)[0]) if len(parts) >= 2 else ("", "")
+
+        content_type = "text/plain; charset=utf-8"
+        if method not in ("GET", "HEAD"):
+            status, body = "405 Method Not Allowed", "method not allowed\n"
+        elif path == "/metrics":
+            status, body = "200 OK", registry.render()
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/healthz":
+            ok, detail = health()
+            status, body = ("200 OK" if ok else "503 Service Unavailable"), detail + "\n"
+        else:
+            status, body = "404 Not Found", "not found\n"
+
+        payload = body.encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + (payload if method != "HEAD" else b""))
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    except Exception as e:
+        logger.warning(f"Metrics request failed: {e}")
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+async def serve(
+    host: str,
+    port: int,
+    health: Callable[[], tuple[bool, str]] | None = None,
+    registry: Registry | None = None,
+) -> asyncio.Server:
+    """
+    Start the HTTP endpoint serving ``/metrics`` and ``/healthz``.
+
+    Args:
+        host: Interface to bind.
+        port: TCP port (0 picks a free one).
+        health: Returns (healthy, detail) for ``/healthz``; always healthy if omitted.
+        registry: Metrics to expose (defaults to the process registry).
+
+    Returns:
+        The running server; close it on shutdown.
+    """
+    registry = registry or REGISTRY
+    health = health or (lambda: (True, "ok"))
+    return await asyncio.start_server(lambda r, w: _handle(r, w, registry, health), host, port)
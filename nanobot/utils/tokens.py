@@ -0,0 +1,111 @@
+"""Fast, dependency-free token estimates for prompt budgeting."""
+
+import json
+import math
+import re
+from functools import lru_cache
+from typing import Any
+
+# CJK ideographs, kana, hangul and full-width punctuation: roughly one token
+# per character (fewer for tokenizers trained on Chinese), unlike Latin text.
+_CJK_RE = re.compile("[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+# family -> (Latin characters per token, tokens per CJK character)
+MODEL_FAMILY_RATIOS: dict[str, tuple[float, float]] = {
+    "claude": (3.5, 1.2),
+    "gpt": (4.0, 1.0),
+    "gemini": (4.0, 0.8),
+    "cjk": (3.8, 0.7),  # Qwen, DeepSeek, GLM, Kimi, MiniMax: Chinese-heavy vocabularies
+    "default": (4.0, 1.0),
+}
+
+_FAMILY_KEYWORDS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("claude", ("claude", "anthropic")),
+    ("gpt", ("gpt", "openai")),
+    ("gemini", ("gemini",)),
+    ("cjk", ("qwen", "dashscope", "deepseek", "glm", "zhipu", "z-ai", "kimi", "moonshot", "minimax")),
+)
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role + separators per chat message
+IMAGE_TOKENS = 1000  # flat estimate for an image content block
+
+
+@lru_cache(maxsize=256)
+def model_family(model: str | None) -> str:
+    """Map a model name to a tokenizer family in MODEL_FAMILY_RATIOS."""
+    name = (model or "").lower()
+    for family, keywords in _FAMILY_KEYWORDS:
+        if any(kw in name for kw in keywords):
+            return family
+    return "default"
+
+
+@lru_cache(maxsize=8192)
+def _estimate_text(text: str, family: str) -> int:
+    chars_per_token, tokens_per_cjk = MODEL_FAMILY_RATIOS[family]
+    cjk = len(_CJK_RE.findall(text))
+    return math.ceil(cjk * tokens_per_cjk + (len(text) - cjk) / chars_per_token)
+
+
+def estimate_tokens(text: str, model: str | None = None) -> int:
+    """
+    Estimate the token count of a string for a model.
+
+    Results are memoized by (text, family), so repeated estimates of the same
+    history message or system prompt cost a dictionary lookup.
+
+    Args:
+        text: Text to measure.
+        model: Model name used to pick the tokenizer family.
+
+    Returns:
+        Estimated token count.
+    """
+    if not text:
+        return 0
+    return _estimate_text(text, model_family(model))
+
+
+def estimate_message_tokens(message: dict[str, Any], model: str | None = None) -> int:
+    """Estimate the tokens one chat message contributes to a prompt."""
+    content = message.get("content")
+    tokens = MESSAGE_OVERHEAD_TOKENS
+    if isinstance(content, str):
+        tokens += estimate_tokens(content, model)
+    elif isinstance(content, list):
+        for block in content:
+            if block.get("type") == "text":
+                tokens += estimate_tokens(block.get("text", ""), model)
+            else:
+                tokens += IMAGE_TOKENS
+    if message.get("tool_calls"):
+        tokens += estimate_tokens(json.dumps(message["tool_calls"], ensure_ascii=False), model)
+    return tokens
+
+
+def estimate_tools_tokens(tools: list[dict[str, Any]] | None, model: str | None = None) -> int:
+    """Estimate the tokens tool definitions add to a prompt (reuses a cached serialization if present)."""
+    if not tools:
+        return 0
+    return estimate_tokens(getattr(tools, "json", None) or json.dumps(tools, ensure_ascii=False), model)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str | None = None) -> str:
+    """
+    Shorten text to about ``max_tokens``, keeping its head and tail.
+
+    Args:
+        text: Text to shorten.
+        max_tokens: Target size.
+        model: Model name used for the estimate.
+
+    Returns:
+        The text unchanged if it fits, otherwise head + omission marker + tail.
+    """
+    tokens = estimate_tokens(text, model)
+    if tokens <= max_tokens:
+        return text
+    keep = int(len(text) * max_tokens / tokens)
+    head = text[: keep * 2 // 3]
+    tail = text[len(text) - keep // 3:] if keep // 3 else ""
+    return f"{head}\n[... {tokens - max_tokens} tokens omitted ...]\n{tail}"
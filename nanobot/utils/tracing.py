@@ -0,0 +1,255 @@
+"""Per-turn tracing: nested timing spans written to a JSONL trace file.
+
+A trace starts when a message is published to the bus (:func:`inject` puts
+its id into ``InboundMessage.metadata``), :func:`turn` opens the root span
+when the agent picks the message up, and :func:`span` records nested stages
+(session load, context build, LLM calls, tools, session save, outbound
+dispatch). The current span travels in a ContextVar, so tasks spawned
+inside a turn attach to it. Records use OpenTelemetry field names
+(traceId, spanId, parentSpanId, start/endTimeUnixNano, attributes).
+
+With tracing disabled, or for unsampled messages, every call is a no-op.
+"""
+
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from loguru import logger
+
+TRACE_ID_KEY = "trace_id"  # InboundMessage.metadata keys
+PARENT_ID_KEY = "trace_parent_id"
+QUEUED_AT_KEY = "trace_queued_ns"
+OUTBOUND_AT_KEY = "trace_outbound_ns"
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    root: "Span | None" = field(default=None, repr=False)
+    # Root only: child span name -> [count, seconds]
+    breakdown: dict[str, list[float]] = field(default_factory=dict, repr=False)
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def to_record(self) -> dict[str, Any]:
+        record = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+        if self.parent_id:
+            record["parentSpanId"] = self.parent_id
+        return record
+
+
+class _NoopSpan:
+    """Stand-in yielded when nothing is being traced."""
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Buffers finished spans and appends them to a JSONL file."""
+
+    def __init__(self, path: Path, sample_rate: float = 1.0, slow_turn_s: float = 0.0, flush_every: int = 64):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.slow_turn_s = slow_turn_s
+        self.flush_every = flush_every
+        self._buffer: list[str] = []
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_record(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.flush_every
+        if full or span.root is None:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except Exception as e:
+            logger.warning(f"Failed to write traces: {e}")
+
+
+_tracer: Tracer | None = None
+_current: ContextVar[Span | None] = ContextVar("nanobot_trace_span", default=None)
+
+
+def configure(path: Path, sample_rate: float = 1.0, slow_turn_s: float = 0.0) -> Tracer:
+    """
+    Enable tracing for this process.
+
+    Args:
+        path: JSONL file spans are appended to.
+        sample_rate: Fraction of messages traced (0..1).
+        slow_turn_s: Log a per-stage breakdown of turns slower than this (0 = never).
+    """
+    global _tracer
+    if _tracer is None:
+        atexit.register(shutdown)
+    shutdown()
+    _tracer = Tracer(path, sample_rate=sample_rate, slow_turn_s=slow_turn_s)
+    return _tracer
+
+
+def shutdown() -> None:
+    """Flush buffered spans and disable tracing."""
+    global _tracer
+    if _tracer is not None:
+        _tracer.flush()
+    _tracer = None
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def inject(metadata: dict[str, Any]) -> None:
+    """Start a trace for a message entering the bus (keeps an existing trace id)."""
+    if _tracer is None or TRACE_ID_KEY in metadata:
+        return
+    if _tracer.sample_rate < 1.0 and random.random() >= _tracer.sample_rate:
+        return
+    metadata[TRACE_ID_KEY] = os.urandom(16).hex()
+    metadata[QUEUED_AT_KEY] = time.time_ns()
+
+
+def _new_span(name: str, trace_id: str, parent: Span | None, parent_id: str | None, attributes: dict[str, Any]) -> Span:
+    return Span(
+        name=name,
+        trace_id=trace_id,
+        span_id=os.urandom(8).hex(),
+        parent_id=parent.span_id if parent else parent_id,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+        root=(parent.root or parent) if parent else None,
+    )
+
+
+def _finish(span: Span) -> None:
+    span.end_ns = span.end_ns or time.time_ns()
+    tracer = _tracer
+    if tracer is None:
+        return
+    tracer.export(span)
+    if span.root is not None:
+        entry = span.root.breakdown.setdefault(span.name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += span.duration_s
+    elif span.breakdown and tracer.slow_turn_s and span.duration_s >= tracer.slow_turn_s:
+        stages = ", ".join(
+            f"{name} {seconds:.2f}s ({int(count)})"
+            for name, (count, seconds) in sorted(span.breakdown.items(), key=lambda kv: -kv[1][1])
+        )
+        logger.warning(
+            f"Slow {span.name} {span.attributes.get('session', '')} took {span.duration_s:.1f}s: "
+            f"{stages} [trace {span.trace_id}]"
+        )
+
+
+@contextmanager
+def _activate(span: Span) -> Iterator[Span]:
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.set("error", f"{type(e).__name__}: {e}"[:200])
+        raise
+    finally:
+        _current.reset(token)
+        _finish(span)
+
+
+@contextmanager
+def detached() -> Iterator[None]:
+    """Tasks created inside the block start outside the current trace (background work)."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def turn(metadata: dict[str, Any], name: str = "turn", **attributes: Any) -> Iterator[Span | _NoopSpan]:
+    """
+    Root span for processing one message, continuing the trace in ``metadata``.
+
+    The time the message waited since :func:`inject` is recorded as a
+    ``bus.wait`` child span.
+    """
+    trace_id = metadata.get(TRACE_ID_KEY) if _tracer else None
+    if not trace_id:
+        yield NOOP_SPAN
+        return
+    root = _new_span(name, trace_id, None, None, attributes)
+    metadata[PARENT_ID_KEY] = root.span_id
+    queued = metadata.pop(QUEUED_AT_KEY, None)
+    if queued:
+        wait = _new_span("bus.wait", trace_id, root, None, {})
+        wait.start_ns, wait.end_ns = queued, root.start_ns
+        _finish(wait)
+    with _activate(root):
+        yield root
+
+
+@contextmanager
+def span(name: str, metadata: dict[str, Any] | None = None, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+    """
+    Child span of the current span.
+
+    Outside a traced turn (e.g. in the outbound dispatcher task), pass the
+    message ``metadata`` to attach to the turn that produced it.
+    """
+    parent = _current.get()
+    if parent is not None:
+        child = _new_span(name, parent.trace_id, parent, None, attributes)
+    elif _tracer and metadata and metadata.get(TRACE_ID_KEY):
+        child = _new_span(name, metadata[TRACE_ID_KEY], None, metadata.get(PARENT_ID_KEY), attributes)
+    else:
+        yield NOOP_SPAN
+        return
+    with _activate(child):
+        yield child
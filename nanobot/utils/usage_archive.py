@@ -0,0 +1,451 @@
+"""Daily rotation of the usage log and a columnar archive of closed days.
+
+Layout next to the live log (``~/.nanobot/usage.jsonl``)::
+
+    usage.jsonl               records for the current UTC day
+    usage/2026-10-15.jsonl.gz closed day, raw records
+    usage/2026-10-15.parquet  the same day, columnar (when pyarrow is installed)
+    usage/2026-10-15.ucol     ...or in the pure-Python columnar format below
+
+The writer rotates the live log the first time it writes a record for a
+new day; the closed day is gzipped and converted right away. Queries pick
+days by file name, so a date range never opens files outside it, and
+sender/channel/model columns are dictionary-encoded, so a per-sender query
+skips days the sender never appears in.
+
+``.ucol`` files: the magic bytes, a little-endian u32 header length, a JSON
+header (row count, byte order, per-column offset/size/type and the
+dictionaries of string columns) and then each column as a zlib-compressed
+``array`` buffer.
+"""
+
+import gzip
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+from loguru import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional
+    pa = pq = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+MAGIC = b"NBUSAGE1"
+STRING_COLUMNS = ("sender", "channel", "model")
+NUMERIC_COLUMNS = {"ts": "q", "in": "q", "out": "q", "total": "q", "cost": "d", "cached": "B", "saved": "d"}
+GROUP_FIELDS = ("day", "hour", "sender", "channel", "model")
+
+
+def archive_dir(live: Path) -> Path:
+    """Directory holding the closed days of ``live``."""
+    return live.parent / live.stem
+
+
+def log_day(path: Path) -> str | None:
+    """UTC day (YYYY-MM-DD) of the first record in a JSONL log, or None if empty/missing."""
+    try:
+        with open(path, "rb") as f:
+            first = f.readline()
+    except FileNotFoundError:
+        return None
+    try:
+        return json.loads(first)["ts"][:10]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _parse_ts_ms(ts: str) -> int:
+    dt = datetime.fromisoformat(ts)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _read_jsonl(lines: Iterable[bytes]) -> Iterator[dict[str, Any]]:
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            pass
+
+
+# ── Table ─────────────────────────────────────────────────────
+
+
+@dataclass
+class DayTable:
+    """One day of records as columns; string columns are dictionary codes + values."""
+
+    rows: int = 0
+    numeric: dict[str, Sequence[float]] = field(default_factory=dict)
+    codes: dict[str, Sequence[int]] = field(default_factory=dict)
+    values: dict[str, list[str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict[str, Any]]) -> "DayTable":
+        table = cls()
+        table.numeric = {name: array(code) for name, code in NUMERIC_COLUMNS.items()}
+        table.codes = {name: array("I") for name in STRING_COLUMNS}
+        table.values = {name: [] for name in STRING_COLUMNS}
+        index: dict[str, dict[str, int]] = {name: {} for name in STRING_COLUMNS}
+        for r in records:
+            try:
+                ts = _parse_ts_ms(r["ts"])
+            except (KeyError, ValueError, TypeError):
+                continue
+            table.numeric["ts"].append(ts)
+            for name in ("in", "out", "total"):
+                table.numeric[name].append(int(r.get(name, 0) or 0))
+            table.numeric["cost"].append(float(r.get("cost", 0.0) or 0.0))
+            table.numeric["saved"].append(float(r.get("saved", 0.0) or 0.0))
+            table.numeric["cached"].append(1 if r.get("cached") else 0)
+            for name in STRING_COLUMNS:
+                value = str(r.get(name, "unknown"))
+                code = index[name].get(value)
+                if code is None:
+                    code = index[name][value] = len(table.values[name])
+                    table.values[name].append(value)
+                table.codes[name].append(code)
+            table.rows += 1
+        return table
+
+    def column(self, name: str) -> Sequence[Any]:
+        """Decoded values of one column."""
+        if name in self.codes:
+            values = self.values[name]
+            return [values[c] for c in self.codes[name]]
+        return self.numeric[name]
+
+
+def _write_ucol(table: DayTable, path: Path) -> None:
+    header: dict[str, Any] = {"rows": table.rows, "byteorder": sys.byteorder, "columns": {}}
+    blobs: list[bytes] = []
+    offset = 0
+    for name, typecode, data, values in (
+        [(n, NUMERIC_COLUMNS[n], table.numeric[n], None) for n in NUMERIC_COLUMNS]
+        + [(n, "I", table.codes[n], table.values[n]) for n in STRING_COLUMNS]
+    ):
+        blob = zlib.compress(array(typecode, data).tobytes(), 6)
+        header["columns"][name] = {"type": typecode, "offset": offset, "size": len(blob)}
+        if values is not None:
+            header["columns"][name]["values"] = values
+        blobs.append(blob)
+        offset += len(blob)
+    head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(head)) + head)
+        for blob in blobs:
+            f.write(blob)
+
+
+def _read_ucol(path: Path, columns: Iterable[str] | None = None) -> DayTable:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a usage archive: {path}")
+        (size,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(size))
+        base = f.tell()
+        table = DayTable(rows=header["rows"])
+        for name in columns or header["columns"]:
+            meta = header["columns"].get(name)
+            if meta is None:
+                continue
+            f.seek(base + meta["offset"])
+            data = array(meta["type"])
+            data.frombytes(zlib.decompress(f.read(meta["size"])))
+            if header["byteorder"] != sys.byteorder:
+                data.byteswap()
+            if "values" in meta:
+                table.codes[name] = data
+                table.values[name] = meta["values"]
+            else:
+                table.numeric[name] = data
+    return table
+
+
+def _write_parquet(table: DayTable, path: Path) -> None:
+    arrays = {name: pa.array(table.numeric[name]) for name in NUMERIC_COLUMNS}
+    for name in STRING_COLUMNS:
+        arrays[name] = pa.DictionaryArray.from_arrays(
+            pa.array(table.codes[name], type=pa.uint32()), pa.array(table.values[name], type=pa.string())
+        )
+    pq.write_table(pa.table(arrays), path, compression="zstd")
+
+
+def _read_parquet(path: Path, columns: Iterable[str] | None = None) -> DayTable:
+    data = pq.read_table(path, columns=list(columns) if columns else None)
+    table = DayTable(rows=data.num_rows)
+    for name in data.column_names:
+        column = data.column(name).combine_chunks()
+        if name in STRING_COLUMNS:
+            encoded = column if pa.types.is_dictionary(column.type) else column.dictionary_encode()
+            table.codes[name] = encoded.indices.to_pylist()
+            table.values[name] = encoded.dictionary.to_pylist()
+        else:
+            table.numeric[name] = column.to_pylist()
+    return table
+
+
+def read_table(path: Path, columns: Iterable[str] | None = None) -> DayTable:
+    """Load a day from its ``.parquet``, ``.ucol`` or ``.jsonl.gz`` file."""
+    if path.suffix == ".parquet":
+        if pq is None:
+            raise RuntimeError(f"pyarrow is required to read {path}")
+        return _read_parquet(path, columns)
+    if path.suffix == ".ucol":
+        return _read_ucol(path, columns)
+    with gzip.open(path, "rb") as f:
+        return DayTable.from_records(_read_jsonl(f))
+
+
+# ── Rotation and archival ─────────────────────────────────────
+
+
+def day_files(directory: Path) -> dict[str, Path]:
+    """Archived days and the best file to read each from (columnar over gzip)."""
+    rank = {".parquet": 0, ".ucol": 1, ".gz": 2}
+    best: dict[str, Path] = {}
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return best
+    for entry in entries:
+        path = Path(entry.path)
+        suffix = path.suffix
+        if suffix not in rank or (suffix == ".parquet" and pq is None):
+            continue
+        day = entry.name[:10]
+        try:
+            date.fromisoformat(day)
+        except ValueError:
+            continue
+        current = best.get(day)
+        if current is None or rank[suffix] < rank[current.suffix]:
+            best[day] = path
+    return best
+
+
+def archive_day(directory: Path, day: str) -> Path | None:
+    """Convert a closed day's ``.jsonl.gz`` into the columnar format. Returns the new file."""
+    source = directory / f"{day}.jsonl.gz"
+    if not source.exists():
+        return None
+    suffix = ".parquet" if pq is not None else ".ucol"
+    target = directory / f"{day}{suffix}"
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        table = read_table(source)
+        (_write_parquet if suffix == ".parquet" else _write_ucol)(table, tmp)
+        os.replace(tmp, target)
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        logger.warning(f"Failed to archive usage for {day}: {e}")
+        return None
+    return target
+
+
+def archive_pending(directory: Path) -> list[Path]:
+    """Build columnar files for gzipped days that lack one or changed since."""
+    built = []
+    for gz in sorted(directory.glob("*.jsonl.gz")):
+        day = gz.name[:10]
+        columnar = [directory / f"{day}.parquet", directory / f"{day}.ucol"]
+        newest = max((p.stat().st_mtime for p in columnar if p.exists()), default=None)
+        if newest is None or newest < gz.stat().st_mtime:
+            path = archive_day(directory, day)
+            if path:
+                built.append(path)
+    return built
+
+
+@contextmanager
+def log_lock(live: Path, exclusive: bool = False) -> Iterator[None]:
+    """
+    Hold the advisory lock on ``live``: shared to append, exclusive to rotate.
+
+    A no-op where ``fcntl`` is unavailable (Windows).
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(live.with_name(f".{live.name}.lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def rotate(live: Path) -> list[str]:
+    """
+    Close the live log: move its records into per-day ``.jsonl.gz`` files and archive them.
+
+    Writers append while holding :func:`log_lock` shared and the log is
+    renamed away under it exclusively, so no append can land in the file
+    after it was read; later appends start a fresh live log. Without
+    ``fcntl`` an append racing the rename can be lost.
+
+    Returns:
+        The days that were rotated.
+    """
+    staging = live.with_name(f".{live.name}.{os.getpid()}.rotating")
+    try:
+        with log_lock(live, exclusive=True):
+            os.replace(live, staging)
+    except FileNotFoundError:
+        return []
+    directory = archive_dir(live)
+    directory.mkdir(parents=True, exist_ok=True)
+    by_day: dict[str, list[bytes]] = {}
+    with open(staging, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                day = json.loads(line)["ts"][:10]
+            except (ValueError, KeyError, TypeError):
+                day = "unknown"
+            by_day.setdefault(day, []).append(line if line.endswith(b"\n") else line + b"\n")
+    for day, lines in by_day.items():
+        # Appending adds a gzip member; readers see one continuous stream
+        with gzip.open(directory / f"{day}.jsonl.gz", "ab") as gz:
+            gz.writelines(lines)
+    staging.unlink()
+    for day in by_day:
+        if day != "unknown":
+            archive_day(directory, day)
+    logger.info(f"Rotated usage log: {', '.join(sorted(by_day))}")
+    return sorted(by_day)
+
+
+def rotate_if_stale(live: Path, today: str | None = None) -> list[str]:
+    """Rotate ``live`` if its records start before ``today`` (UTC, YYYY-MM-DD)."""
+    today = today or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    day = log_day(live)
+    if day is None or day >= today:
+        return []
+    return rotate(live)
+
+
+# ── Queries ───────────────────────────────────────────────────
+
+
+def _empty() -> dict[str, float]:
+    return {"calls": 0, "in": 0, "out": 0, "total": 0, "cost": 0.0, "saved": 0.0}
+
+
+def aggregate(
+    table: DayTable,
+    by: Sequence[str],
+    sender: str | None = None,
+    out: dict[tuple, dict[str, float]] | None = None,
+) -> dict[tuple, dict[str, float]]:
+    """Sum a table's calls, tokens and cost per group key (see :func:`query`), into ``out`` if given."""
+    out = {} if out is None else out
+    if not table.rows:
+        return out
+    wanted = None
+    if sender is not None:
+        if sender not in table.values["sender"]:
+            return out
+        wanted = table.values["sender"].index(sender)
+    ts = table.numeric["ts"]
+    decoded = {
+        name: (table.values[name], table.codes[name]) for name in by if name in STRING_COLUMNS
+    }
+    sender_codes = table.codes["sender"]
+    cols = [table.numeric[n] for n in ("in", "out", "total", "cost", "saved")]
+    hours: dict[int, datetime] = {}  # formatting cache: records cluster in few hours
+    for i in range(table.rows):
+        if wanted is not None and sender_codes[i] != wanted:
+            continue
+        key = []
+        for name in by:
+            if name == "day" or name == "hour":
+                hour = ts[i] // 3_600_000
+                moment = hours.get(hour)
+                if moment is None:
+                    moment = hours[hour] = datetime.fromtimestamp(hour * 3600, timezone.utc)
+                key.append(moment.strftime("%Y-%m-%d" if name == "day" else "%Y-%m-%dT%H"))
+            else:
+                values, codes = decoded[name]
+                key.append(values[codes[i]])
+        s = out.get(tuple(key))
+        if s is None:
+            s = out[tuple(key)] = _empty()
+        s["calls"] += 1
+        s["in"] += cols[0][i]
+        s["out"] += cols[1][i]
+        s["total"] += cols[2][i]
+        s["cost"] += cols[3][i]
+        s["saved"] += cols[4][i]
+    return out
+
+
+def query(
+    live: Path,
+    since: date | None = None,
+    until: date | None = None,
+    sender: str | None = None,
+    by: Sequence[str] = ("day",),
+    include_live: bool = True,
+) -> dict[tuple, dict[str, float]]:
+    """
+    Aggregate usage over a date range from the archive and the live log.
+
+    Args:
+        live: Path of the live ``usage.jsonl``.
+        since: First UTC day included (None = from the beginning).
+        until: Last UTC day included (None = through today).
+        sender: Only count this sender.
+        by: Group-by fields, any of day, hour, sender, channel, model.
+        include_live: Also scan the live log.
+
+    Returns:
+        Group key tuple -> {calls, in, out, total, cost, saved}.
+    """
+    unknown = [name for name in by if name not in GROUP_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown group-by field(s): {', '.join(unknown)}")
+    first = since.isoformat() if since else ""
+    last = until.isoformat() if until else "9999-12-31"
+    needed = {"ts", "in", "out", "total", "cost", "saved", "sender", *(n for n in by if n in STRING_COLUMNS)}
+    result: dict[tuple, dict[str, float]] = {}
+    for day, path in sorted(day_files(archive_dir(live)).items()):
+        if first <= day <= last:
+            aggregate(read_table(path, needed), by, sender, result)
+    if include_live:
+        try:
+            with open(live, "rb") as f:
+                records = [r for r in _read_jsonl(f) if first <= str(r.get("ts", ""))[:10] <= last]
+        except FileNotFoundError:
+            records = []
+        aggregate(DayTable.from_records(records), by, sender, result)
+    return result
+
+
+def parse_day(value: str) -> date:
+    """Parse ``YYYY-MM-DD``, ``today``, ``yesterday`` or a relative ``<N>d`` (N days ago)."""
+    today = datetime.now(timezone.utc).date()
+    if value == "today":
+        return today
+    if value == "yesterday":
+        return today - timedelta(days=1)
+    if value.endswith("d") and value[:-1].isdigit():
+        return today - timedelta(days=int(value[:-1]))
+    return date.fromisoformat(value)
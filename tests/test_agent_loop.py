@@ -0,0 +1,144 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse
+
+
+class SlowEchoProvider(LLMProvider):
+    """Replies with the last user message after a fixed delay, tracking overlap."""
+
+    def __init__(self, delay: float = 0.05):
+        super().__init__()
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def chat(self, messages: list[dict[str, Any]], **kwargs: Any) -> LLMResponse:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        # Strip the leading [Runtime Context] block from the user message
+        text = messages[-1]["content"].rsplit("\n\n", 1)[-1]
+        return LLMResponse(content=f"echo:{text}")
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+def _make_loop(home, provider: LLMProvider, **kwargs: Any) -> AgentLoop:
+    workspace = home / "workspace"
+    workspace.mkdir(exist_ok=True)
+    return AgentLoop(bus=MessageBus(), provider=provider, workspace=workspace, **kwargs)
+
+
+async def _drain(loop: AgentLoop, count: int) -> list[str]:
+    return [
+        (await asyncio.wait_for(loop.bus.consume_outbound(), timeout=5)).content
+        for _ in range(count)
+    ]
+
+
+async def test_run_processes_sessions_concurrently(home) -> None:
+    provider = SlowEchoProvider()
+    loop = _make_loop(home, provider, max_concurrent_turns=4)
+    runner = asyncio.create_task(loop.run())
+
+    for i in range(4):
+        await loop.bus.publish_inbound(
+            InboundMessage(channel="test", sender_id=f"u{i}", chat_id=f"c{i}", content=f"m{i}")
+        )
+    replies = await _drain(loop, 4)
+    loop.stop()
+    await runner
+
+    assert sorted(replies) == [f"echo:m{i}" for i in range(4)]
+    assert provider.peak == 4
+
+
+async def test_run_keeps_fifo_order_within_session(home) -> None:
+    provider = SlowEchoProvider()
+    loop = _make_loop(home, provider, max_concurrent_turns=4)
+    runner = asyncio.create_task(loop.run())
+
+    for i in range(3):
+        await loop.bus.publish_inbound(
+            InboundMessage(channel="test", sender_id="u", chat_id="same", content=f"m{i}")
+        )
+    replies = await _drain(loop, 3)
+    loop.stop()
+    await runner
+
+    assert replies == ["echo:m0", "echo:m1", "echo:m2"]
+    assert provider.peak == 1
+    history = loop.sessions.get_or_create("test:same").messages
+    assert [m["content"] for m in history if m["role"] == "user"] == ["m0", "m1", "m2"]
+    assert loop._session_locks == {}
+
+
+async def test_run_respects_max_concurrent_turns(home) -> None:
+    provider = SlowEchoProvider()
+    loop = _make_loop(home, provider, max_concurrent_turns=2)
+    runner = asyncio.create_task(loop.run())
+
+    for i in range(5):
+        await loop.bus.publish_inbound(
+            InboundMessage(channel="test", sender_id=f"u{i}", chat_id=f"c{i}", content=f"m{i}")
+        )
+    await _drain(loop, 5)
+    loop.stop()
+    await runner
+
+    assert provider.peak == 2
+
+
+async def test_burst_from_one_session_does_not_starve_others(home) -> None:
+    provider = SlowEchoProvider()
+    loop = _make_loop(home, provider, max_concurrent_turns=2)
+    runner = asyncio.create_task(loop.run())
+
+    for i in range(4):
+        await loop.bus.publish_inbound(
+            InboundMessage(channel="test", sender_id="busy", chat_id="busy", content=f"a{i}")
+        )
+    await loop.bus.publish_inbound(InboundMessage(channel="test", sender_id="u", chat_id="other", content="b"))
+    replies = await _drain(loop, 5)
+    loop.stop()
+    await runner
+
+    # Queued turns of the busy session wait on its lock without holding a slot
+    assert "echo:b" in replies[:2]
+    assert [r for r in replies if r.startswith("echo:a")] == [f"echo:a{i}" for i in range(4)]
+    assert provider.peak == 2
+
+
+async def test_backlog_beyond_max_inflight_turns_stays_on_the_bus(home) -> None:
+    provider = SlowEchoProvider()
+    loop = _make_loop(home, provider, max_concurrent_turns=2, max_inflight_turns=3)
+    for i in range(10):
+        await loop.bus.publish_inbound(
+            InboundMessage(channel="test", sender_id=f"u{i}", chat_id=f"c{i}", content=f"m{i}")
+        )
+    runner = asyncio.create_task(loop.run())
+
+    await asyncio.sleep(0.02)
+    assert loop.inflight_count == 3 and loop.bus.inbound_size == 7
+    replies = await _drain(loop, 10)
+    loop.stop()
+    await runner
+
+    assert sorted(replies) == sorted(f"echo:m{i}" for i in range(10))
+    assert provider.peak == 2
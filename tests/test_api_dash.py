@@ -0,0 +1,80 @@
+import importlib.util
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+spec = importlib.util.spec_from_file_location("api_dash", Path(__file__).parents[1] / "api_dash.py")
+api_dash = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(api_dash)
+
+
+def _line(ts: datetime, sender: str = "alice", model: str = "gpt-4o", tokens: int = 100, cost: float = 0.01) -> str:
+    return json.dumps({
+        "ts": ts.isoformat(), "sender": sender, "channel": "telegram", "model": model,
+        "in": tokens, "out": 0, "total": tokens, "cost": cost,
+    }) + "\n"
+
+
+def test_index_tails_appends_and_resumes_from_checkpoint(tmp_path) -> None:
+    log, rollup = tmp_path / "usage.jsonl", tmp_path / "rollup.json"
+    now = datetime.now(timezone.utc)
+    log.write_text(_line(now - timedelta(days=30)) + _line(now, sender="bob"))
+
+    index = api_dash.UsageIndex(log, rollup)
+    assert index.refresh() == 2
+    assert index.stats()["calls"] == 2
+    assert index.stats(since=now - timedelta(days=7))["calls"] == 1
+
+    # A partially written line is picked up once complete
+    with open(log, "a") as f:
+        f.write(_line(now, tokens=50)[:20])
+    assert index.refresh() == 0
+    with open(log, "a") as f:
+        f.write(_line(now, tokens=50)[20:])
+    assert index.refresh() == 1
+    index.save_checkpoint(force=True)
+
+    resumed = api_dash.UsageIndex(log, rollup)
+    assert resumed.load_checkpoint()
+    assert resumed.refresh() == 0
+    assert resumed.stats() == index.stats()
+    assert [u["sender"] for u in resumed.user_stats()] == ["alice", "bob"]
+    assert resumed.daily_stats()[0][1]["total"] == 150
+    assert resumed.models == {"gpt-4o": 3}
+
+
+def test_replaced_log_is_reindexed(tmp_path) -> None:
+    log = tmp_path / "usage.jsonl"
+    now = datetime.now(timezone.utc)
+    log.write_text(_line(now) + _line(now))
+    index = api_dash.UsageIndex(log, tmp_path / "rollup.json")
+    index.refresh()
+
+    log.write_text(_line(now, sender="carol", cost=0.0, model="claude-haiku-4"))
+    index.refresh()
+
+    stats = index.user_stats()
+    assert [u["sender"] for u in stats] == ["carol"]
+    assert stats[0]["cost"] > 0  # back-filled from the price table
+
+
+def test_rotated_days_are_read_from_the_archive(tmp_path) -> None:
+    from nanobot.utils import usage_archive
+
+    log, rollup = tmp_path / "usage.jsonl", tmp_path / "rollup.json"
+    now = datetime.now(timezone.utc)
+    log.write_text(_line(now - timedelta(days=1)) + _line(now - timedelta(days=1), sender="bob"))
+    index = api_dash.UsageIndex(log, rollup)
+    index.refresh()
+
+    usage_archive.rotate(log)
+    log.write_text(_line(now))
+    index.refresh()
+    assert index.stats()["calls"] == 3
+    assert index.stats(since=now - timedelta(days=2))["calls"] == 3
+    index.save_checkpoint(force=True)
+
+    resumed = api_dash.UsageIndex(log, rollup)
+    assert resumed.load_checkpoint() and resumed.refresh() == 0
+    assert {u["sender"]: u["calls"] for u in resumed.user_stats()} == {"alice": 2, "bob": 1}
+    assert resumed.model_calls() == {"gpt-4o": 3}
@@ -0,0 +1,39 @@
+from nanobot.bench import BenchSettings, run_bench
+from nanobot.bench.harness import percentile
+from nanobot.providers.replay import Latency, ReplayProvider
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+async def test_bench_runs_tool_turns_end_to_end(tmp_path) -> None:
+    provider = ReplayProvider(script=[
+        {"tool_calls": [{"name": "list_dir", "arguments": {"path": str(tmp_path)}}]},
+        {"content": "Done: {user}"},
+    ], latency=Latency(value=0.001))
+    settings = BenchSettings(users=3, rate=0, messages=12, sample_interval_s=0.01)
+
+    report = await run_bench(provider, settings, workspace=tmp_path)
+
+    summary = report.summary()
+    assert summary["completed"] == 12 and summary["unmatched"] == 0
+    assert len(report.latencies_s) == 12
+    stages = report.stage_summary()
+    assert stages["llm"]["count"] == 24
+    assert stages["tool"]["count"] == 12
+    assert {"inbound_queue", "turn", "session_save", "outbound_queue"} <= stages.keys()
+    assert report.timeline and summary["throughput_msg_s"] > 0
+
+
+async def test_bench_streaming_with_sqlite_sessions(tmp_path) -> None:
+    provider = ReplayProvider(script=[{"content": "a streamed reply"}])
+    settings = BenchSettings(users=2, rate=0, messages=6, stream=True, session_backend="sqlite")
+
+    report = await run_bench(provider, settings, workspace=tmp_path)
+
+    assert report.completed == 6
+    assert len(report.first_update_s) == 6
@@ -0,0 +1,113 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from nanobot.agent import context as context_module
+from nanobot.agent.context import ContextBuilder
+
+
+class FrozenDateTime(datetime):
+    current = datetime(2026, 3, 1, 9, 30)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def builder(tmp_path, monkeypatch):
+    monkeypatch.setattr(context_module, "datetime", FrozenDateTime)
+    FrozenDateTime.current = datetime(2026, 3, 1, 9, 30)
+    (tmp_path / "AGENTS.md").write_text("be nice", encoding="utf-8")
+    return ContextBuilder(tmp_path)
+
+
+def _bump(path, content: str) -> None:
+    st = path.stat()
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_system_prompt_is_cached_while_workspace_unchanged(builder) -> None:
+    first = builder.build_system_prompt()
+    second = builder.build_system_prompt()
+
+    assert first is second
+    assert builder.prompt_cache_stats == {"hits": 1, "misses": 1}
+
+
+def test_system_prompt_rebuilt_when_bootstrap_file_changes(builder, tmp_path) -> None:
+    builder.build_system_prompt()
+    _bump(tmp_path / "AGENTS.md", "be very nice")
+
+    prompt = builder.build_system_prompt()
+
+    assert "be very nice" in prompt
+    assert builder.prompt_cache_stats["misses"] == 2
+
+
+def test_file_edited_during_render_is_picked_up_next_time(builder, tmp_path, monkeypatch) -> None:
+    render = builder._render_system_prompt
+
+    def render_then_edit(skill_names):
+        prompt = render(skill_names)
+        _bump(tmp_path / "AGENTS.md", "edited mid-render")
+        return prompt
+
+    monkeypatch.setattr(builder, "_render_system_prompt", render_then_edit)
+    assert "be nice" in builder.build_system_prompt()
+    monkeypatch.setattr(builder, "_render_system_prompt", render)
+
+    assert "edited mid-render" in builder.build_system_prompt()
+
+
+def test_system_prompt_rebuilt_when_bootstrap_file_created(builder, tmp_path) -> None:
+    builder.build_system_prompt()
+    (tmp_path / "USER.md").write_text("likes tea", encoding="utf-8")
+
+    assert "likes tea" in builder.build_system_prompt()
+
+
+def test_system_prompt_rebuilt_when_skill_added(builder, tmp_path) -> None:
+    builder.build_system_prompt()
+    skill_dir = tmp_path / "skills" / "brand-new"
+    skill_dir.mkdir(parents=True)
+    (skill_dir / "SKILL.md").write_text(
+        "---\ndescription: freshly added\n---\nbody", encoding="utf-8"
+    )
+
+    assert "freshly added" in builder.build_system_prompt()
+
+
+def test_system_prompt_is_stable_across_minutes_and_chats(builder) -> None:
+    first = builder.build_messages([], "hi", channel="dingtalk", chat_id="alice")
+    FrozenDateTime.current = datetime(2026, 3, 1, 9, 31)
+    second = builder.build_messages([], "hi", channel="telegram", chat_id="bob")
+
+    assert first[0] == second[0]
+    assert "alice" not in first[0]["content"] and "09:30" not in first[0]["content"]
+    assert builder.prompt_cache_stats == {"hits": 1, "misses": 1}
+
+
+def test_runtime_context_leads_latest_user_message(builder) -> None:
+    history = [{"role": "user", "content": "earlier"}, {"role": "assistant", "content": "ok"}]
+    messages = builder.build_messages(history, "hello", channel="dingtalk", chat_id="alice")
+
+    assert messages[1:3] == history
+    content = messages[-1]["content"]
+    assert content.startswith("[Runtime Context]\nCurrent Time: 2026-03-01 09:30 (Sunday)")
+    assert "Channel: dingtalk\nChat ID: alice" in content
+    assert content.endswith("\n\nhello")
+
+
+def test_token_report_splits_prompt_sections(builder) -> None:
+    history = [{"role": "user", "content": "x" * 400}, {"role": "assistant", "content": "ok"}]
+    messages = builder.build_messages(history, "hello")
+    tools = [{"type": "function", "function": {"name": "t", "description": "d" * 100}}]
+
+    report = builder.token_report(messages, "gpt-4o", tools)
+
+    assert report["history"] == 104 + 5
+    assert report["system"] > 0 and report["current"] > 0 and report["tools"] > 25
+    assert report["total"] == sum(v for k, v in report.items() if k != "total")
@@ -0,0 +1,171 @@
+import asyncio
+import time
+from typing import Any
+
+import pytest
+
+from nanobot.agent import usage
+from nanobot.providers import litellm_provider
+from nanobot.providers.hedging import HedgePolicy, Hedger, LatencyTracker
+from nanobot.providers.limiter import Priority, llm_priority
+from nanobot.providers.litellm_provider import LiteLLMProvider
+from nanobot.providers.registry import find_hedge_partner
+
+
+def test_latency_percentile_and_delay_clamping() -> None:
+    tracker = LatencyTracker(window=100)
+    for i in range(1, 101):
+        tracker.observe(i / 10)
+    assert tracker.percentile(0.95) == 9.5
+    assert tracker.percentile(0.5) == 5.0
+
+    hedger = Hedger(HedgePolicy(percentile=0.9, min_delay=0.5, max_delay=3.0, initial_delay=2.0, min_samples=5))
+    assert hedger.delay("m") == 2.0  # not enough samples yet
+    for seconds in (0.1, 0.1, 0.2, 0.2, 0.3):
+        hedger.observe("m", seconds)
+    assert hedger.delay("m") == 0.5  # clamped to min_delay
+    for _ in range(50):
+        hedger.observe("m", 10.0)
+    assert hedger.delay("m") == 3.0  # clamped to max_delay
+
+
+def test_budget_caps_hedged_fraction() -> None:
+    hedger = Hedger(HedgePolicy(budget=0.1))
+    granted = 0
+    for _ in range(1000):
+        hedger.record_call()
+        granted += hedger.try_hedge()
+    assert granted <= 0.1 * 1000 + 1
+
+
+async def test_race_hedges_a_stalled_primary_and_cancels_it() -> None:
+    hedger = Hedger(HedgePolicy(initial_delay=0.05, min_delay=0.0))
+    primary_cancelled = asyncio.Event()
+
+    async def stalled() -> str:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            primary_cancelled.set()
+            raise
+        return "primary"
+
+    async def fast() -> str:
+        return "hedge"
+
+    result, hedge_won = await hedger.race("m", stalled, fast)
+
+    assert (result, hedge_won) == ("hedge", True)
+    assert primary_cancelled.is_set()
+    assert hedger.stats()["hedged"] == 1
+
+
+async def test_race_does_not_hedge_fast_or_failing_primary() -> None:
+    hedger = Hedger(HedgePolicy(initial_delay=0.5))
+    started = []
+
+    async def fast() -> str:
+        return "primary"
+
+    async def failing() -> str:
+        raise ValueError("boom")
+
+    async def hedge() -> str:
+        started.append(True)
+        return "hedge"
+
+    assert await hedger.race("m", fast, hedge) == ("primary", False)
+    with pytest.raises(ValueError):
+        await hedger.race("m", failing, hedge)
+    assert not started
+
+
+def test_find_hedge_partner_pairs_gateways_with_direct_providers() -> None:
+    spec, model = find_hedge_partner("anthropic/claude-sonnet-4", "openrouter", ["openrouter", "anthropic"])
+    assert (spec.name, model) == ("anthropic", "claude-sonnet-4")
+
+    spec, model = find_hedge_partner("deepseek-chat", "deepseek", ["deepseek", "openrouter"])
+    assert (spec.name, model) == ("openrouter", "deepseek/deepseek-chat")
+
+    assert find_hedge_partner("anthropic/claude-sonnet-4", "openrouter", ["openrouter"]) is None
+    assert find_hedge_partner("llama-3", "vllm", ["vllm", "openrouter"]) is None
+
+
+@pytest.fixture
+def stalling_upstream(tmp_path, monkeypatch):
+    """acompletion that delays its first byte for selected models."""
+    monkeypatch.setattr(usage, "_usage_file", tmp_path / "usage.jsonl")
+    stalls: dict[str, float] = {}
+    calls: list[str] = []
+    original = litellm_provider.acompletion
+
+    async def fake_acompletion(**kwargs: Any):
+        calls.append(kwargs["model"])
+        await asyncio.sleep(stalls.get(kwargs["model"], 0))
+        return await original(mock_response=f"from {kwargs['model']}", **kwargs)
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    return stalls, calls
+
+
+def _hedged_provider() -> LiteLLMProvider:
+    provider = LiteLLMProvider(default_model="gpt-4o")
+    provider.set_hedge(Hedger(HedgePolicy(initial_delay=0.05, min_delay=0.0)), model="gpt-4o-mini")
+    return provider
+
+
+async def test_chat_takes_hedge_when_primary_stalls(stalling_upstream) -> None:
+    stalls, calls = stalling_upstream
+    stalls["gpt-4o"] = 5
+    provider = _hedged_provider()
+
+    response = await provider.chat([{"role": "user", "content": "hi"}])
+
+    assert response.content == "from gpt-4o-mini"
+    assert calls == ["gpt-4o", "gpt-4o-mini"]
+
+
+async def test_stream_hedges_on_first_byte(stalling_upstream) -> None:
+    stalls, calls = stalling_upstream
+    stalls["gpt-4o"] = 5
+    provider = _hedged_provider()
+
+    chunks = [c async for c in provider.chat_stream([{"role": "user", "content": "hi"}])]
+
+    assert "".join(c.delta for c in chunks) == "from gpt-4o-mini"
+    assert chunks[-1].response.content == "from gpt-4o-mini"
+
+
+async def test_background_calls_are_not_hedged(stalling_upstream) -> None:
+    stalls, calls = stalling_upstream
+    stalls["gpt-4o"] = 0.2
+    provider = _hedged_provider()
+
+    with llm_priority(Priority.BACKGROUND):
+        response = await provider.chat([{"role": "user", "content": "hi"}])
+
+    assert response.content == "from gpt-4o"
+    assert calls == ["gpt-4o"]
+
+
+async def test_hedge_win_frees_the_primarys_half_open_probe(stalling_upstream) -> None:
+    stalls, _ = stalling_upstream
+    provider = LiteLLMProvider(default_model="gpt-4o")
+    provider.set_hedge(Hedger(HedgePolicy(initial_delay=0.05, min_delay=0.0, budget=1.0)), model="gpt-4o-mini")
+    (_, _, breaker), = provider._iter_upstreams("gpt-4o")
+    breaker.failures, breaker.opened_at = 3, time.monotonic() - breaker.cooldown_s - 1
+
+    stalls["gpt-4o"] = 5
+    for call in (
+        provider.chat([{"role": "user", "content": "hi"}]),
+        _last(provider.chat_stream([{"role": "user", "content": "hi"}])),
+    ):
+        response = await call
+        assert response.content == "from gpt-4o-mini"
+        # The primary may be probed again rather than staying half-open forever
+        assert breaker.allow()
+        breaker.release()
+
+
+async def _last(stream):
+    return [c async for c in stream][-1].response
@@ -0,0 +1,40 @@
+from nanobot.providers.litellm_provider import LiteLLMProvider
+
+
+def test_cache_control_marks_system_and_latest_user_message() -> None:
+    messages = [
+        {"role": "system", "content": "static prompt"},
+        {"role": "user", "content": "old question"},
+        {"role": "assistant", "content": "old answer"},
+        {"role": "user", "content": [{"type": "image_url", "image_url": {"url": "x"}}, {"type": "text", "text": "now"}]},
+        {"role": "assistant", "content": "", "tool_calls": []},
+        {"role": "tool", "tool_call_id": "1", "name": "t", "content": "result"},
+    ]
+
+    marked = LiteLLMProvider._apply_cache_control(messages)
+
+    assert marked[0]["content"] == [
+        {"type": "text", "text": "static prompt", "cache_control": {"type": "ephemeral"}}
+    ]
+    assert marked[1] == messages[1]
+    assert marked[3]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in marked[3]["content"][0]
+    assert marked[5] == messages[5]
+    # Inputs are left untouched
+    assert messages[0]["content"] == "static prompt"
+    assert "cache_control" not in messages[3]["content"][-1]
+
+
+def test_cache_control_only_for_supporting_providers() -> None:
+    direct = LiteLLMProvider(default_model="anthropic/claude-sonnet-4-5")
+    assert direct._supports_cache_control("claude-sonnet-4-5")
+    assert not direct._supports_cache_control("deepseek/deepseek-chat")
+
+    openrouter = LiteLLMProvider(api_key="sk-or-test", default_model="anthropic/claude-sonnet-4-5")
+    assert openrouter._supports_cache_control("openrouter/anthropic/claude-sonnet-4-5")
+    assert not openrouter._supports_cache_control("openrouter/z-ai/glm-5-turbo")
+
+    aihubmix = LiteLLMProvider(
+        api_key="k", api_base="https://aihubmix.com/v1", default_model="claude-sonnet-4-5"
+    )
+    assert not aihubmix._supports_cache_control("openai/claude-sonnet-4-5")
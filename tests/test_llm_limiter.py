@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any
+
+from nanobot.agent import usage
+from nanobot.providers import litellm_provider
+from nanobot.providers.limiter import LLMLimiter, ModelLimits, Priority, llm_priority
+from nanobot.providers.litellm_provider import LiteLLMProvider
+
+
+async def _call(limiter: LLMLimiter, order: list[str], name: str, hold: asyncio.Event, **kwargs: Any) -> None:
+    async with limiter.acquire("m", 10, **kwargs):
+        order.append(name)
+        await hold.wait()
+
+
+async def test_concurrency_cap_admits_interactive_before_background() -> None:
+    limiter = LLMLimiter(default=ModelLimits(max_concurrency=1))
+    order: list[str] = []
+    hold = asyncio.Event()
+
+    tasks = [asyncio.create_task(_call(limiter, order, "first", hold))]
+    await asyncio.sleep(0)
+    with llm_priority(Priority.BACKGROUND):
+        tasks.append(asyncio.create_task(_call(limiter, order, "cron", hold)))
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(_call(limiter, order, "user", hold)))
+    await asyncio.sleep(0)
+
+    assert order == ["first"]
+    assert limiter.stats()["m"] == {"in_flight": 1, "queued": 2}
+    hold.set()
+    await asyncio.gather(*tasks)
+    assert order == ["first", "user", "cron"]
+
+
+async def test_rpm_bucket_delays_excess_requests() -> None:
+    limiter = LLMLimiter(models={"m": ModelLimits(rpm=60)})  # one per second
+    done = asyncio.Event()
+    done.set()
+    order: list[str] = []
+
+    for name in ("a", "b"):
+        await _call(limiter, order, name, done)
+    limiter._states["m"].rpm.tokens = 0
+    late = asyncio.create_task(_call(limiter, order, "c", done))
+    await asyncio.sleep(0.2)
+    assert order == ["a", "b"]
+    await asyncio.wait_for(late, timeout=2)
+    assert order == ["a", "b", "c"]
+
+
+async def test_cancelled_waiter_leaves_queue() -> None:
+    limiter = LLMLimiter(default=ModelLimits(max_concurrency=1))
+    hold = asyncio.Event()
+    order: list[str] = []
+    holder = asyncio.create_task(_call(limiter, order, "a", hold))
+    waiter = asyncio.create_task(_call(limiter, order, "b", hold))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(0)
+
+    hold.set()
+    await holder
+    assert limiter.stats()["m"] == {"in_flight": 0, "queued": 0}
+
+
+async def test_provider_reconciles_tpm_with_reported_usage(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(usage, "_usage_file", tmp_path / "usage.jsonl")
+    original = litellm_provider.acompletion
+
+    async def fake_acompletion(**kwargs: Any):
+        return await original(mock_response="ok", **kwargs)
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    limiter = LLMLimiter(default=ModelLimits(tpm=600))  # slow refill: 10 tokens/s
+    provider = LiteLLMProvider(default_model="gpt-4o", limiter=limiter)
+
+    response = await provider.chat([{"role": "user", "content": "hi"}], max_tokens=4000)
+
+    used = response.usage["total_tokens"]
+    available = limiter.stats()["gpt-4o"]["tpm_available"]
+    # ~1000 tokens were reserved up front (max_tokens allowance); only actual usage stays charged
+    assert abs(available - (600 - used)) <= 5
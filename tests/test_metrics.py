@@ -0,0 +1,97 @@
+import asyncio
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.replay import ReplayProvider
+from nanobot.utils import metrics
+
+
+async def _get(port: int, path: str) -> tuple[str, str]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    raw = (await reader.read()).decode()
+    writer.close()
+    head, _, body = raw.partition("\r\n\r\n")
+    return head.split("\r\n")[0], body
+
+
+def test_histogram_and_counter_render_prometheus_text() -> None:
+    registry = metrics.Registry()
+    hist = registry.register(metrics.Histogram("t_seconds", "Latency.", ("model",), buckets=(0.1, 1.0)))
+    counter = registry.register(metrics.Counter("t_total", "Things.", ("kind",)))
+    registry.gauge("t_depth", "Depth.", lambda: {("in",): 3}, ("queue",))
+    hist.observe(0.05, model="a")
+    hist.observe(0.5, model="a")
+    hist.observe(5, model="a")
+    counter.inc(2, kind='say "hi"')
+
+    text = registry.render()
+
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{model="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{model="a",le="1"} 2' in text
+    assert 't_seconds_bucket{model="a",le="+Inf"} 3' in text
+    assert 't_seconds_count{model="a"} 3' in text
+    assert 't_total{kind="say \\"hi\\""} 2' in text
+    assert 't_depth{queue="in"} 3' in text
+
+
+async def test_endpoint_serves_metrics_and_health(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    provider = ReplayProvider(script=[
+        {"tool_calls": [{"name": "list_dir", "arguments": {"path": str(workspace)}}]},
+        {"content": "done"},
+    ], default_model="replay/metrics")
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=workspace, model="replay/metrics")
+    await loop.process_direct("hi", session_key="cli:metrics")
+
+    healthy = {"ok": True}
+    server = await metrics.serve("127.0.0.1", 0, health=lambda: (healthy["ok"], "ok" if healthy["ok"] else "down"))
+    port = server.sockets[0].getsockname()[1]
+    try:
+        status, body = await _get(port, "/metrics")
+        assert status.endswith("200 OK")
+        assert 'nanobot_llm_request_seconds_count{model="replay/metrics"} 2' in body
+        assert 'nanobot_tool_seconds_bucket{tool="list_dir",le="+Inf"}' in body
+
+        assert (await _get(port, "/healthz")) == ("HTTP/1.1 200 OK", "ok\n")
+        healthy["ok"] = False
+        assert (await _get(port, "/healthz"))[0] == "HTTP/1.1 503 Service Unavailable"
+        assert (await _get(port, "/nope"))[0] == "HTTP/1.1 404 Not Found"
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def test_gateway_gauges_and_prompt_cache_counters_render(tmp_path, monkeypatch) -> None:
+    from nanobot.cli.commands import _register_gateway_metrics
+    from nanobot.cron.service import CronService
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    bus = MessageBus()
+    loop = AgentLoop(bus=bus, provider=ReplayProvider(script=[]), workspace=workspace)
+    loop.sessions.get_or_create("cli:a")
+    loop.sessions.get_or_create("cli:b")
+    hits = metrics.PROMPT_CACHE.value(result="hit")
+    loop.context.build_system_prompt()
+    loop.context.build_system_prompt()
+
+    _register_gateway_metrics(bus, loop, loop.sessions, CronService(tmp_path / "cron.json"))
+    try:
+        text = metrics.REGISTRY.render()
+    finally:
+        for name in ("nanobot_bus_queue_depth", "nanobot_turns_inflight",
+                     "nanobot_session_cache_size", "nanobot_cron_lag_seconds"):
+            metrics.REGISTRY.unregister(name)
+
+    assert "nanobot_session_cache_size 2" in text
+    assert 'nanobot_bus_queue_depth{queue="inbound"} 0' in text
+    assert "nanobot_turns_inflight 0" in text
+    assert "nanobot_cron_lag_seconds 0" in text
+    assert metrics.PROMPT_CACHE.value(result="hit") == hits + 1
+    assert 'nanobot_prompt_cache_lookups_total{result="miss"}' in text
@@ -0,0 +1,158 @@
+import asyncio
+import time
+from typing import Any
+
+import httpx
+import litellm
+import pytest
+
+from nanobot.agent import usage
+from nanobot.providers import litellm_provider
+from nanobot.providers.litellm_provider import LiteLLMProvider
+from nanobot.providers.resilience import CircuitBreaker, RetryPolicy, retry_after_seconds
+
+
+def _rate_limited(retry_after: str | None = None) -> litellm.RateLimitError:
+    headers = {"retry-after": retry_after} if retry_after else {}
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://x"))
+    return litellm.RateLimitError("slow down", llm_provider="openai", model="m", response=response)
+
+
+def _unavailable() -> litellm.ServiceUnavailableError:
+    response = httpx.Response(503, request=httpx.Request("POST", "https://x"))
+    return litellm.ServiceUnavailableError("down", llm_provider="openai", model="m", response=response)
+
+
+def test_retry_policy_honors_retry_after_and_caps_jitter() -> None:
+    policy = RetryPolicy(max_retries=2, base_delay=1.0, max_delay=5.0)
+
+    assert retry_after_seconds(_rate_limited("3")) == 3.0
+    assert policy.delay(1, _rate_limited("3")) == 3.0
+    assert policy.delay(1, _rate_limited("120")) is None  # fail over instead of waiting
+    assert 0 <= policy.delay(2, _unavailable()) <= 2.0
+    assert policy.delay(3, _unavailable()) is None
+
+
+def test_circuit_breaker_opens_then_probes_after_cooldown(monkeypatch) -> None:
+    clock = [100.0]
+    monkeypatch.setattr("nanobot.providers.resilience.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_s=30)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock[0] += 31
+    assert breaker.allow()  # half-open probe
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock[0] += 31
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and not breaker.is_open
+
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    """Scripted acompletion: per model, an exception to always raise or a list to raise first."""
+    monkeypatch.setattr(usage, "_usage_file", tmp_path / "usage.jsonl")
+    script: dict[str, Exception | list[Exception]] = {}
+    calls: list[str] = []
+    original = litellm_provider.acompletion
+
+    async def fake_acompletion(**kwargs: Any):
+        calls.append(kwargs["model"])
+        errors = script.get(kwargs["model"], [])
+        if isinstance(errors, Exception):
+            raise errors
+        if errors:
+            raise errors.pop(0)
+        return await original(mock_response=f"from {kwargs['model']}", **kwargs)
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    return script, calls
+
+
+def _provider(**kwargs: Any) -> LiteLLMProvider:
+    return LiteLLMProvider(
+        default_model="gpt-4o", retry=RetryPolicy(max_retries=2, base_delay=0.0), **kwargs
+    )
+
+
+async def test_chat_retries_transient_errors(upstream) -> None:
+    script, calls = upstream
+    script["gpt-4o"] = [_rate_limited("0"), _unavailable()]
+
+    response = await _provider().chat([{"role": "user", "content": "hi"}])
+
+    assert response.content == "from gpt-4o"
+    assert calls == ["gpt-4o"] * 3
+
+
+async def test_chat_falls_back_and_trips_breaker(upstream) -> None:
+    script, calls = upstream
+    script["gpt-4o"] = _unavailable()
+    provider = _provider(breaker_failures=2, breaker_cooldown_s=60)
+    provider.add_fallback("gpt-4o-mini")
+
+    for _ in range(3):
+        response = await provider.chat([{"role": "user", "content": "hi"}])
+        assert response.content == "from gpt-4o-mini"
+
+    # Two turns of 3 attempts each trip the breaker; the third goes straight to the fallback
+    assert calls.count("gpt-4o") == 6
+    assert calls.count("gpt-4o-mini") == 3
+
+
+async def test_chat_returns_error_when_chain_exhausted(upstream) -> None:
+    script, calls = upstream
+    script["gpt-4o"] = litellm.AuthenticationError("bad key", llm_provider="openai", model="gpt-4o")
+
+    response = await _provider().chat([{"role": "user", "content": "hi"}])
+
+    assert response.finish_reason == "error"
+    assert "bad key" in response.content
+    assert calls == ["gpt-4o"]  # not retryable
+
+
+async def test_stream_falls_back_before_first_delta(upstream) -> None:
+    script, calls = upstream
+    script["gpt-4o"] = _unavailable()
+    provider = _provider()
+    provider.add_fallback("gpt-4o-mini")
+
+    chunks = [c async for c in provider.chat_stream([{"role": "user", "content": "hi"}])]
+
+    assert "".join(c.delta for c in chunks) == "from gpt-4o-mini"
+    assert chunks[-1].response.content == "from gpt-4o-mini"
+
+
+async def test_cancelled_probe_is_released(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(usage, "_usage_file", tmp_path / "usage.jsonl")
+    started = asyncio.Event()
+
+    async def hanging_acompletion(**kwargs: Any):
+        started.set()
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(litellm_provider, "acompletion", hanging_acompletion)
+    provider = _provider()
+    (_, _, breaker), = provider._iter_upstreams("gpt-4o")
+
+    for call in (
+        lambda: provider.chat([{"role": "user", "content": "hi"}]),
+        lambda: anext(provider.chat_stream([{"role": "user", "content": "hi"}])),
+    ):
+        breaker.failures, breaker.opened_at = 3, time.monotonic() - breaker.cooldown_s - 1
+        started.clear()
+        task = asyncio.create_task(call())
+        await started.wait()
+        assert not breaker.allow()  # the cancelled call holds the probe
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert breaker.allow()
+        breaker.release()
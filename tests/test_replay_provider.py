@@ -0,0 +1,109 @@
+import json
+import random
+from typing import Any
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.providers.replay import (
+    Latency,
+    RecordingProvider,
+    ReplayProvider,
+    load_recordings,
+    load_replay_provider,
+)
+
+
+class CannedProvider(LLMProvider):
+    async def chat(self, messages: list[dict[str, Any]], **kwargs: Any) -> LLMResponse:
+        return LLMResponse(content=f"live reply {len(messages)}", usage={"prompt_tokens": 5, "completion_tokens": 3})
+
+    def get_default_model(self) -> str:
+        return "live-model"
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+def test_latency_parse_and_sample() -> None:
+    rng = random.Random(1)
+    assert Latency.parse("0.25").sample(rng) == 0.25
+    lognormal = Latency.parse("lognormal:0.8,0.5,0.01")
+    assert (lognormal.kind, lognormal.value, lognormal.spread, lognormal.per_token) == ("lognormal", 0.8, 0.5, 0.01)
+    samples = [Latency.parse("uniform:1,0.5").sample(rng) for _ in range(100)]
+    assert all(0.5 <= s <= 1.5 for s in samples)
+    with pytest.raises(ValueError):
+        Latency("weibull", 1.0).sample(rng)
+
+
+async def test_script_drives_agent_loop_through_tool_calls(home) -> None:
+    workspace = home / "workspace"
+    workspace.mkdir()
+    (workspace / "notes.txt").write_text("hello")
+    provider = ReplayProvider(script=[
+        {"tool_calls": [{"name": "list_dir", "arguments": {"path": str(workspace)}}]},
+        {"content": "done: {user}"},
+    ])
+    seen: list[list[dict[str, Any]]] = []
+    original = provider.chat
+
+    async def chat(messages: list[dict[str, Any]], **kwargs: Any) -> LLMResponse:
+        seen.append(messages)
+        return await original(messages, **kwargs)
+
+    provider.chat = chat
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=workspace)
+
+    reply = await loop.process_direct("what is here?", session_key="cli:test")
+
+    assert reply.startswith("done: ") and "what is here?" in reply
+    assert provider.calls == 2
+    tool_results = [m["content"] for m in seen[1] if m["role"] == "tool"]
+    assert tool_results and "notes.txt" in tool_results[0]
+
+
+async def test_recording_round_trips_through_replay(tmp_path) -> None:
+    path = tmp_path / "calls.jsonl"
+    recorder = RecordingProvider(CannedProvider(), path)
+    messages = [{"role": "user", "content": "hi"}]
+
+    live = await recorder.chat(messages)
+    other = await recorder.chat([{"role": "user", "content": "other"}])
+
+    entries = load_recordings(path)
+    assert [e["user"] for e in entries] == ["hi", "other"]
+    replay = load_replay_provider(path)
+    assert (await replay.chat(messages)).content == live.content  # exact match
+    assert (await replay.chat([{"role": "user", "content": "unseen"}])).content == live.content  # cycles
+    assert (await replay.chat([{"role": "user", "content": "unseen"}])).content == other.content
+
+
+async def test_stream_splits_content_and_estimates_usage(tmp_path) -> None:
+    script = tmp_path / "script.json"
+    script.write_text(json.dumps({"script": [{"content": "one two three"}], "model": "fake"}))
+    provider = load_replay_provider(script, latency=Latency(per_token=0.001))
+
+    chunks = [c async for c in provider.chat_stream([{"role": "user", "content": "hi"}])]
+
+    assert "".join(c.delta for c in chunks) == "one two three"
+    assert chunks[-1].response.usage["prompt_tokens"] > 0
+    assert provider.get_default_model() == "fake"
+
+
+async def test_recordings_match_across_a_clock_change(tmp_path) -> None:
+    def turn(text: str, time: str) -> list[dict[str, Any]]:
+        return [{"role": "user", "content": f"[Runtime Context]\nCurrent Time: {time}\n\n{text}"}]
+
+    path = tmp_path / "calls.jsonl"
+    recorder = RecordingProvider(CannedProvider(), path)
+    await recorder.chat(turn("hi", "2026-01-05 09:00 (Monday)"))
+    other = await recorder.chat(turn("other", "2026-01-05 09:00 (Monday)") * 2)
+
+    replay = load_replay_provider(path)
+    # An exact match, not the next entry in the cycle
+    assert (await replay.chat(turn("other", "2026-03-01 17:42 (Sunday)") * 2)).content == other.content
@@ -0,0 +1,136 @@
+import json
+from typing import Any
+
+import pytest
+
+from nanobot.agent import usage
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.tools.registry import ToolDefinitions
+from nanobot.bus.queue import MessageBus
+from nanobot.providers import litellm_provider
+from nanobot.providers.base import LLMResponse, ToolCallRequest
+from nanobot.providers.litellm_provider import LiteLLMProvider
+from nanobot.providers.response_cache import ResponseCache, llm_cache
+
+MESSAGES = [{"role": "user", "content": "daily briefing"}]
+
+
+@pytest.fixture
+def calls(tmp_path, monkeypatch):
+    monkeypatch.setattr(usage, "_usage_file", tmp_path / "usage.jsonl")
+    original = litellm_provider.acompletion
+    seen: list[str] = []
+
+    async def fake_acompletion(**kwargs: Any):
+        seen.append(kwargs["model"])
+        return await original(mock_response="briefing text", **kwargs)
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    return seen
+
+
+@pytest.fixture
+def provider(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.db")
+    yield LiteLLMProvider(default_model="gpt-4o", response_cache=cache)
+    cache.close()
+
+
+async def test_temperature_zero_calls_are_cached_and_logged_free(provider, calls, tmp_path) -> None:
+    first = await provider.chat(MESSAGES, temperature=0)
+    second = await provider.chat(MESSAGES, temperature=0)
+
+    assert calls == ["gpt-4o"]
+    assert second == first
+    usage.flush()
+    records = [json.loads(line) for line in (tmp_path / "usage.jsonl").read_text().splitlines()]
+    assert "cached" not in records[0]
+    assert records[1]["cached"] is True and records[1]["cost"] == 0
+    assert records[1]["saved"] == records[0]["cost"] > 0
+    assert records[1]["in"] == records[0]["in"]
+
+
+async def test_sampling_calls_bypass_cache_unless_opted_in(provider, calls) -> None:
+    await provider.chat(MESSAGES, temperature=0.7)
+    await provider.chat(MESSAGES, temperature=0.7)
+    assert len(calls) == 2
+
+    with llm_cache():
+        await provider.chat(MESSAGES, temperature=0.7)
+        await provider.chat(MESSAGES, temperature=0.7)
+    assert len(calls) == 3
+
+    with llm_cache(False):
+        await provider.chat(MESSAGES, temperature=0)
+        await provider.chat(MESSAGES, temperature=0)
+    assert len(calls) == 5
+
+
+def test_store_expires_and_evicts_least_recently_used(tmp_path, monkeypatch) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr("nanobot.providers.response_cache.time.time", lambda: clock[0])
+    cache = ResponseCache(tmp_path / "responses.db", max_entries=2, ttl_s=60)
+    response = LLMResponse(content=None, tool_calls=[ToolCallRequest(id="1", name="t", arguments={"a": 1})])
+
+    for key in ("a", "b"):
+        clock[0] += 1
+        cache.put(key, response, "m", 0.1)
+    clock[0] += 1
+    assert cache.get("a")[0].tool_calls[0].arguments == {"a": 1}  # a is now most recent
+    clock[0] += 1
+    cache.put("c", response, "m", 0.1)
+    assert cache.get("b") is None and len(cache) == 2
+
+    clock[0] += 61
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.close()
+
+
+async def test_runtime_clock_does_not_change_the_key(provider, calls) -> None:
+    def turn(time: str) -> list[dict]:
+        runtime = f"[Runtime Context]\nCurrent Time: {time}\nChannel: cli\nChat ID: direct"
+        return [{"role": "user", "content": f"{runtime}\n\ndaily briefing"}]
+
+    with llm_cache():
+        await provider.chat(turn("2026-01-05 09:00 (Monday)"))
+        await provider.chat(turn("2026-01-06 09:00 (Tuesday)"))
+    assert len(calls) == 1
+
+    other_chat = [{"role": "user", "content": "[Runtime Context]\nChannel: cli\nChat ID: other\n\ndaily briefing"}]
+    assert ResponseCache.make_key("m", other_chat, None, 0, 1) != ResponseCache.make_key("m", turn("x"), None, 0, 1)
+
+
+async def test_unreadable_entry_degrades_to_a_miss(provider, calls) -> None:
+    await provider.chat(MESSAGES, temperature=0)
+    with provider.response_cache._conn as conn:
+        conn.execute("UPDATE responses SET response = 'not json'")
+
+    response = await provider.chat(MESSAGES, temperature=0)
+    assert response.content == "briefing text"
+    assert len(calls) == 2 and provider.response_cache.misses == 2
+
+
+async def test_repeated_heartbeat_is_answered_from_cache(provider, calls, tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=workspace)
+
+    with llm_cache():
+        first = await loop.process_direct("check the heartbeat tasks", session_key="heartbeat")
+        second = await loop.process_direct("check the heartbeat tasks", session_key="heartbeat")
+
+    assert first == second == "briefing text"
+    assert calls == ["gpt-4o"] and provider.response_cache.hits == 1
+    assert loop.sessions.get_or_create("cli:direct").messages == []  # Nothing saved
+
+
+def test_key_reuses_the_cached_tools_serialization() -> None:
+    tools = [{"type": "function", "function": {"name": "a", "parameters": {"type": "object"}}}]
+    cached = ToolDefinitions(tools, version=3)
+    key = ResponseCache.make_key("m", MESSAGES, cached, 0, 1)
+
+    assert "json" in vars(cached)  # Serialized once, kept for later calls
+    assert key == ResponseCache.make_key("m", MESSAGES, tools, 0, 1)
+    assert key != ResponseCache.make_key("m", MESSAGES, None, 0, 1)
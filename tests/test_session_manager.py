@@ -0,0 +1,304 @@
+import json
+
+import pytest
+
+from nanobot.session.backends import (
+    JsonlSessionBackend,
+    SqliteSessionBackend,
+    migrate_jsonl_to_sqlite,
+)
+from nanobot.session.manager import Session, SessionManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return SessionManager(tmp_path / "workspace", compact_after=3)
+
+
+def _records(manager: SessionManager, key: str) -> list[dict]:
+    path = manager.backend._get_session_path(key)
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def _reload(manager: SessionManager, key: str) -> Session:
+    manager._drop(key)
+    return manager.get_or_create(key)
+
+
+def test_save_appends_only_new_messages(manager) -> None:
+    session = manager.get_or_create("test:1")
+    session.add_message("user", "hi")
+    manager.save(session)
+    path = manager.backend._get_session_path("test:1")
+    first = path.read_bytes()
+
+    session.add_message("assistant", "hello")
+    session.metadata["k"] = "v"
+    manager.save(session)
+
+    data = path.read_bytes()
+    assert data.startswith(first)
+    appended = [json.loads(line) for line in data[len(first):].splitlines()]
+    assert [r.get("content") for r in appended] == ["hello", None]
+    assert appended[-1]["_type"] == "metadata"
+
+    loaded = _reload(manager, "test:1")
+    assert [m["content"] for m in loaded.messages] == ["hi", "hello"]
+    assert loaded.metadata == {"k": "v"}
+
+
+def test_save_compacts_after_threshold(manager) -> None:
+    session = manager.get_or_create("test:1")
+    for i in range(5):
+        session.add_message("user", f"m{i}")
+        manager.save(session)
+
+    records = _records(manager, "test:1")
+    # one rewrite at the start, 3 appends, then a compaction on the 5th save
+    assert sum(r.get("_type") == "metadata" for r in records) == 1
+    assert [r["content"] for r in records[1:]] == [f"m{i}" for i in range(5)]
+
+
+def test_clear_rewrites_file(manager) -> None:
+    session = manager.get_or_create("test:1")
+    session.add_message("user", "secret")
+    manager.save(session)
+    session.add_message("user", "more")
+    manager.save(session)
+
+    session.clear()
+    session.add_message("user", "fresh")
+    manager.save(session)
+
+    assert [m["content"] for m in _reload(manager, "test:1").messages] == ["fresh"]
+
+
+def test_torn_trailing_record_is_dropped_and_repaired(manager) -> None:
+    session = manager.get_or_create("test:1")
+    session.add_message("user", "kept")
+    manager.save(session)
+    path = manager.backend._get_session_path("test:1")
+    with open(path, "a") as f:
+        f.write('{"role": "user", "content": "tru')
+
+    loaded = _reload(manager, "test:1")
+    assert [m["content"] for m in loaded.messages] == ["kept"]
+
+    loaded.add_message("assistant", "next")
+    manager.save(loaded)
+    assert [m["content"] for m in _reload(manager, "test:1").messages] == ["kept", "next"]
+
+
+def test_list_sessions_reads_latest_metadata(manager) -> None:
+    session = manager.get_or_create("test:1")
+    session.add_message("user", "hi")
+    manager.save(session)
+    session.add_message("user", "again")
+    manager.save(session)
+
+    (info,) = manager.list_sessions()
+    assert info["key"] == "test:1"
+    assert info["updated_at"] == session.updated_at.isoformat()
+
+
+def test_legacy_full_rewrite_file_still_loads(manager) -> None:
+    path = manager.backend._get_session_path("test:old")
+    path.write_text(
+        json.dumps({"_type": "metadata", "created_at": "2026-01-01T00:00:00",
+                    "updated_at": "2026-01-02T00:00:00", "metadata": {"a": 1}}) + "\n"
+        + json.dumps({"role": "user", "content": "old"}) + "\n"
+    )
+
+    loaded = _reload(manager, "test:old")
+    assert loaded.metadata == {"a": 1}
+    assert [m["content"] for m in loaded.messages] == ["old"]
+    assert manager.list_sessions()[0]["updated_at"] == "2026-01-02T00:00:00"
+
+
+def test_cache_evicts_least_recently_used_and_reloads(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    manager = SessionManager(tmp_path / "workspace", cache_max_entries=2)
+    a = manager.get_or_create("test:a")
+    a.add_message("user", "unsaved")  # flushed on eviction
+    manager.get_or_create("test:b")
+    manager.get_or_create("test:a")
+    manager.get_or_create("test:c")  # evicts b (least recently used)
+
+    assert list(manager._cache) == ["test:a", "test:c"]
+    manager.get_or_create("test:b")  # evicts a
+    assert "test:a" not in manager._cache
+
+    reloaded = manager.get_or_create("test:a")
+    assert reloaded is not a
+    assert [m["content"] for m in reloaded.messages] == ["unsaved"]
+    assert manager.cache_stats == {"size": 2, "messages": 1, "hits": 1, "misses": 5, "evictions": 3}
+
+
+def test_cache_bounds_total_messages(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    manager = SessionManager(tmp_path / "workspace", cache_max_messages=3)
+    for key in ("test:a", "test:b"):
+        session = manager.get_or_create(key)
+        session.add_message("user", "1")
+        session.add_message("assistant", "2")
+        manager.save(session)
+
+    assert list(manager._cache) == ["test:b"]
+    assert manager.cache_stats["messages"] == 2
+
+
+def test_cache_evicts_idle_sessions(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    manager = SessionManager(tmp_path / "workspace", cache_idle_ttl_s=60)
+    clock = [1000.0]
+    monkeypatch.setattr("nanobot.session.manager.time.monotonic", lambda: clock[0])
+
+    manager.get_or_create("test:old")
+    clock[0] += 61
+    manager.get_or_create("test:new")
+
+    assert list(manager._cache) == ["test:new"]
+    assert manager.cache_stats["evictions"] == 1
+
+
+@pytest.fixture
+def sqlite_manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    backend = SqliteSessionBackend(tmp_path / "sessions.db")
+    manager = SessionManager(tmp_path / "workspace", backend=backend, load_max_messages=3)
+    yield manager
+    manager.close()
+
+
+def test_sqlite_backend_uses_wal(sqlite_manager) -> None:
+    mode = sqlite_manager.backend._conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+
+def test_sqlite_loads_last_n_and_continues_sequence(sqlite_manager) -> None:
+    session = sqlite_manager.get_or_create("test:1")
+    for i in range(5):
+        session.add_message("user", f"m{i}")
+    session.metadata["k"] = "v"
+    sqlite_manager.save(session)
+
+    loaded = _reload(sqlite_manager, "test:1")
+    assert [m["content"] for m in loaded.messages] == ["m2", "m3", "m4"]
+    assert loaded._offset == 2 and loaded.metadata == {"k": "v"}
+
+    loaded.add_message("assistant", "m5")
+    sqlite_manager.save(loaded)
+    full = sqlite_manager.backend.load("test:1")
+    assert [m["content"] for m in full.messages] == [f"m{i}" for i in range(6)]
+
+
+def test_sqlite_clear_drops_unloaded_history(sqlite_manager) -> None:
+    session = sqlite_manager.get_or_create("test:1")
+    for i in range(5):
+        session.add_message("user", f"m{i}")
+    sqlite_manager.save(session)
+
+    loaded = _reload(sqlite_manager, "test:1")
+    loaded.clear()
+    loaded.add_message("user", "fresh")
+    sqlite_manager.save(loaded)
+
+    assert [m["content"] for m in sqlite_manager.backend.load("test:1").messages] == ["fresh"]
+
+
+def test_sqlite_rewrite_keeps_history_outside_the_loaded_window(sqlite_manager) -> None:
+    session = sqlite_manager.get_or_create("test:1")
+    for i in range(5):
+        session.add_message("user", f"m{i}")
+    sqlite_manager.save(session)
+
+    loaded = _reload(sqlite_manager, "test:1")
+    loaded.messages.pop()  # Shrinking the window forces a rewrite
+    loaded.messages[-1]["content"] = "m3-edited"
+    sqlite_manager.save(loaded)
+    loaded.add_message("assistant", "m5")
+    sqlite_manager.save(loaded)
+
+    full = sqlite_manager.backend.load("test:1")
+    assert [m["content"] for m in full.messages] == ["m0", "m1", "m2", "m3-edited", "m5"]
+    assert [m["content"] for m in _reload(sqlite_manager, "test:1").messages] == ["m2", "m3-edited", "m5"]
+
+
+def test_sqlite_lists_by_updated_at_and_deletes(sqlite_manager) -> None:
+    for key in ("test:a", "test:b", "test:c"):
+        session = sqlite_manager.get_or_create(key)
+        session.add_message("user", key)
+        sqlite_manager.save(session)
+
+    assert [s["key"] for s in sqlite_manager.list_sessions(limit=2)] == ["test:c", "test:b"]
+    assert sqlite_manager.delete("test:b")
+    assert not sqlite_manager.delete("test:b")
+    assert [s["key"] for s in sqlite_manager.list_sessions()] == ["test:c", "test:a"]
+
+
+def test_migrate_jsonl_to_sqlite(manager, tmp_path) -> None:
+    session = manager.get_or_create("feishu:ou_123")
+    session.add_message("user", "hi")
+    session.metadata["k"] = "v"
+    manager.save(session)
+    session.add_message("assistant", "hello")
+    manager.save(session)
+
+    target = SqliteSessionBackend(tmp_path / "sessions.db")
+    source = JsonlSessionBackend(manager.sessions_dir)
+    assert migrate_jsonl_to_sqlite(source, target) == (1, 0)
+    assert migrate_jsonl_to_sqlite(source, target) == (0, 1)
+
+    migrated = target.load("feishu:ou_123")
+    assert [m["content"] for m in migrated.messages] == ["hi", "hello"]
+    assert migrated.metadata == {"k": "v"}
+    assert migrated.updated_at == session.updated_at
+    target.close()
+
+
+def test_history_fills_token_budget_newest_first() -> None:
+    session = Session(key="test:1")
+    for i in range(10):
+        session.add_message("user", f"q{i} " + "x" * 36)  # ~14 tokens with overhead
+        session.add_message("assistant", f"a{i} " + "y" * 36)
+
+    history = session.get_history(max_messages=50, max_tokens=60, model="gpt-4o")
+
+    assert [m["content"][:2] for m in history] == ["q8", "a8", "q9", "a9"]
+
+
+def test_history_truncates_oversized_messages() -> None:
+    session = Session(key="test:1")
+    session.add_message("user", "paste: " + "z" * 8000)
+    session.add_message("assistant", "done")
+
+    history = session.get_history(max_tokens=1000, model="gpt-4o", max_message_tokens=200)
+
+    assert len(history) == 2
+    assert "tokens omitted" in history[0]["content"]
+    assert len(history[0]["content"]) < 1000
+
+
+def test_low_signal_flag_is_classified_once_and_persisted(manager) -> None:
+    session = manager.get_or_create("test:1")
+    session.add_message("user", "政策查询")
+    session.add_message("assistant", "查询中，请稍候")
+    session.add_message("user", "再试")
+    session.add_message("assistant", "结果如下：共 3 条")
+    manager.save(session)
+
+    records = [r for r in _records(manager, "test:1") if r.get("role") == "assistant"]
+    assert [r["low_signal"] for r in records] == [True, False]
+    assert [m["content"] for m in _reload(manager, "test:1").get_history()] == ["再试", "结果如下：共 3 条"]
+
+
+def test_legacy_messages_without_flag_are_classified_on_read() -> None:
+    session = Session(key="test:1")
+    session.messages = [
+        {"role": "user", "content": "q"},
+        {"role": "assistant", "content": "我正在从学者接口获取数据"},
+    ]
+
+    assert session.get_history() == []
+    assert session.messages[1]["low_signal"] is True
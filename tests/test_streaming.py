@@ -0,0 +1,207 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from nanobot.agent import usage
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.base import BaseChannel
+from nanobot.providers import litellm_provider
+from nanobot.providers.base import LLMProvider, LLMResponse, LLMStreamChunk, ToolCallRequest
+from nanobot.providers.litellm_provider import LiteLLMProvider
+
+
+class EditableChannel(BaseChannel):
+    name = "fake"
+    supports_streaming = True
+    stream_edit_interval = 0.0
+
+    def __init__(self) -> None:
+        super().__init__(config=None, bus=MessageBus())
+        self.events: list[tuple[str, str]] = []
+        self.edit_ok = True
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def send(self, msg: OutboundMessage) -> None:
+        self.events.append(("send", msg.content))
+
+    async def _stream_start(self, msg: OutboundMessage) -> Any:
+        self.events.append(("start", msg.content))
+        return "handle-1"
+
+    async def _stream_edit(self, handle: Any, msg: OutboundMessage) -> bool:
+        self.events.append(("edit", msg.content))
+        return self.edit_ok
+
+    async def _stream_delete(self, handle: Any, msg: OutboundMessage) -> bool:
+        self.events.append(("delete", handle))
+        return True
+
+
+def _partial(text: str) -> OutboundMessage:
+    return OutboundMessage(channel="fake", chat_id="c", content=text, stream_id="s1", streaming=True)
+
+
+def _final(text: str) -> OutboundMessage:
+    return OutboundMessage(channel="fake", chat_id="c", content=text, stream_id="s1")
+
+
+async def test_send_stream_starts_edits_and_finishes_in_place() -> None:
+    channel = EditableChannel()
+    for msg in (_partial("He"), _partial("Hello"), _final("Hello!")):
+        await channel.send_stream(msg)
+
+    assert channel.events == [("start", "He"), ("edit", "Hello"), ("edit", "Hello!")]
+    assert channel._streams == {}
+
+
+async def test_send_stream_throttles_partial_edits() -> None:
+    channel = EditableChannel()
+    channel.stream_edit_interval = 60.0
+    for msg in (_partial("a"), _partial("ab"), _partial("abc"), _final("abcd")):
+        await channel.send_stream(msg)
+
+    assert channel.events == [("start", "a"), ("edit", "abcd")]
+
+
+async def test_send_stream_falls_back_to_send() -> None:
+    channel = EditableChannel()
+    await channel.send_stream(_final("never streamed"))
+    assert channel.events == [("send", "never streamed")]
+
+    channel.events.clear()
+    channel.edit_ok = False
+    await channel.send_stream(_partial("x"))
+    await channel.send_stream(_final("xy"))
+    assert channel.events == [("start", "x"), ("edit", "xy"), ("send", "xy")]
+
+
+async def test_retracted_stream_is_deleted() -> None:
+    channel = EditableChannel()
+    await channel.send_stream(_partial("Let me check"))
+    await channel.send_stream(OutboundMessage(channel="fake", chat_id="c", content="", stream_id="s1", retracted=True))
+
+    assert channel.events == [("start", "Let me check"), ("delete", "handle-1")]
+    assert channel._streams == {}
+
+
+class ChunkedProvider(LLMProvider):
+    async def chat(self, messages: list[dict[str, Any]], **kwargs: Any) -> LLMResponse:
+        raise AssertionError("streaming path expected")
+
+    async def chat_stream(self, messages: list[dict[str, Any]], **kwargs: Any):
+        for piece in ("Hel", "lo"):
+            yield LLMStreamChunk(delta=piece)
+            await asyncio.sleep(0.35)
+        yield LLMStreamChunk(response=LLMResponse(content="Hello"))
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+async def test_agent_publishes_partials_then_final_with_same_stream_id(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    bus = MessageBus()
+    loop = AgentLoop(bus=bus, provider=ChunkedProvider(), workspace=tmp_path, stream_responses=True)
+
+    msg = InboundMessage(channel="telegram", sender_id="u", chat_id="1", content="hi")
+    final = await loop._process_message(msg, stream=True)
+
+    partials = [bus.outbound.get_nowait() for _ in range(bus.outbound_size)]
+    assert [p.content for p in partials] == ["Hel", "Hello"]
+    assert all(p.streaming and p.stream_id == final.stream_id for p in partials)
+    assert final.content == "Hello" and not final.streaming
+
+
+class ScriptedStreamProvider(LLMProvider):
+    """Streams each scripted (text, tool_calls) turn in one chunk, or raises."""
+
+    def __init__(self, script: list[Any]):
+        super().__init__()
+        self.script = script
+
+    async def chat(self, messages: list[dict[str, Any]], **kwargs: Any) -> LLMResponse:
+        raise AssertionError("streaming path expected")
+
+    async def chat_stream(self, messages: list[dict[str, Any]], **kwargs: Any):
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            yield LLMStreamChunk(delta="partial")
+            raise step
+        text, tool_calls = step
+        yield LLMStreamChunk(delta=text)
+        yield LLMStreamChunk(response=LLMResponse(content=text, tool_calls=tool_calls))
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+def _outbound(bus: MessageBus) -> list[OutboundMessage]:
+    return [bus.outbound.get_nowait() for _ in range(bus.outbound_size)]
+
+
+async def test_only_the_answering_iteration_stays_streamed(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    bus = MessageBus()
+    provider = ScriptedStreamProvider([
+        ("Let me look.", [ToolCallRequest(id="1", name="list_dir", arguments={"path": str(tmp_path)})]),
+        ("查询中，请稍候", []),
+        ("Here it is.", []),
+    ])
+    loop = AgentLoop(bus=bus, provider=provider, workspace=tmp_path, stream_responses=True)
+
+    final = await loop._process_message(InboundMessage(channel="telegram", sender_id="u", chat_id="1", content="hi"), stream=True)
+    sent = _outbound(bus)
+
+    preamble, retract, answer = sent
+    assert preamble.streaming and preamble.content == "Let me look."
+    assert retract.retracted and retract.stream_id == preamble.stream_id
+    # The placeholder was held back; the answer streams under a new id
+    assert answer.streaming and answer.content == "Here it is." and answer.stream_id != preamble.stream_id
+    assert final.content == "Here it is." and final.stream_id == answer.stream_id
+
+
+async def test_error_reply_finishes_the_open_stream(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    bus = MessageBus()
+    provider = ScriptedStreamProvider([RuntimeError("boom")])
+    loop = AgentLoop(bus=bus, provider=provider, workspace=tmp_path, stream_responses=True)
+
+    await loop._dispatch(InboundMessage(channel="fake", sender_id="u", chat_id="c", content="hi"))
+    partial, error = _outbound(bus)
+    assert partial.streaming and error.stream_id == partial.stream_id and not error.streaming
+    assert "boom" in error.content
+
+    channel = EditableChannel()
+    for msg in (partial, error):
+        await channel.send_stream(msg)
+    assert channel._streams == {}
+    assert channel.events[-1] == ("edit", error.content)
+
+
+@pytest.fixture
+def mocked_litellm(tmp_path, monkeypatch):
+    monkeypatch.setattr(usage, "_usage_file", tmp_path / "usage.jsonl")
+    original = litellm_provider.acompletion
+
+    async def fake_acompletion(**kwargs: Any):
+        return await original(mock_response="Hello there world", **kwargs)
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+
+
+async def test_litellm_chat_stream_yields_deltas_and_final_response(mocked_litellm) -> None:
+    provider = LiteLLMProvider(default_model="gpt-4o")
+    chunks = [c async for c in provider.chat_stream([{"role": "user", "content": "hi"}])]
+
+    assert "".join(c.delta for c in chunks) == "Hello there world"
+    assert all(c.response is None for c in chunks[:-1])
+    assert chunks[-1].response.content == "Hello there world"
+    assert chunks[-1].response.usage["completion_tokens"] > 0
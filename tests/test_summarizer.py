@@ -0,0 +1,92 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.summarizer import SessionSummarizer
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.session.manager import SessionManager
+
+
+class SummaryProvider(LLMProvider):
+    """Answers turns instantly; summary requests block until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+        self.summary_requests: list[list[dict[str, Any]]] = []
+
+    async def chat(self, messages: list[dict[str, Any]], **kwargs: Any) -> LLMResponse:
+        if "running summary" in messages[0]["content"]:
+            self.summary_requests.append(messages)
+            await self.release.wait()
+            return LLMResponse(content=f"summary #{len(self.summary_requests)}")
+        return LLMResponse(content="reply")
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return SessionManager(tmp_path / "workspace")
+
+
+def _fill(sessions: SessionManager, key: str, pairs: int):
+    session = sessions.get_or_create(key)
+    for i in range(pairs):
+        session.add_message("user", f"q{i}")
+        session.add_message("assistant", f"a{i}")
+    sessions.save(session)
+    return session
+
+
+async def test_summarizes_older_turns_into_metadata(sessions) -> None:
+    provider = SummaryProvider()
+    provider.release.set()
+    summarizer = SessionSummarizer(provider, sessions, trigger_messages=10, keep_recent=4)
+
+    session = _fill(sessions, "test:1", 4)
+    assert not summarizer.maybe_schedule(session)  # 8 - 4 < 10
+
+    session = _fill(sessions, "test:1", 4)
+    assert summarizer.maybe_schedule(session)
+    await summarizer.wait()
+
+    assert session.metadata == {"summary": "summary #1", "summary_upto": 12}
+    prompt = provider.summary_requests[0][1]["content"]
+    assert prompt.count("user: q") == 6 and prompt.startswith("Previous summary:\n(none)")
+    assert [m["content"] for m in session.get_history()] == ["q2", "a2", "q3", "a3"]
+
+    session.clear()
+    assert session.metadata == {}
+
+
+async def test_turn_reply_does_not_wait_for_summary(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    provider = SummaryProvider()
+    loop = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=tmp_path,
+        summarize_after=4, summary_keep_recent=2,
+    )
+    _fill(loop.sessions, "test:c", 3)
+
+    msg = InboundMessage(channel="test", sender_id="u", chat_id="c", content="next")
+    reply = await asyncio.wait_for(loop._process_message(msg), timeout=1)
+    assert reply.content == "reply"
+    assert "test:c" in loop.summarizer._running
+
+    provider.release.set()
+    await loop.summarizer.wait()
+    session = loop.sessions.get_or_create("test:c")
+    assert session.metadata["summary_upto"] == 6
+
+    messages = loop.context.build_messages(
+        session.get_history(), "later", summary=session.metadata["summary"]
+    )
+    assert messages[1]["content"] == "[Conversation Summary]\nsummary #1"
+    assert [m["content"] for m in messages[3:-1]] == ["next", "reply"]
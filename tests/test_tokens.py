@@ -0,0 +1,21 @@
+from nanobot.utils.tokens import estimate_tokens, model_family, truncate_to_tokens
+
+
+def test_model_family_and_cjk_aware_estimates() -> None:
+    assert model_family("anthropic/claude-opus-4-5") == "claude"
+    assert model_family("openrouter/z-ai/glm-5-turbo") == "cjk"
+    assert model_family("mystery-model") == "default"
+
+    assert estimate_tokens("a" * 400, "gpt-4o") == 100
+    assert estimate_tokens("你好" * 100, "gpt-4o") == 200
+    assert estimate_tokens("你好" * 100, "qwen-max") == 140
+
+
+def test_truncate_keeps_head_and_tail() -> None:
+    text = "HEAD" + "x" * 4000 + "TAIL"
+    short = truncate_to_tokens(text, 100, "gpt-4o")
+
+    assert short.startswith("HEAD") and short.endswith("TAIL")
+    assert "tokens omitted" in short
+    assert estimate_tokens(short, "gpt-4o") < 120
+    assert truncate_to_tokens("tiny", 100) == "tiny"
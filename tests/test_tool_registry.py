@@ -0,0 +1,107 @@
+import asyncio
+import json
+from typing import Any
+
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolRegistry
+
+
+class SleepTool(Tool):
+    """Sleeps, then reports its argument; records start/finish events."""
+
+    def __init__(self, name: str, log: list[str], serial: bool = False):
+        self._name = name
+        self._log = log
+        self.serial = serial
+        self.active = 0
+        self.peak = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return "sleep tool"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"tag": {"type": "string"}}, "required": ["tag"]}
+
+    async def execute(self, tag: str, **kwargs: Any) -> str:
+        self._log.append(f"start:{tag}")
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        self._log.append(f"end:{tag}")
+        return f"{self._name}:{tag}"
+
+
+async def test_execute_many_runs_concurrently_and_preserves_order() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    tool = SleepTool("fetch", log)
+    reg.register(tool)
+
+    calls = [("fetch", {"tag": str(i)}) for i in range(4)]
+    results = await reg.execute_many(calls, max_concurrency=4)
+
+    assert results == ["fetch:0", "fetch:1", "fetch:2", "fetch:3"]
+    assert tool.peak == 4
+
+
+async def test_execute_many_respects_concurrency_cap() -> None:
+    reg = ToolRegistry()
+    tool = SleepTool("fetch", [])
+    reg.register(tool)
+
+    await reg.execute_many([("fetch", {"tag": str(i)}) for i in range(6)], max_concurrency=2)
+
+    assert tool.peak == 2
+
+
+async def test_execute_many_treats_serial_tools_as_barriers() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    reg.register(SleepTool("fetch", log))
+    reg.register(SleepTool("write", log, serial=True))
+
+    results = await reg.execute_many(
+        [
+            ("fetch", {"tag": "a"}),
+            ("fetch", {"tag": "b"}),
+            ("write", {"tag": "w"}),
+            ("fetch", {"tag": "c"}),
+            ("missing", {}),
+        ]
+    )
+
+    assert results[:4] == ["fetch:a", "fetch:b", "write:w", "fetch:c"]
+    assert "not found" in results[4]
+    w_start, w_end = log.index("start:w"), log.index("end:w")
+    assert log.index("end:a") < w_start and log.index("end:b") < w_start
+    assert w_end < log.index("start:c")
+
+
+def test_definitions_are_cached_until_the_registry_changes() -> None:
+    reg = ToolRegistry()
+    reg.register(SleepTool("a", []))
+    first = reg.get_definitions()
+    version = reg.version
+
+    assert reg.get_definitions() is first
+    assert first.version == version
+    assert json.loads(first.json) == [{"type": "function", "function": {
+        "name": "a", "description": "sleep tool", "parameters": SleepTool("a", []).parameters,
+    }}]
+
+    reg.register(SleepTool("b", []))
+    second = reg.get_definitions()
+    assert second is not first and reg.version > version
+    assert [d["function"]["name"] for d in second] == ["a", "b"]
+
+    reg.unregister("missing")
+    assert reg.get_definitions() is second
+    reg.unregister("a")
+    assert [d["function"]["name"] for d in reg.get_definitions()] == ["b"]
@@ -0,0 +1,110 @@
+import json
+from typing import Any
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.config.schema import ToolRoutingConfig
+from nanobot.cron.service import CronService
+from nanobot.providers.base import LLMResponse
+from nanobot.providers.replay import ReplayProvider
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+def _make_loop(home, script: list[dict[str, Any]], **routing: Any) -> tuple[AgentLoop, list[list[str]]]:
+    workspace = home / "workspace"
+    workspace.mkdir(exist_ok=True)
+    provider = ReplayProvider(script=script)
+    offered: list[list[str]] = []
+    original = provider.chat
+
+    async def chat(messages: list[dict[str, Any]], tools: list | None = None, **kwargs: Any) -> LLMResponse:
+        offered.append([t["function"]["name"] for t in tools or []])
+        return await original(messages, tools=tools, **kwargs)
+
+    provider.chat = chat
+    loop = AgentLoop(
+        bus=MessageBus(),
+        provider=provider,
+        workspace=workspace,
+        cron_service=CronService(home / "cron.json"),
+        tool_routing=ToolRoutingConfig(enabled=True, **routing),
+    )
+    return loop, offered
+
+
+async def test_chit_chat_gets_only_the_core_set(home) -> None:
+    loop, offered = _make_loop(home, [{"content": "hi!"}])
+    await loop.process_direct("hello there, how are you?")
+
+    assert offered == [["read_file", "write_file", "edit_file", "list_dir", "exec", "load_tools"]]
+
+
+async def test_message_terms_select_matching_tools(home) -> None:
+    loop, offered = _make_loop(home, [{"content": "ok"}] * 3, channel_tools={"telegram": ["message"]})
+    await loop.process_direct("remind me to water the plants every day")
+    await loop.process_direct("每天早上提醒我喝水")
+    await loop.process_direct("search the web for the latest news", channel="telegram")
+
+    assert "cron" in offered[0] and "web_search" not in offered[0]
+    assert "cron" in offered[1]
+    assert {"web_search", "message"} <= set(offered[2]) and "cron" not in offered[2]
+    assert all("spawn" not in names for names in offered)
+
+
+async def test_load_tools_and_skill_reads_widen_the_turn(home) -> None:
+    loop, offered = _make_loop(home, [
+        {"tool_calls": [{"name": "load_tools", "arguments": {"names": ["spawn"]}}]},
+        {"tool_calls": [{"name": "load_tools", "arguments": {"all": True}}]},
+        {"content": "done"},
+        {"content": "next turn"},
+    ])
+    await loop.process_direct("hello")
+    await loop.process_direct("hello again")
+
+    assert "spawn" not in offered[0]
+    assert "spawn" in offered[1] and "cron" not in offered[1]
+    assert {"spawn", "cron", "web_fetch", "screenshot"} <= set(offered[2])
+    assert "load_tools" not in offered[2]
+    assert "spawn" not in offered[3]  # Routing starts over each turn
+
+    skill = loop.workspace / "skills" / "digest"
+    skill.mkdir(parents=True)
+    (skill / "SKILL.md").write_text(
+        '---\nname: digest\ndescription: Daily digest\n'
+        'metadata: {"nanobot": {"tools": ["web_fetch", "cron"]}}\n---\n\nFetch and schedule.\n'
+    )
+    def call(name: str, arguments: str) -> list[dict[str, Any]]:
+        return [{"role": "assistant", "content": "", "tool_calls": [{
+            "id": "1", "type": "function", "function": {"name": name, "arguments": arguments},
+        }]}]
+
+    # Arguments are read with the same coercion the tool gets
+    route = loop.router.start_turn("hello", "cli", [])
+    names = [d["function"]["name"] for d in route.definitions(call("load_tools", '{"all": "false"}'))]
+    assert "spawn" not in names and "load_tools" in names
+    route = loop.router.start_turn("hello", "cli", [])
+    names = [d["function"]["name"] for d in route.definitions(call("load_tools", '{"all": "true"}'))]
+    assert "spawn" in names
+
+    route = loop.router.start_turn("hello", "cli", [])
+    names = [d["function"]["name"] for d in route.definitions(call("read_file", json.dumps({"path": str(skill / "SKILL.md")})))]
+    assert {"web_fetch", "cron"} <= set(names) and "spawn" not in names
+
+
+def test_subsets_are_keyed_by_their_tools(home) -> None:
+    loop, _ = _make_loop(home, [])
+    router = loop.router
+    full = loop.tools.get_definitions()
+    core = router.subset({"read_file", "exec"})
+    wider = router.subset({"read_file", "exec", "cron"})
+
+    assert core.version == wider.version == full.version
+    assert len({core.key, wider.key, full.key}) == 3
+    assert router.subset({"exec", "read_file"}).key == core.key
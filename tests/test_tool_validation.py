@@ -86,3 +86,44 @@ async def test_registry_returns_validation_error() -> None:
     reg.register(SampleTool())
     result = await reg.execute("sample", {"query": "hi"})
     assert "Invalid parameters" in result
+
+
+def test_prepare_params_coerces_common_llm_slips() -> None:
+    tool = SampleTool()
+    params = {"query": 42, "count": "3", "meta": '{"tag": "x", "flags": ["a"]}'}
+    fixed, errors = tool.prepare_params(params)
+    assert errors == []
+    assert fixed == {"query": "42", "count": 3, "meta": {"tag": "x", "flags": ["a"]}}
+    assert params["count"] == "3"  # the caller's dict is left alone
+
+    untouched = {"query": "hi", "count": 2}
+    assert tool.prepare_params(untouched) == (untouched, [])
+    assert tool.prepare_params(untouched)[0] is untouched
+
+    _, errors = tool.prepare_params({"query": "hi", "count": "two", "meta": "[1]"})
+    assert "count should be integer" in errors and "meta should be object" in errors
+    _, errors = tool.prepare_params({"query": "hi", "count": "20"})
+    assert errors == ["count must be <= 10"]
+
+
+async def test_registry_compiles_schema_once_and_executes_coerced_params() -> None:
+    class CountingTool(SampleTool):
+        reads = 0
+        received: dict[str, Any] = {}
+
+        @property
+        def parameters(self) -> dict[str, Any]:
+            CountingTool.reads += 1
+            return super().parameters
+
+        async def execute(self, **kwargs: Any) -> str:
+            CountingTool.received = kwargs
+            return "ok"
+
+    reg = ToolRegistry()
+    reg.register(CountingTool())
+    reads = CountingTool.reads
+    for _ in range(3):
+        assert await reg.execute("sample", {"query": "hi", "count": "2"}) == "ok"
+    assert CountingTool.reads == reads
+    assert CountingTool.received == {"query": "hi", "count": 2}
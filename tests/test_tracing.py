@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.replay import ReplayProvider
+from nanobot.utils import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    path = tmp_path / "traces.jsonl"
+    tracing.configure(path)
+    yield path
+    tracing.shutdown()
+
+
+def _spans(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+async def test_turn_spans_share_the_trace_from_metadata(tmp_path, trace_file) -> None:
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    provider = ReplayProvider(script=[
+        {"tool_calls": [{"name": "list_dir", "arguments": {"path": str(workspace)}}]},
+        {"content": "done"},
+    ])
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=workspace)
+    runner = asyncio.create_task(loop.run())
+
+    msg = InboundMessage(channel="test", sender_id="u", chat_id="c", content="hi")
+    await loop.bus.publish_inbound(msg)
+    reply = await asyncio.wait_for(loop.bus.consume_outbound(), timeout=5)
+    loop.stop()
+    await runner
+
+    trace_id = msg.metadata[tracing.TRACE_ID_KEY]
+    assert reply.metadata[tracing.TRACE_ID_KEY] == trace_id
+
+    # The reply's dispatch (another task) attaches through the metadata
+    with tracing.span("outbound.dispatch", metadata=reply.metadata):
+        pass
+    tracing.shutdown()
+
+    spans = _spans(trace_file)
+    assert {s["traceId"] for s in spans} == {trace_id}
+    names = [s["name"] for s in spans]
+    for name in ("bus.wait", "session.load", "context.build", "tool.execute", "session.save", "turn"):
+        assert names.count(name) == 1, name
+    assert names.count("llm.call") == 2
+
+    root = next(s for s in spans if s["name"] == "turn")
+    assert "parentSpanId" not in root
+    assert all(s["parentSpanId"] == root["spanId"] for s in spans if s is not root)
+    llm = next(s for s in spans if s["name"] == "llm.call")
+    assert llm["attributes"]["prompt_tokens"] > 0 and "ttft_ms" in llm["attributes"]
+    tool = next(s for s in spans if s["name"] == "tool.execute")
+    assert tool["attributes"]["tool"] == "list_dir"
+
+
+async def test_tracing_disabled_is_a_no_op() -> None:
+    tracing.shutdown()
+    metadata: dict = {}
+    tracing.inject(metadata)
+    with tracing.turn(metadata) as root, tracing.span("child") as child:
+        root.set("ignored", 1)
+        child.set("ignored", 1)
+    assert metadata == {}
+    assert root is tracing.NOOP_SPAN and child is tracing.NOOP_SPAN
+
+
+def test_unsampled_messages_are_not_traced(tmp_path) -> None:
+    tracing.configure(tmp_path / "t.jsonl", sample_rate=0.0)
+    try:
+        metadata: dict = {}
+        tracing.inject(metadata)
+        assert tracing.TRACE_ID_KEY not in metadata
+    finally:
+        tracing.shutdown()
+
+
+def test_errors_mark_the_span(trace_file) -> None:
+    metadata: dict = {}
+    tracing.inject(metadata)
+    with pytest.raises(RuntimeError):
+        with tracing.turn(metadata):
+            with tracing.span("session.save"):
+                raise RuntimeError("disk full")
+    tracing.shutdown()
+
+    spans = {s["name"]: s for s in _spans(trace_file)}
+    assert spans["session.save"]["status"] == "error"
+    assert "disk full" in spans["turn"]["attributes"]["error"]
@@ -0,0 +1,56 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+from nanobot.agent import usage
+
+
+def _records(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_records_are_batched_off_thread_and_flushed_on_close(tmp_path) -> None:
+    path = tmp_path / "usage.jsonl"
+    writer = usage.UsageWriter(batch_size=3, flush_interval_s=60)
+    seen_threads: set[str] = set()
+
+    def cost() -> float:
+        seen_threads.add(threading.current_thread().name)
+        return 0.25
+
+    for i in range(3):
+        writer.submit(path, {"model": "m", "in": i, "out": 1, "cost": cost})
+    # Reaching the batch size wakes the writer thread
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert seen_threads == {"nanobot-usage"}
+
+    writer.submit(path, {"model": "m", "in": 3, "out": 1, "cost": 0.5})
+    writer.close()
+
+    records = _records(path)
+    assert [r["in"] for r in records] == [0, 1, 2, 3]
+    assert [r["cost"] for r in records] == [0.25, 0.25, 0.25, 0.5]
+
+
+def test_full_buffer_drops_oldest_and_counts(tmp_path) -> None:
+    path = tmp_path / "usage.jsonl"
+    writer = usage.UsageWriter(capacity=3, batch_size=100, flush_interval_s=60)
+    writer._closed = True  # no background thread: simulate a stalled disk
+
+    for i in range(5):
+        writer.submit(path, {"model": "m", "in": i, "out": 0, "cost": 0.0})
+    assert writer.dropped == 2
+
+    writer.flush()
+    assert [r["in"] for r in _records(path)] == [2, 3, 4]
+
+
+def test_failed_write_is_counted_as_dropped(tmp_path) -> None:
+    writer = usage.UsageWriter(flush_interval_s=60)
+    writer._closed = True
+    writer.submit(tmp_path / "missing" / "usage.jsonl", {"model": "m", "in": 1, "out": 0, "cost": 0.0})
+    writer.flush()
+    assert writer.dropped == 1
@@ -0,0 +1,87 @@
+import gzip
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from nanobot.agent import usage
+from nanobot.utils import usage_archive
+
+
+def _entry(day: date, sender: str = "alice", model: str = "gpt-4o", tokens: int = 100) -> dict:
+    ts = datetime.combine(day, datetime.min.time(), timezone.utc) + timedelta(hours=12)
+    return {
+        "ts": ts.isoformat(), "sender": sender, "channel": "telegram", "model": model,
+        "in": tokens, "out": 10, "total": tokens + 10, "cost": 0.5,
+    }
+
+
+def test_writer_rotates_closed_day_into_archive(tmp_path) -> None:
+    live = tmp_path / "usage.jsonl"
+    today = datetime.now(timezone.utc).date()
+    yesterday = today - timedelta(days=1)
+    writer = usage.UsageWriter(flush_interval_s=60)
+    writer._closed = True  # flush by hand
+
+    writer.submit(live, _entry(yesterday))
+    writer.submit(live, _entry(yesterday, sender="bob"))
+    writer.flush()
+    writer.submit(live, _entry(today))
+    writer.flush()
+
+    directory = usage_archive.archive_dir(live)
+    day = yesterday.isoformat()
+    assert (directory / f"{day}.jsonl.gz").exists()
+    assert usage_archive.day_files(directory)[day].suffix in (".ucol", ".parquet")
+    assert usage_archive.log_day(live) == today.isoformat()
+
+    by_day = usage_archive.query(live, by=("day",))
+    assert by_day[(day,)]["calls"] == 2 and by_day[(today.isoformat(),)]["calls"] == 1
+
+
+@pytest.mark.skipif(usage_archive.fcntl is None, reason="needs fcntl")
+def test_rotation_waits_for_an_append_in_progress(tmp_path) -> None:
+    live = tmp_path / "usage.jsonl"
+    day = date(2026, 3, 1)
+    live.write_text(json.dumps(_entry(day)) + "\n")
+
+    with usage_archive.log_lock(live), open(live, "a") as f:
+        rotation = threading.Thread(target=usage_archive.rotate, args=(live,))
+        rotation.start()
+        time.sleep(0.1)
+        assert rotation.is_alive() and live.exists()
+        f.write(json.dumps(_entry(day, sender="late")) + "\n")
+    rotation.join(timeout=5)
+
+    with gzip.open(usage_archive.archive_dir(live) / f"{day}.jsonl.gz", "rt") as gz:
+        assert [json.loads(line)["sender"] for line in gz] == ["alice", "late"]
+
+
+def test_columnar_day_round_trips_and_filters(tmp_path) -> None:
+    days = [date(2026, 3, d) for d in (1, 2, 3)]
+    table = usage_archive.DayTable.from_records(
+        [_entry(days[0]), _entry(days[0], sender="bob", model="claude"), {"ts": "garbage"}]
+    )
+    path = tmp_path / "t.ucol"
+    usage_archive._write_ucol(table, path)
+
+    loaded = usage_archive.read_table(path)
+    assert loaded.rows == 2
+    assert loaded.column("sender") == ["alice", "bob"]
+    assert list(loaded.column("in")) == [100, 100]
+    only_in = usage_archive.read_table(path, ["ts", "model"])
+    assert set(only_in.numeric) == {"ts"} and only_in.column("model") == ["gpt-4o", "claude"]
+
+    live = tmp_path / "usage.jsonl"
+    directory = usage_archive.archive_dir(live)
+    directory.mkdir()
+    for day in days:
+        usage_archive._write_ucol(
+            usage_archive.DayTable.from_records([_entry(day), _entry(day, sender="bob", tokens=1)]),
+            directory / f"{day.isoformat()}.ucol",
+        )
+
+    rows = usage_archive.query(live, since=days[1], until=days[2], sender="bob", by=("sender", "model"))
+    assert rows == {("bob", "gpt-4o"): {"calls": 2, "in": 2, "out": 20, "total": 22, "cost": 1.0, "saved": 0.0}}